@@ -0,0 +1,196 @@
+from PyQt5.QtCore import QPointF
+from geom_tools import roundedRectCorners
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Batch arrow endpoint resolution.  Straight arrows between two rounded rect nodes
+# (GraphNode and subclasses) that are siblings of the arrow, none with a transform of its own,
+# are resolved together in one vectorized pass; anything else falls back to
+# GraphArrow.updatePosition() one at a time.  Siblings map into each other by their pos
+# difference, the way QGraphicsItem.mapFromItem does, and every step repeats the per-arrow
+# arithmetic in the same order, so both paths put the endpoints in exactly the same place.
+
+def numpyAvailable():
+    return np is not None
+
+def updateArrowPositions(arrows):
+    if np is None:
+        for arr in arrows:
+            arr.updatePosition()
+        return
+    batch = []
+    for arr in arrows:
+        if isBatchable(arr):
+            batch.append(arr)
+        else:
+            arr.updatePosition()
+    if batch:
+        _batchUpdatePositions(batch)
+
+def isBatchable(arr):
+    if arr.isBezier() or arr.scene() is None:
+        return False
+    src = arr.fromNode()
+    dst = arr.toNode()
+    if src is None or dst is None or src is dst:
+        return False
+    parent = arr.parentItem()
+    for item in (arr, src, dst):
+        if item.parentItem() is not parent or not isUntransformed(item):
+            return False
+    return hasattr(src, 'cornerRadius') and hasattr(dst, 'cornerRadius')
+
+def isUntransformed(item):
+    return item.transform().isIdentity() and item.rotation() == 0.0 and item.scale() == 1.0 and \
+           item.transformOriginPoint().isNull()
+
+def _batchUpdatePositions(arrows):
+    n = len(arrows)
+    node_index = {}
+    nodes = []
+    src_k = np.empty(n, dtype=np.intp)
+    dst_k = np.empty(n, dtype=np.intp)
+    # Qt's own shape test, as in GfxObject.closestBoundaryPosToItem, so both paths agree on overlaps
+    src_hits = np.array([arr.fromNode().collidesWithItem(arr.toNode()) for arr in arrows], dtype=bool)
+    dst_hits = np.array([arr.toNode().collidesWithItem(arr.fromNode()) for arr in arrows], dtype=bool)
+    for k in range(n):
+        arr = arrows[k]
+        for node, index in ((arr.fromNode(), src_k), (arr.toNode(), dst_k)):
+            j = node_index.get(id(node))
+            if j is None:
+                j = node_index[id(node)] = len(nodes)
+                nodes.append(node)
+            index[k] = j
+
+    # Per-node rect, corner radius and position in the common parent
+    geom = np.empty((len(nodes), 7))
+    for j in range(len(nodes)):
+        node = nodes[j]
+        rect = node.boundingRect()
+        pos = node.pos()
+        geom[j] = (rect.left(), rect.top(), rect.right(), rect.bottom(), node.cornerRadius(), pos.x(), pos.y())
+    S = geom[src_k].T
+    D = geom[dst_k].T
+
+    a = _closestBoundaryPosToItem(S, D, src_hits)
+    b = _closestBoundaryPosToItem(D, S, dst_hits)
+
+    # Into each arrow's local coordinates
+    arrow_pos = np.array([(arr.pos().x(), arr.pos().y()) for arr in arrows]).T
+    a = _mapBetween(S, arrow_pos, *a)
+    b = _mapBetween(D, arrow_pos, *b)
+
+    # BUGFIX (same as GraphArrow.updatePosition): degenerate lines get a unit length
+    same = (a[0] == b[0]) & (a[1] == b[1])
+    b = (np.where(same, a[0] + 1, b[0]), b[1])
+
+    heads = _arrowHeads(arrows, a, b)
+
+    ax, ay = a[0].tolist(), a[1].tolist()
+    bx, by = b[0].tolist(), b[1].tolist()
+    for k in range(n):
+        arr = arrows[k]
+        arr._updatingPos = True
+        arr.prepareGeometryChange()
+        arr.toPoint().setPos(QPointF(bx[k], by[k]))
+        arr.fromPoint().setPos(QPointF(ax[k], ay[k]))
+        arr.setArrowHeadPoints(heads[k])
+        arr._updatingPos = False
+
+def _mapBetween(G0, G1, x, y):
+    # Map points from sibling G0's coordinates into G1's (rows end in x, y position), broadcasting
+    # over extra columns; the offset is taken first, as QGraphicsItem.itemTransform does for siblings
+    dx = G0[-2] - G1[-2]
+    dy = G0[-1] - G1[-1]
+    if x.ndim == 2:
+        dx = dx[:, None];  dy = dy[:, None]
+    return x + dx, y + dy
+
+def _rectCorners(G):
+    # Same order as geom_tools.rectToPoly
+    l, t, r, b = G[0], G[1], G[2], G[3]
+    x = np.stack((l, r, r, l), axis=1)
+    y = np.stack((t, t, b, b), axis=1)
+    return x, y
+
+def closestRoundedRectXY(left, top, right, bottom, r, x, y):
+    # Vectorized geom_tools.closestRoundedRectXY; rect parameters broadcast against x and y
+    if x.ndim == 2:
+        left, top, right, bottom, r = (c[:, None] for c in (left, top, right, bottom, r))
+    px = np.minimum(np.maximum(x, left), right)
+    py = np.minimum(np.maximum(y, top), bottom)
+    rx = px.copy()
+    ry = py.copy()
+    done = np.zeros(px.shape, dtype=bool)
+    for qx, qy in roundedRectCorners:
+        corner_x = right if qx == 1 else left
+        corner_y = bottom if qy == 1 else top
+        mask = ~done & ((px - corner_x)**2 + (py - corner_y)**2 <= r * r)
+        if not mask.any():
+            continue
+        ox = corner_x - qx * r
+        oy = corner_y - qy * r
+        ux = np.maximum(x - ox, 0.0) if qx == 1 else np.minimum(x - ox, 0.0)
+        uy = np.maximum(y - oy, 0.0) if qy == 1 else np.minimum(y - oy, 0.0)
+        mag = np.sqrt(ux*ux + uy*uy)
+        zero = mag == 0.0
+        ux = np.where(zero, qx, ux)
+        uy = np.where(zero, qy, uy)
+        mag = np.where(zero, np.sqrt(2.0), mag)
+        rx = np.where(mask, ox + ux / mag * r, rx)
+        ry = np.where(mask, oy + uy / mag * r, ry)
+        done |= mask
+    return rx, ry
+
+def _project(G, x, y):
+    return closestRoundedRectXY(G[0], G[1], G[2], G[3], G[4], x, y)
+
+def _cornerMean(x):
+    # Summed left to right like the QPointF sum in closestBoundaryPosToItem
+    return (((x[:, 0] + x[:, 1]) + x[:, 2]) + x[:, 3]) / 4
+
+def _closestBoundaryPosToItem(S, D, collide):
+    # Vectorized GfxObject.closestBoundaryPosToItem for self=S, item=D; collide[k] is S.collidesWithItem(D)
+    x, y = _mapBetween(D, S, *_rectCorners(D))
+    x, y = _project(S, x, y)
+    self_x = _cornerMean(x);  self_y = _cornerMean(y)
+
+    x, y = _mapBetween(S, D, *_rectCorners(S))
+    x, y = _project(D, x, y)
+    obj_x = _cornerMean(x);  obj_y = _cornerMean(y)
+
+    x, y = _project(D, *_mapBetween(S, D, self_x, self_y))
+    obj_x = (obj_x + x) / 2
+    obj_y = (obj_y + y) / 2
+
+    x, y = _project(S, *_mapBetween(D, S, obj_x, obj_y))
+
+    # Colliding items anchor at the center of self's rect
+    x = np.where(collide, (S[0] + S[2]) / 2, x)
+    y = np.where(collide, (S[1] + S[3]) / 2, y)
+    return x, y
+
+def _arrowHeads(arrows, a, b):
+    # Vectorized GraphArrow.updateArrowHead for straight arrows
+    rev = np.array([arr.reversed() for arr in arrows])
+    size = np.array([arr.arrowHeadSize() for arr in arrows], dtype=float)
+    ux = np.where(rev, a[0] - b[0], b[0] - a[0])
+    uy = np.where(rev, a[1] - b[1], b[1] - a[1])
+    tip_x = np.where(rev, a[0], b[0])
+    tip_y = np.where(rev, a[1], b[1])
+    mag = np.hypot(ux, uy)
+    empty = mag == 0.0
+    mag = np.where(empty, 1.0, mag)
+    ux /= mag;  uy /= mag
+    vx = -uy;  vy = ux
+    px = tip_x - (ux + vx) * size;  py = tip_y - (uy + vy) * size
+    qx = tip_x + (vx - ux) * size;  qy = tip_y + (vy - uy) * size
+    rx = tip_x - ux * size;  ry = tip_y - uy * size
+    c0x = (px + tip_x + rx) / 3;  c0y = (py + tip_y + ry) / 3
+    c1x = (qx + tip_x + rx) / 3;  c1y = (qy + tip_y + ry) / 3
+    cols = np.stack((px, py, c0x, c0y, tip_x, tip_y, c1x, c1y, qx, qy), axis=1).tolist()
+    empty = empty.tolist()
+    return [None if empty[k] else cols[k] for k in range(len(arrows))]
@@ -0,0 +1,174 @@
+from PyQt5.QtCore import QObject, QThread, QTimer, QStandardPaths, pyqtSignal
+from project_file import takeSnapshot, ProjectWriter
+import time
+import os
+
+# Background autosave.  The GUI thread only takes a snapshot of each watched editor (plain
+# tables, see project_file.takeSnapshot) and hands it off; the snapshot is never touched by
+# the GUI thread again, so the worker can serialize and fsync it without any locking.  At most
+# one save per editor is in flight; edits made meanwhile are picked up by the next round.
+
+class AutosaveWorker(QObject):
+    saved = pyqtSignal(str, float)
+    failed = pyqtSignal(str, str)
+
+    def save(self, path, snap):
+        start = time.perf_counter()
+        temp = path + ".tmp"
+        try:
+            with open(temp, 'wb') as stream:
+                writer = ProjectWriter(stream)
+                writer.writeSnapshot(snap)
+                writer.close()
+                stream.flush()
+                os.fsync(stream.fileno())
+            os.replace(temp, path)
+            _syncDirectory(os.path.dirname(path))
+        except Exception as e:      # Serialization errors too: every request must answer with saved or failed
+            self.failed.emit(path, str(e))
+        else:
+            self.saved.emit(path, time.perf_counter() - start)
+
+    def finish(self):
+        # Queued behind any pending saves, so stopping never drops one
+        QThread.currentThread().quit()
+
+
+def _syncDirectory(directory):
+    # Makes the rename durable; not every platform lets a directory be opened
+    try:
+        fd = os.open(directory or ".", os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class Autosave(QObject):
+    DefaultInterval = 60000         # msec between timed saves
+    DefaultChangeLimit = 50         # Undo stack changes that trigger a save before the timer does
+    Suffix = ".adcp"
+
+    saveRequested = pyqtSignal(str, object)
+    finishRequested = pyqtSignal()
+    saved = pyqtSignal(str, float)
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, directory=None, interval=None, change_limit=None):
+        super().__init__()
+        if directory is None:
+            directory = os.path.join(QStandardPaths.writableLocation(QStandardPaths.AppLocalDataLocation), "autosave")
+        if interval is None:
+            interval = self.DefaultInterval
+        if change_limit is None:
+            change_limit = self.DefaultChangeLimit
+        self._directory = directory
+        self._changeLimit = change_limit
+        self._editors = {}          # editor -> [path, changes since last snapshot]
+        self._inFlight = set()
+        self._thread = QThread()
+        self._worker = AutosaveWorker()
+        self._worker.moveToThread(self._thread)
+        self.saveRequested.connect(self._worker.save)
+        self.finishRequested.connect(self._worker.finish)
+        self._worker.saved.connect(self._saveFinished)
+        self._worker.failed.connect(self._saveFailed)
+        self._thread.start()
+        self._timer = QTimer()
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self.saveAll)
+        self._timer.start()
+        # Threshold saves wait until the current event (e.g. a bulk edit) has returned
+        self._soon = QTimer()
+        self._soon.setSingleShot(True)
+        self._soon.setInterval(0)
+        self._soon.timeout.connect(self.saveChanged)
+
+    def directory(self):
+        return self._directory
+
+    def interval(self):
+        return self._timer.interval()
+
+    def setInterval(self, msec):
+        self._timer.setInterval(msec)
+
+    def changeLimit(self):
+        return self._changeLimit
+
+    def setChangeLimit(self, limit):
+        self._changeLimit = limit
+
+    def path(self, editor):
+        entry = self._editors.get(editor)
+        if entry:
+            return entry[0]
+
+    def watch(self, editor, name):
+        os.makedirs(self._directory, exist_ok=True)
+        # Tabs can share a name, but each editor gets a file of its own
+        taken = {entry[0] for other, entry in self._editors.items() if other is not editor}
+        path = os.path.join(self._directory, name + self.Suffix)
+        count = 1
+        while path in taken:
+            count += 1
+            path = os.path.join(self._directory, name + " (" + str(count) + ")" + self.Suffix)
+        self._editors[editor] = [path, 0]
+        editor.undoStack().indexChanged.connect(lambda index: self._stackChanged(editor))
+
+    def unwatch(self, editor):
+        self._editors.pop(editor, None)
+
+    def _stackChanged(self, editor):
+        entry = self._editors.get(editor)
+        if entry:
+            entry[1] += 1
+            if self._changeLimit and entry[1] >= self._changeLimit:
+                self._soon.start()
+
+    def saveChanged(self):
+        for editor, entry in self._editors.items():
+            if self._changeLimit and entry[1] >= self._changeLimit:
+                self.save(editor)
+
+    def saveAll(self):
+        for editor, entry in self._editors.items():
+            if entry[1]:
+                self.save(editor)
+
+    def save(self, editor):
+        entry = self._editors[editor]
+        path = entry[0]
+        if path in self._inFlight:
+            return False
+        self._inFlight.add(path)
+        try:
+            snap = takeSnapshot(editor)
+        except Exception as e:      # e.g. an item type project files can't hold; this runs in timer slots
+            self._saveFailed(path, str(e))
+            return False
+        entry[1] = 0
+        self.saveRequested.emit(path, snap)
+        return True
+
+    def _saveFinished(self, path, elapsed):
+        self._inFlight.discard(path)
+        self.saved.emit(path, elapsed)
+
+    def _saveFailed(self, path, message):
+        self._inFlight.discard(path)
+        self.failed.emit(path, message)
+
+    def isSaving(self):
+        return bool(self._inFlight)
+
+    def stop(self):
+        self._timer.stop()
+        self._soon.stop()
+        if self._thread.isRunning():
+            self.finishRequested.emit()
+            self._thread.wait()
@@ -0,0 +1,371 @@
+import os
+import sys
+import random
+from time import perf_counter
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QPointF
+
+
+Kinds = ("random", "grid", "chain", "complete", "pullback")
+RandomMorphismsPerObject = 2
+
+
+def generateDiagram(kind, num_objects, num_morphisms=None, seed=0):
+    # Builds a CategoryDiagram of the given shape through a CategoryDiagramEditor.  num_morphisms
+    # caps the arrows the shape asks for (None takes them all); random diagrams have no full
+    # shape, so None gives them RandomMorphismsPerObject arrows per object.
+    from graph_scene import GraphScene
+    from category_diagram_editor import CategoryDiagramEditor
+    from category_diagram import CategoryDiagram
+    from category_object import CategoryObject
+    from category_arrow import CategoryArrow
+    rand = random.Random(seed)
+    editor = CategoryDiagramEditor(window=None)
+    editor.setScene(GraphScene())
+    C = CategoryDiagram()
+    C.setEditor(editor)
+    editor.addNode(C)
+    side = max(1, int(num_objects ** 0.5))
+    objects = []
+    for k in range(num_objects):
+        x = CategoryObject()
+        x.setEditor(editor)
+        x.setPos(QPointF((k % side) * 80, (k // side) * 80))
+        objects.append(x)
+    ends = _arrowEnds(kind, objects, side, num_morphisms, rand)
+    arrows = []
+    for k in range(len(ends)):
+        f = CategoryArrow()
+        f.setEditor(editor)
+        arrows.append(f)
+    with C.bulkEdit():
+        C.addItems(objects, arrows)
+        for f, (X, Y) in zip(arrows, ends):
+            f.setDomain(X)
+            f.setCodomain(Y)
+    return editor, C, objects, arrows
+
+
+def _arrowEnds(kind, objects, side, limit, rand):
+    n = len(objects)
+    if kind == "random":
+        if n < 2:
+            return []
+        if limit is None:
+            limit = RandomMorphismsPerObject * n
+        return [tuple(rand.sample(objects, 2)) for k in range(limit)]
+    ends = []
+    if kind == "grid":
+        for k in range(n):
+            if (k + 1) % side and k + 1 < n:
+                ends.append((objects[k], objects[k + 1]))
+            if k + side < n:
+                ends.append((objects[k], objects[k + side]))
+    elif kind == "chain":
+        ends = [(objects[k], objects[k + 1]) for k in range(n - 1)]
+    elif kind == "complete":
+        for X in objects:
+            for Y in objects:
+                if X is not Y:
+                    ends.append((X, Y))
+                    if limit is not None and len(ends) >= limit:
+                        return ends
+    elif kind == "pullback":
+        # Squares P -> A, P -> B, A -> Z, B -> Z, each a pullback / pushout candidate; the
+        # corners of neighbouring squares are shared so paths run across the whole diagram
+        for k in range(0, n - 3, 3):
+            P, A, B, Z = objects[k:k + 4]
+            ends += [(P, A), (P, B), (A, Z), (B, Z)]
+    else:
+        raise ValueError("Unknown diagram kind " + kind + ".")
+    if limit is not None:
+        ends = ends[:limit]
+    return ends
+
+
+def buildScene(num_objects, num_morphisms, seed=0):
+    editor, C, objects, arrows = generateDiagram("random", num_objects, num_morphisms, seed)
+    return editor, C, arrows
+
+
+def timeIt(func, repeat):
+    best = None
+    for k in range(repeat):
+        t = perf_counter()
+        func()
+        t = perf_counter() - t
+        if best is None or t < best:
+            best = t
+    return best
+
+
+def benchArrowLayout(num_objects=200, num_morphisms=500, repeat=3):
+    from arrow_layout import updateArrowPositions, numpyAvailable
+    editor, C, arrows = buildScene(num_objects, num_morphisms)
+
+    def perArrow():
+        for arr in arrows:
+            arr.updatePosition()
+
+    per_arrow = timeIt(perArrow, repeat)
+    lines = [arr.line() for arr in arrows]
+    batch = timeIt(lambda: updateArrowPositions(arrows), repeat)
+    error = max(max((line.p1() - arr.line().p1()).manhattanLength(), (line.p2() - arr.line().p2()).manhattanLength())
+                for line, arr in zip(lines, arrows))
+    assert error == 0, "Batched arrow layout moved an endpoint by " + str(error) + " from the per-arrow layout."
+    return {
+        "objects": num_objects,
+        "morphisms": num_morphisms,
+        "numpy": numpyAvailable(),
+        "per arrow (s)": per_arrow,
+        "batch (s)": batch,
+        "speedup": per_arrow / batch if batch else None,
+        "max endpoint deviation": error,
+    }
+
+
+########################## SCENARIOS #################################
+
+
+def timeRuns(run, repeat, setup=None):
+    # Each run gets fresh state from setup(), whose cost isn't counted
+    times = []
+    for k in range(repeat):
+        state = setup() if setup else None
+        t = perf_counter()
+        run(state)
+        times.append(perf_counter() - t)
+    times.sort()
+    return {
+        "best (s)": times[0],
+        "median (s)": times[len(times) // 2],
+        "mean (s)": sum(times) / len(times),
+        "runs": len(times),
+    }
+
+
+def _processEvents():
+    QApplication.processEvents()
+
+
+def scenarioBuild(kind, n, m, repeat):
+    def run(state):
+        generateDiagram(kind, n, m)
+        _processEvents()
+    return timeRuns(run, repeat)
+
+
+def scenarioDrag(kind, n, m, repeat, steps=30, count=20):
+    # Moves a handful of objects along a path, one event loop tick per mouse move
+    def setup():
+        editor, C, objects, arrows = generateDiagram(kind, n, m)
+        _processEvents()
+        return objects[:count]
+
+    def run(objects):
+        delta = QPointF(3, 2)
+        for step in range(steps):
+            for x in objects:
+                x.setPos(x.pos() + delta)
+            _processEvents()
+    return timeRuns(run, repeat, setup)
+
+
+def scenarioToggleBezier(kind, n, m, repeat):
+    def setup():
+        editor, C, objects, arrows = generateDiagram(kind, n, m)
+        _processEvents()
+        return arrows
+
+    def run(arrows):
+        for f in arrows:
+            f.toggleBezier(True)
+        _processEvents()
+        for f in arrows:
+            f.toggleBezier(False)
+        _processEvents()
+    return timeRuns(run, repeat, setup)
+
+
+def scenarioFunctorImage(kind, n, m, repeat):
+    from category_diagram import CategoryDiagram
+    from functor import Functor
+
+    def setup():
+        editor, C, objects, arrows = generateDiagram(kind, n, m)
+        D = CategoryDiagram()
+        D.setEditor(editor)
+        editor.addNode(D)
+        D.setPos(C.boundingRect().width() + 200, 0)
+        F = Functor()
+        F.setEditor(editor)
+        editor.addArrow(F)
+        F.setDomain(C)
+        F.setCodomain(D)
+        _processEvents()
+        return F
+
+    def run(F):
+        F.takeImage()
+        _processEvents()
+        F.undoTakeImage()
+        _processEvents()
+    return timeRuns(run, repeat, setup)
+
+
+def scenarioRepaint(kind, n, m, repeat, frames=5):
+    from PyQt5.QtGui import QImage, QPainter
+    from PyQt5.QtCore import QRectF
+    editor, C, objects, arrows = generateDiagram(kind, n, m)
+    _processEvents()
+    scene = editor.scene()
+    image = QImage(1280, 800, QImage.Format_ARGB32_Premultiplied)
+
+    def run(state):
+        for k in range(frames):
+            painter = QPainter(image)
+            scene.render(painter, QRectF(image.rect()), scene.itemsBoundingRect())
+            painter.end()
+    return timeRuns(run, repeat)
+
+
+def scenarioDeleteUndo(kind, n, m, repeat):
+    def setup():
+        editor, C, objects, arrows = generateDiagram(kind, n, m)
+        _processEvents()
+        return editor, objects[:max(1, len(objects) // 4)]
+
+    def run(state):
+        editor, items = state
+        editor.deleteItems(list(items), undoable=True)
+        _processEvents()
+        editor.undo()
+        _processEvents()
+        editor.redo()
+        _processEvents()
+    return timeRuns(run, repeat, setup)
+
+
+def scenarioCommutativity(kind, n, m, repeat, labels="abcd"):
+    # A full check, then the incremental re-check after adding and removing one morphism
+    from category_arrow import CategoryArrow
+
+    def setup():
+        editor, C, objects, arrows = generateDiagram(kind, n, m)
+        rand = random.Random(0)
+        for f in arrows:
+            f.setLabelText(0, rand.choice(labels))
+        f = CategoryArrow()
+        f.setEditor(editor)
+        return C, f, objects[0], objects[-1]
+
+    def run(state):
+        C, f, X, Y = state
+        C.commutativity().check()
+        C.addMorphism(f)
+        f.setDomain(X)
+        f.setCodomain(Y)
+        C.commutativity().check()
+        C.removeMorphism(f)
+        C.commutativity().check()
+    return timeRuns(run, repeat, setup)
+
+
+def scenarioChase(kind, n, m, repeat, labels="abcd", max_length=4):
+    # Unproven parallel paths out of every object, on the process pool, until the last result is in
+    from PyQt5.QtCore import QEventLoop
+    from diagram_chaser import DiagramChaser
+
+    def setup():
+        editor, C, objects, arrows = generateDiagram(kind, n, m)
+        rand = random.Random(0)
+        for f in arrows:
+            f.setLabelText(0, rand.choice(labels))
+        chaser = DiagramChaser(C)
+        loop = QEventLoop()
+        chaser.finished.connect(lambda completed: loop.quit())
+        return chaser, loop
+
+    def run(state):
+        chaser, loop = state
+        if chaser.findUnproven(max_length=max_length):
+            loop.exec_()
+    return timeRuns(run, repeat, setup)
+
+
+Scenarios = {
+    "build": scenarioBuild,
+    "drag": scenarioDrag,
+    "bezier": scenarioToggleBezier,
+    "functor image": scenarioFunctorImage,
+    "repaint": scenarioRepaint,
+    "delete undo": scenarioDeleteUndo,
+    "commutativity": scenarioCommutativity,
+    "chase": scenarioChase,
+}
+
+
+def runBenchmarks(kinds=Kinds, sizes=((100, 200),), scenarios=None, repeat=3):
+    from PyQt5.QtCore import QT_VERSION_STR, PYQT_VERSION_STR
+    import platform
+    import time
+    if scenarios is None:
+        scenarios = list(Scenarios)
+    results = []
+    for kind in kinds:
+        for n, m in sizes:
+            for name in scenarios:
+                entry = {"kind": kind, "objects": n, "morphisms": m, "scenario": name}
+                try:
+                    entry.update(Scenarios[name](kind, n, m, repeat))
+                except RecursionError as e:
+                    entry["error"] = type(e).__name__ + ": " + str(e)
+                results.append(entry)
+    return {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "qt": QT_VERSION_STR,
+            "pyqt": PYQT_VERSION_STR,
+            "platform": platform.platform(),
+            "qpa": QApplication.platformName(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def _parseSizes(text):
+    sizes = []
+    for part in text.split(","):
+        n, sep, m = part.partition("x")
+        sizes.append((int(n), int(m) if m else None))
+    return sizes
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+    parser = argparse.ArgumentParser(description="Headless performance benchmarks.")
+    parser.add_argument("--kinds", default=",".join(Kinds), help="Diagram shapes: " + ", ".join(Kinds))
+    parser.add_argument("--sizes", default="100x200", help="Comma separated OBJECTSxMORPHISMS; leave out xMORPHISMS for the full shape (random: " + str(RandomMorphismsPerObject) + " per object)")
+    parser.add_argument("--scenarios", default=",".join(Scenarios), help="Scenarios: " + ", ".join(Scenarios))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="Write results to this file instead of stdout")
+    parser.add_argument("--arrow-layout", action="store_true", help="Compare per-arrow and batched arrow layout instead")
+    args = parser.parse_args()
+    app = QApplication(sys.argv[:1])
+    if args.arrow_layout:
+        n, m = _parseSizes(args.sizes)[0]
+        report = benchArrowLayout(n, m or 500, args.repeat)
+    else:
+        report = runBenchmarks(args.kinds.split(","), _parseSizes(args.sizes), args.scenarios.split(","), args.repeat)
+    text = json.dumps(report, indent=2)
+    if args.json:
+        with open(args.json, "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
@@ -9,7 +9,8 @@ from math import pi
 from category_diagram import CategoryDiagram
 from copy import deepcopy
 import re
-from commands import MethodCallCommand
+from functools import lru_cache
+from commands import MethodCallCommand, SetEndpointCommand
 import category_object
 
 class CategoryArrow(GraphArrow):
@@ -26,7 +27,10 @@ class CategoryArrow(GraphArrow):
             self._isom = False
             self._editor = None
             self._reversed = False
-        self._graphAlgoVisited = False
+        # Painter paths are rebuilt only after the control points, head, reversal or mono / epi flags change
+        self._tailPath = None
+        self._epiHead = None
+        self._shape = None
         
     def __deepcopy__(self, memo):
         copy = deepcopy(super(), memo)
@@ -102,6 +106,7 @@ class CategoryArrow(GraphArrow):
     def setEpimorphism(self, epi):
         if self._epi != epi:
             self._epi = epi
+            self._epiHead = None
             if self.scene():
                 self.scene().update()
             else:
@@ -113,6 +118,7 @@ class CategoryArrow(GraphArrow):
     def setMonomorphism(self, mono):
         if self._mono != mono:
             self._mono = mono
+            self.invalidatePaths()
             if self.scene():
                 self.scene().update()
             else:
@@ -135,9 +141,46 @@ class CategoryArrow(GraphArrow):
                 self._paintEpiHead(painter)
             else:
                 painter.drawPath(self._arrowHead) 
-            painter.drawPath(self.tailPath())
+            painter.drawPath(self._cachedTailPath())
+            
+    def invalidatePaths(self):
+        self._tailPath = None
+        self._epiHead = None
+        self._shape = None
+        
+    def controlPointPosHasChanged(self, ctrl_pt, new_pos):
+        self.invalidatePaths()
+        super().controlPointPosHasChanged(ctrl_pt, new_pos)
+        
+    def updateArrowHead(self):
+        super().updateArrowHead()
+        self._epiHead = None
+        
+    def setArrowHeadPoints(self, points):
+        super().setArrowHeadPoints(points)
+        self._epiHead = None
+        
+    def setReversed(self, rev=True):
+        if rev != self.reversed():
+            self.invalidatePaths()
+            super().setReversed(rev)
+            parent = self.parentItem()
+            if isinstance(parent, CategoryDiagram):
+                parent.morphismEndsChanged(self)
+        
+    def toggleBezier(self, toggled):
+        self.invalidatePaths()
+        super().toggleBezier(toggled)
+        
+    def _cachedTailPath(self):
+        if self._tailPath is None:
+            self._tailPath = self._buildTailPath()
+        return self._tailPath
             
     def tailPath(self):
+        return QPainterPath(self._cachedTailPath())
+        
+    def _buildTailPath(self):
         path = QPainterPath()
         path.moveTo(self._points[-1].pos())
         line = self.tailLine()
@@ -167,16 +210,18 @@ class CategoryArrow(GraphArrow):
         return path        
     
     def _paintEpiHead(self, painter):
-        path = QPainterPath()
-        path.moveTo(QPointF(0,0))
-        path.addPath(self._arrowHead)
-        line = self.headLine()
-        u = line.p1() - line.p2()
-        mag_u = mag2D(u)
-        if mag_u != 0:
-            u /= mag_u
-        path.addPath(self._arrowHead.translated(u * self.arrowHeadSize()))
-        painter.drawPath(path)
+        if self._epiHead is None:
+            path = QPainterPath()
+            path.moveTo(QPointF(0,0))
+            path.addPath(self._arrowHead)
+            line = self.headLine()
+            u = line.p1() - line.p2()
+            mag_u = mag2D(u)
+            if mag_u != 0:
+                u /= mag_u
+            path.addPath(self._arrowHead.translated(u * self.arrowHeadSize()))
+            self._epiHead = path
+        painter.drawPath(self._epiHead)
         
     def headLine(self):
         if self.isBezier():
@@ -187,8 +232,10 @@ class CategoryArrow(GraphArrow):
         return QLineF(self._points[0].pos(), self._points[1].pos())
     
     def shape(self):
-        stroker = QPainterPathStroker(Pen(Qt.black, self.arrowHeadSize() * 2))
-        return stroker.createStroke(self.tailPath())
+        if self._shape is None:
+            stroker = QPainterPathStroker(Pen(Qt.black, self.arrowHeadSize() * 2))
+            self._shape = stroker.createStroke(self._cachedTailPath())
+        return self._shape
     
     def addLabel(self, label):
         self._firstTimeNonzero = True
@@ -200,28 +247,16 @@ class CategoryArrow(GraphArrow):
     def arrowHeadSize(self):
         return 7
             
-    def graphAlgoVisited(self):
-        return self._graphAlgoVisited
-    
-    def clearGraphAlgoVisitedFlag(self):
-        self._graphAlgoVisited = False
-        
-    def setGraphAlgoVisitedFlag(self):
-        self._graphAlgoVisited = True
-        
     def functorCompositionRegex(self):
-        fun = self.labelText(0)
-        return re.compile(fun + r'\((?P<arg>.+)\)')
+        return _functorCompositionRegex(self.labelText(0))
     
     def _setCodomain(self, cod, undoable=False):
         if cod is not self.codomain():
             if undoable:
-                getText = lambda: "Set codomain of " + str(self) + " to " + str(cod)
-                command = MethodCallCommand(getText(), self.setCodomain, [cod], self.setCodomain, [self.codomain()], self.editor())
-                slot = lambda symbol: command.setText(getText())
-                self.symbolChanged.connect(slot)
-                if cod is not None:
-                    cod.symbolChanged.connect(slot)
+                command = SetEndpointCommand("", self._setCodomain, cod, self.toNode(), self.editor())
+                command.setTextSource(lambda: "Set codomain of " + str(self) + " to " + str(cod),
+                                      [self.symbolChanged] + ([cod.symbolChanged] if cod is not None else []))
+                command.updateText()
                 self.editor().pushCommand(command)
             else:
                 super().setTo(cod)
@@ -230,12 +265,10 @@ class CategoryArrow(GraphArrow):
     def _setDomain(self, dom, undoable=False):
         if dom is not self.domain():
             if undoable:
-                getText = lambda: "Set domain of " + str(self) + " to " + str(dom)
-                command = MethodCallCommand(getText(), self.setDomain, [dom], self.setDomain, [self.domain()], self.editor())
-                slot = lambda symbol: command.setText(getText())
-                self.symbolChanged.connect(slot)
-                if dom is not None:
-                    dom.symbolChanged.connect(slot)
+                command = SetEndpointCommand("", self._setDomain, dom, self.fromNode(), self.editor())
+                command.setTextSource(lambda: "Set domain of " + str(self) + " to " + str(dom),
+                                      [self.symbolChanged] + ([dom.symbolChanged] if dom is not None else []))
+                command.updateText()
                 self.editor().pushCommand(command)
             else:
                 super().setFrom(dom)
@@ -276,4 +309,9 @@ class CategoryArrow(GraphArrow):
         else:
             self._setCodomain(cod, undoable)
     
-            
\ No newline at end of file
+
+
+@lru_cache(maxsize=256)
+def _functorCompositionRegex(fun):
+    # Compiled once per label text rather than on every call
+    return re.compile(fun + r'\((?P<arg>.+)\)')
@@ -1,18 +1,55 @@
 from category_object import CategoryObject
 from geom_tools import minBoundingRect, paintSelectionShape
-from PyQt5.QtCore import QEvent, pyqtSignal, Qt
+from PyQt5.QtCore import QEvent, pyqtSignal, Qt, QPointF
+from PyQt5.QtWidgets import QGraphicsObject
 from PyQt5.QtGui import QColor
+from math import inf
 from gfx_object import GfxObject
 from copy import deepcopy
+from contextlib import contextmanager
 from qt_tools import SimpleBrush, Pen
-from commands import MethodCallCommand
+from commands import MethodCallCommand, BatchEditCommand
+from spatial_index import SpatialIndex
+from graph_index import GraphIndex
+from commutativity import CommutativityChecker
+from composition_closure import CompositionClosure
 
 class CategoryDiagram(CategoryObject):
+    HullTolerance = 1e-6
+    # Member changes relayed at the category level, so observers (functors) connect once per diagram
+    objectSymbolChanged = pyqtSignal(QGraphicsObject)
+    objectMovedDelta = pyqtSignal(QGraphicsObject, QPointF)
+    objectDeleted = pyqtSignal(QGraphicsObject)
+    objectAdded = pyqtSignal(QGraphicsObject)
+    objectRemoved = pyqtSignal(QGraphicsObject)
+    morphismAdded = pyqtSignal(QGraphicsObject)
+    morphismRemoved = pyqtSignal(QGraphicsObject)
+    morphismSymbolChanged = pyqtSignal(QGraphicsObject)
+    morphismDeleted = pyqtSignal(QGraphicsObject)
+    morphismDomainSet = pyqtSignal(QGraphicsObject, object)
+    morphismCodomainSet = pyqtSignal(QGraphicsObject, object)
+    morphismBezierToggled = pyqtSignal(QGraphicsObject, bool)
+    morphismControlPointsMoved = pyqtSignal(QGraphicsObject, list)
+    
     def __init__(self, new=True):
         self._objects = {}
         self._morphisms = {}
+        self._memberSlots = {}      # uid -> [(signal, slot)], disconnected when the member leaves
+        self._bulkEditDepth = 0
+        self._arrowsDirty = False
+        self._hullDirty = False
+        self._movedMorphisms = {}
+        self._pendingImageUpdates = {}      # uid -> member, reflected into functor images when the bulk edit closes
+        self._objectRects = {}      # Keyed by uid, in diagram coordinates
+        self._objectsRect = None    # Union of _objectRects
+        self._objectIndex = SpatialIndex()
+        self._morphismIndex = SpatialIndex()
+        self._graph = GraphIndex()
+        self._pendingContents = None    # Loads members on demand; see project_file.SnapshotLoader
+        self._commutativity = None
         super().__init__(new)
         self._editing = False
+        self.zoomedIn.connect(self.loadContents)
         if new:
             self.setBrush(SimpleBrush(QColor(10,255,12,70)))   # Semi-transparent
             self.setPen(Pen(Qt.NoPen))
@@ -31,12 +68,95 @@ class CategoryDiagram(CategoryObject):
         painter.drawRoundedRect(self.boundingRect(), r, r)
         
     def boundingRect(self):
-        rect_list = [child.boundingRect().translated(child.pos()) for child in self.objects().values()]
-        if rect_list:
+        if self._objectsRect is not None:
             w = self._insetPadding
-            return minBoundingRect(rect_list).adjusted(-w, -w, w, w)
+            return self._objectsRect.adjusted(-w, -w, w, w)
         return self._defaultRect
     
+    def invalidateBoundingRect(self):
+        self._objectRects = {uid : obj.boundingRect().translated(obj.pos()) for uid, obj in self._objects.items()}
+        for uid, rect in self._objectRects.items():
+            self._objectIndex.update(uid, self._objects[uid], rect)
+        self._recomputeObjectsRect()
+        
+    def _recomputeObjectsRect(self):
+        if self._bulkEditDepth:
+            self._hullDirty = True
+        else:
+            self._setObjectsRect(minBoundingRect(list(self._objectRects.values())))
+        
+    def _setObjectsRect(self, rect):
+        if rect != self._objectsRect:
+            self.prepareGeometryChange()
+            self._objectsRect = rect
+            parent = self.parentItem()
+            if isinstance(parent, CategoryDiagram):
+                parent.objectGeometryChanged(self)      # A nested diagram's rect is part of its parent's hull
+            
+    def _isOnHull(self, rect):
+        hull = self._objectsRect
+        if hull is None:
+            return True
+        e = self.HullTolerance      # QRectF stores width / height, so right() and bottom() pick up rounding
+        return rect.left() <= hull.left() + e or rect.top() <= hull.top() + e or \
+               rect.right() >= hull.right() - e or rect.bottom() >= hull.bottom() - e
+    
+    def _updateObjectRect(self, obj):
+        rect = obj.boundingRect().translated(obj.pos())
+        prev = self._objectRects.get(obj.uid())
+        self._objectRects[obj.uid()] = rect
+        self._objectIndex.update(obj.uid(), obj, rect)
+        if prev is not None and self._isOnHull(prev):
+            if not rect.contains(prev):
+                self._recomputeObjectsRect()
+                return
+        if self._objectsRect is None:
+            self._setObjectsRect(rect)
+        else:
+            self._setObjectsRect(self._objectsRect.united(rect))
+        
+    def _removeObjectRect(self, obj):
+        prev = self._objectRects.pop(obj.uid(), None)
+        self._objectIndex.remove(obj.uid())
+        if prev is not None and self._isOnHull(prev):
+            self._recomputeObjectsRect()
+            
+    def objectGeometryChanged(self, obj):
+        if obj.uid() in self._objects:
+            self._updateObjectRect(obj)
+            self.updateArrowsAndClearResidual()
+            
+    def morphismGeometryChanged(self, arr):
+        if self._bulkEditDepth:
+            self._movedMorphisms[arr.uid()] = arr
+        elif arr.uid() in self._morphisms:
+            self._morphismIndex.update(arr.uid(), arr, arr.mapRectToParent(arr.controlPointsRect()))
+            
+    def objectsInRect(self, rect):
+        return self._objectIndex.itemsInRect(rect)
+    
+    def objectsAt(self, pos):
+        return self._objectIndex.itemsAt(pos)
+    
+    def objectAt(self, pos):
+        objects = self.objectsAt(pos)
+        if objects:
+            return max(objects, key=lambda obj: obj.zValue())
+        return None
+    
+    def nearestObject(self, pos, max_distance=inf):
+        return self._objectIndex.nearest(pos, max_distance)
+    
+    def morphismsAt(self, pos):
+        # The index narrows the search to arrows whose control point rect holds pos; their stroked shape decides
+        return [arr for arr in self._morphismIndex.itemsAt(pos) if arr.shape().contains(arr.mapFromParent(pos))]
+    
+    def morphismAt(self, pos):
+        morphisms = self.morphismsAt(pos)
+        if morphisms:
+            return max(morphisms, key=lambda arr: arr.zValue())
+        return None
+    
     def objects(self):
         return self._objects
     
@@ -53,29 +173,71 @@ class CategoryDiagram(CategoryObject):
         return self._editing
     
     def setEditing(self, edit):
+        if edit:
+            self.loadContents()
         self._editing = edit
         
+    def pendingContents(self):
+        return self._pendingContents
+    
+    def setPendingContents(self, contents, rect=None):
+        # Members stay unbuilt until the diagram is edited, zoomed into or otherwise needs them;
+        # until then rect stands in for their hull
+        self._pendingContents = contents
+        if rect is not None:
+            self._setObjectsRect(rect)
+            
+    def isLoaded(self):
+        return self._pendingContents is None
+    
+    def loadContents(self):
+        contents = self._pendingContents
+        if contents is not None:
+            self._pendingContents = None
+            self._setObjectsRect(None)
+            contents.load()
+        
     def updateArrows(self):
+        if self._bulkEditDepth:
+            self._arrowsDirty = True
+            return
         super().updateArrows()
         for child in self._objects.values():
             child.updateGraph() 
             
-    def clearGraphAlgoVisitedFlags(self):
-        for obj in self._objects.values():
-            obj.clearGraphAlgoVisited()
+    def _graphIndex(self):
+        # Functors between diagrams aren't morphisms of an enclosing diagram; their own arrows list finds them
+        return None
+    
+    def graphIndex(self):
+        return self._graph
+    
+    def morphismEndsChanged(self, arr):
+        if arr.uid() in self._morphisms:
+            self._graph.updateMorphism(arr)
+            
+    def commutativity(self):
+        if self._commutativity is None:
+            self._commutativity = CommutativityChecker(self)
+        return self._commutativity
             
-    def composeArrows(self):
-        for obj in self._objects:
-            X = obj
-            for f in obj.outgoingArrows():
-                Y = f.toNode()
-                if Y:
-                    for g in Y.outgoingArrows():
-                        gf = self.editor().ArrowType()
-                        gf.setLabelText(0, g.labelText(0) + f.labelText(0))
-                        gf.setFrom(X)
-                        gf.setTo(g.codomain())
-                        self.editor().attachArrow(gf)
+    def compositionClosure(self, max_length=CompositionClosure.MaxLength, morphisms=None):
+        closure = CompositionClosure(self, max_length, morphisms)
+        closure.compute()
+        return closure
+            
+    def addComposites(self, composites, undoable=False):
+        # One new morphism per composite, all added in one batch
+        arrows = []
+        for c in composites:
+            gf = self.editor().ArrowType()
+            gf.setEditor(self.editor())
+            gf.setLabelText(0, c.label())
+            gf.setDomain(c.source())
+            gf.setCodomain(c.target())
+            arrows.append(gf)
+        self.addItems(morphisms=arrows, undoable=undoable)
+        return arrows
                         
     def addMorphism(self, arr, undoable=False, loops=None):
         if arr.uid() not in self._morphisms:
@@ -86,14 +248,19 @@ class CategoryDiagram(CategoryObject):
                     self.editor().pushCommand(MethodCallCommand("Adding morphism " + str(arr) + " to category " + str(self),
                                                          self.addMorphism, [arr], self.removeMorphism, [arr], self.editor()))
                 else:
-                    arr.deleted.connect(lambda a: self.removeMorphism(arr))
+                    self.loadContents()
                     self.editor().setupArrowConnections(arr)
                     arr.setEditor(self.editor())
-                    self.scene().addItem(arr)
+                    if arr.scene() is not self.scene():
+                        self.scene().addItem(arr)
                     arr.setParentItem(self)
                     self._morphisms[arr.uid()] = arr
+                    self._graph.addMorphism(arr)
+                    self.morphismGeometryChanged(arr)
+                    self._connectMorphism(arr)
                     self.updateArrows()
-                    self.updateFunctorImages()
+                    self.updateFunctorImages(arr)
+                    self.morphismAdded.emit(arr)
         
     def removeMorphism(self, arr, undoable=False, loops=None):
         if arr.uid() in self._morphisms:
@@ -109,8 +276,12 @@ class CategoryDiagram(CategoryObject):
                     arr.setEditor(None)
                     arr.setParentItem(None)
                     del self._morphisms[arr.uid()]
+                    self._morphismIndex.remove(arr.uid())
+                    self._graph.removeMorphism(arr)
+                    self._disconnectMember(arr.uid())
                     self.updateArrowsAndClearResidual()
-                    self.updateFunctorImages()
+                    self.updateFunctorImages(arr)
+                    self.morphismRemoved.emit(arr)
                 
     def addObject(self, obj, undoable=False):
         if obj.uid() not in self._objects:
@@ -123,13 +294,64 @@ class CategoryDiagram(CategoryObject):
                     obj.symbolChanged.connect(slot)
                     self.editor().pushCommand(command)
                 else:
-                    obj.deleted.connect(lambda o: self.removeObject(obj))
+                    self.loadContents()
                     obj.setParentItem(self)
                     self._objects[obj.uid()] = obj
+                    self._graph.addObject(obj)
                     obj.installSceneEventFilter(self)
+                    self._updateObjectRect(obj)
                     self.updateArrows()
-                    obj.positionChanged.connect(lambda pos: self.updateArrowsAndClearResidual())
-                    self.updateFunctorImages()
+                    self._connectObject(obj)
+                    self.updateFunctorImages(obj)
+                    self.objectAdded.emit(obj)
+                                        
+    def addItems(self, objects=(), morphisms=(), undoable=False):
+        objects = [obj for obj in objects if obj.uid() not in self._objects]
+        morphisms = [arr for arr in morphisms if arr.uid() not in self._morphisms]
+        if objects or morphisms:
+            if undoable:
+                getText = lambda: "Adding " + self._countText(objects, morphisms) + " to category " + str(self)
+                command = BatchEditCommand(getText(), self, self.editor())
+                for obj in objects:
+                    command.addSubcommand(MethodCallCommand("", self.addObject, [obj], self.removeObject, [obj], self.editor()))
+                for arr in morphisms:
+                    command.addSubcommand(MethodCallCommand("", self.addMorphism, [arr], self.removeMorphism, [arr], self.editor()))
+                self.symbolChanged.connect(lambda symbol: command.setText(getText()))
+                self.editor().pushCommand(command)
+            else:
+                with self.bulkEdit():
+                    for obj in objects:
+                        self.addObject(obj)
+                    for arr in morphisms:
+                        self.addMorphism(arr)
+                        
+    def removeItems(self, objects=(), morphisms=(), undoable=False):
+        objects = [obj for obj in objects if obj.uid() in self._objects]
+        morphisms = [arr for arr in morphisms if arr.uid() in self._morphisms]
+        if objects or morphisms:
+            if undoable:
+                getText = lambda: "Removing " + self._countText(objects, morphisms) + " from category " + str(self)
+                command = BatchEditCommand(getText(), self, self.editor())
+                for arr in morphisms:
+                    command.addSubcommand(MethodCallCommand("", self.removeMorphism, [arr], self.addMorphism, [arr], self.editor()))
+                for obj in objects:
+                    command.addSubcommand(MethodCallCommand("", self.removeObject, [obj], self.addObject, [obj], self.editor()))
+                self.symbolChanged.connect(lambda symbol: command.setText(getText()))
+                self.editor().pushCommand(command)
+            else:
+                with self.bulkEdit():
+                    for arr in morphisms:
+                        self.removeMorphism(arr)
+                    for obj in objects:
+                        self.removeObject(obj)
+                        
+    def _countText(self, objects, morphisms):
+        parts = []
+        if objects:
+            parts.append(str(len(objects)) + (" object" if len(objects) == 1 else " objects"))
+        if morphisms:
+            parts.append(str(len(morphisms)) + (" morphism" if len(morphisms) == 1 else " morphisms"))
+        return " and ".join(parts)
                                         
     def removeObject(self, obj, undoable=False, loops=None):
         if obj.uid() in self._objects:
@@ -146,9 +368,61 @@ class CategoryDiagram(CategoryObject):
                         self.scene().removeItem(obj)
                     if obj.uid() in self._objects:
                         del self._objects[obj.uid()]
+                    self._removeObjectRect(obj)
+                    self._graph.removeObject(obj)
+                    self._disconnectMember(obj.uid())
                     obj.removeSceneEventFilter(self)
                     self.updateArrowsAndClearResidual()
-                    self.updateFunctorImages()
+                    self.updateFunctorImages(obj)
+                    self.objectRemoved.emit(obj)
+        
+    def _connectMember(self, uid, signal, slot):
+        self._memberSlots.setdefault(uid, []).append((signal, slot))
+        signal.connect(slot)
+        
+    def _disconnectMember(self, uid):
+        for signal, slot in self._memberSlots.pop(uid, []):
+            signal.disconnect(slot)
+            
+    def _connectObject(self, obj):
+        uid = obj.uid()
+        self._connectMember(uid, obj.deleted, lambda o: self._objectDeleted(obj))
+        self._connectMember(uid, obj.positionChanged, lambda pos: self.objectGeometryChanged(obj))
+        self._connectMember(uid, obj.positionChangedDelta, lambda delta: self.objectMovedDelta.emit(obj, delta))
+        self._connectMember(uid, obj.symbolChanged, lambda sym: self._objectSymbolChanged(obj))
+        
+    def _connectMorphism(self, arr):
+        uid = arr.uid()
+        self._connectMember(uid, arr.deleted, lambda a: self._morphismDeleted(arr))
+        self._connectMember(uid, arr.symbolChanged, lambda sym: self.morphismSymbolChanged.emit(arr))
+        self._connectMember(uid, arr.domainSet, lambda dom: self._morphismDomainSet(arr, dom))
+        self._connectMember(uid, arr.codomainSet, lambda cod: self._morphismCodomainSet(arr, cod))
+        self._connectMember(uid, arr.bezierToggled, lambda b: self.morphismBezierToggled.emit(arr, b))
+        self._connectMember(uid, arr.controlPointsPosChanged, lambda pos_list: self._morphismControlPointsMoved(arr, pos_list))
+        
+    def _objectDeleted(self, obj):
+        self.objectDeleted.emit(obj)
+        self.removeObject(obj)
+        
+    def _objectSymbolChanged(self, obj):
+        self.objectGeometryChanged(obj)
+        self.objectSymbolChanged.emit(obj)
+        
+    def _morphismDeleted(self, arr):
+        self.morphismDeleted.emit(arr)
+        self.removeMorphism(arr)
+        
+    def _morphismDomainSet(self, arr, dom):
+        self.morphismEndsChanged(arr)
+        self.morphismDomainSet.emit(arr, dom)
+        
+    def _morphismCodomainSet(self, arr, cod):
+        self.morphismEndsChanged(arr)
+        self.morphismCodomainSet.emit(arr, cod)
+        
+    def _morphismControlPointsMoved(self, arr, pos_list):
+        self.morphismGeometryChanged(arr)
+        self.morphismControlPointsMoved.emit(arr, pos_list)
         
     def attachArrow(self, fun):
         super().attachArrow(fun)
@@ -163,9 +437,58 @@ class CategoryDiagram(CategoryObject):
             return True
         return False    
     
-    def updateFunctorImages(self):
-        for F in self.outgoingArrows():
-            F.updateImage()
+    def updateFunctorImages(self, item=None):
+        # Functors receive only the member that was added or removed
+        if item is None:
+            for F in self.outgoingArrows():
+                F.updateImage()
+        elif self._bulkEditDepth:
+            self._pendingImageUpdates[item.uid()] = item
+        else:
+            self._reflectMember(item)
+            
+    def _reflectMember(self, item):
+        if item.uid() in self._objects or item.uid() in self._morphisms:
+            for F in self.outgoingArrows():
+                F.addToImage(item)
+        else:
+            for F in self.outgoingArrows():
+                F.removeFromImage(item)
+                
+    @contextmanager
+    def bulkEdit(self):
+        # Arrow layout and functor images are brought up to date once, when the outermost bulk edit closes
+        self._bulkEditDepth += 1
+        try:
+            yield self
+        finally:
+            self._bulkEditDepth -= 1
+            if self._bulkEditDepth == 0:
+                if self._hullDirty:
+                    self._hullDirty = False
+                    self._recomputeObjectsRect()
+                moved = self._movedMorphisms
+                self._movedMorphisms = {}
+                for arr in moved.values():
+                    self.morphismGeometryChanged(arr)
+                self.flushFunctorImages()
+                if self._arrowsDirty:
+                    self._arrowsDirty = False
+                    self.updateArrowsAndClearResidual()
+                    if self.scene():
+                        self.scene().flushArrowLayout()
+                
+    def isBulkEditing(self):
+        return self._bulkEditDepth > 0
+                
+    def flushFunctorImages(self):
+        pending = self._pendingImageUpdates
+        self._pendingImageUpdates = {}
+        # Objects first, so morphism images find their end points in the functor's copy memo
+        items = [item for item in pending.values() if isinstance(item, CategoryObject)]
+        items += [item for item in pending.values() if not isinstance(item, CategoryObject)]
+        for item in items:
+            self._reflectMember(item)
             
     def getMorphism(self, uid):
         return self._morphisms.get(uid, None)
@@ -174,6 +497,8 @@ class CategoryDiagram(CategoryObject):
         return self._objects.get(uid, None)
     
     def nonempty(self):
+        if self._pendingContents is not None:
+            return True
         res = False
         if self._morphisms:
             res = True
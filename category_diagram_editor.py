@@ -3,7 +3,7 @@ from category_object import CategoryObject
 from category_arrow import CategoryArrow
 from qt_tools import simpleMaxContrastingColor, Pen, firstParentGfxItemOfType
 from PyQt5.QtGui import QTransform
-from PyQt5.QtWidgets import QMenu
+from PyQt5.QtWidgets import QMenu, QMessageBox
 import re
 from PyQt5.QtCore import Qt
 from graph_arrow import ControlPoint
@@ -11,6 +11,8 @@ from category_diagram import CategoryDiagram
 from functor import Functor
 from commands import MethodCallCommand, DeleteItemsCommand
 from op_functor import OpFunctor
+from gfx_object import GfxObject
+from diagram_chaser import DiagramChaser
 
 class CategoryDiagramEditor(GraphEditor):
     def __init__(self, window, new=True):
@@ -20,6 +22,7 @@ class CategoryDiagramEditor(GraphEditor):
         if new:
             pass
         self._focusedNode = None
+        self._chaser = None
         
     def setScene(self, scene):
         super().setScene(scene)
@@ -27,10 +30,24 @@ class CategoryDiagramEditor(GraphEditor):
         scene.setGridEnabled(True)
         self.setupDefaultUserExperience()
         
+    def categoryItemAt(self, pos):
+        item = self.scene().itemAt(pos, QTransform())
+        if item is not None and not isinstance(item, GfxObject):
+            item = firstParentGfxItemOfType(item, GfxObject)      # Labels stand in for what they label
+        if isinstance(item, CategoryDiagram):
+            local = item.mapFromScene(pos)
+            obj = item.objectAt(local)
+            if obj:
+                return obj
+            arr = item.morphismAt(local)
+            if arr:
+                return arr
+        return item
+        
     def placeArrow(self, arr=None, item=None, pos=None):
         if pos is None:
             pos = self.scene().menuEventScenePos()
-        item = self.scene().itemAt(pos, QTransform())
+        item = self.categoryItemAt(pos)
         if item:
             if isinstance(item, CategoryDiagram):
                 C = item
@@ -65,7 +82,7 @@ class CategoryDiagramEditor(GraphEditor):
         return item
         
     def placeItem(self, pos):
-        item = self.scene().itemAt(pos, QTransform())
+        item = self.categoryItemAt(pos)
         if item:
             if isinstance(item, CategoryDiagram) and item.editing():
                 node = self.NodeType()
@@ -142,7 +159,17 @@ class CategoryDiagramEditor(GraphEditor):
         menu.addSeparator()
         menu = self.buildNodeContextMenu(cat, menu)
         menu.addSeparator()
-        menu.addAction("Compose Arrows").triggered.connect(lambda b: cat.composeArrows())
+        compose = menu.addMenu("Compose Arrows")
+        for length in range(2, 5):
+            compose.addAction("Up to length " + str(length)).triggered.connect(
+                lambda b, length=length: self.composeArrows(cat, length))
+        compose.addAction("To a fixed point").triggered.connect(lambda b: self.composeArrows(cat, None))
+        menu.addAction("Check Commutativity").triggered.connect(lambda b: self.checkCommutativity(cat))
+        chase = menu.addMenu("Chase Diagram")
+        chase.addAction("Find Unproven Paths").triggered.connect(lambda b: self.findUnproven(cat))
+        chase.addAction("Find Paths Between Selected Objects").triggered.connect(lambda b: self.findPaths(cat))
+        chase.addAction("Find Lifts Between Selected Morphisms").triggered.connect(lambda b: self.findLifts(cat))
+        chase.addAction("Cancel").triggered.connect(lambda b: self.cancelChase())
         menu.addSeparator()
         action = menu.addAction("Edit Diagram")
         action.setCheckable(True)
@@ -150,6 +177,93 @@ class CategoryDiagramEditor(GraphEditor):
         action.toggled.connect(lambda b: cat.setEditing(b))
         return menu
     
+    def composeArrows(self, cat, max_length):
+        # Composites of the selected morphisms of cat, or of all of them if none are, added after a preview
+        selected = [arr for arr in cat.morphisms().values() if arr.isSelected()]
+        closure = cat.compositionClosure(max_length, selected or None)
+        composites = closure.composites()
+        if not composites:
+            if self.window():
+                self.window().statusBar().showMessage("No new composites in " + str(cat) + ".")
+            return []
+        if self.window():
+            counts = closure.counts()
+            text = str(len(composites)) + " new composites: " + \
+                   ", ".join(str(counts[n]) + " of length " + str(n) for n in sorted(counts)) + "."
+            if closure.isTruncated():
+                text += "\nStopped at the limit of " + str(closure.MaxComposites) + "."
+            answer = QMessageBox.question(self.window(), "Compose Arrows", text + "\nAdd them to " + str(cat) + "?")
+            if answer != QMessageBox.Yes:
+                return []
+        return cat.addComposites(composites, undoable=True)
+    
+    def checkCommutativity(self, cat):
+        # Selects the morphisms on paths not shown equal to a parallel one
+        results = cat.commutativity().check()
+        unproven = [result for result in results if not result.commutes()]
+        self.scene().clearSelection()
+        for result in unproven:
+            for path in result.paths():
+                for uid in path:
+                    cat.getMorphism(uid).setSelected(True)
+        if self.window():
+            self.window().statusBar().showMessage(str(len(results) - len(unproven)) + " of " + str(len(results)) +
+                                                  " sets of parallel paths in " + str(cat) + " commute.")
+        return unproven
+    
+    def chaser(self, cat):
+        # One chase runs at a time; its results select the morphisms they mention as they arrive
+        if self._chaser is not None and self._chaser.diagram() is not cat:
+            self.cancelChase()
+            self._chaser = None
+        if self._chaser is None:
+            self._chaser = DiagramChaser(cat)
+            self._chaser.resultReady.connect(lambda query, result: self._chaseResult(cat, query, result))
+            self._chaser.progress.connect(lambda done, total: self._chaseProgress(cat, done, total))
+            self._chaser.finished.connect(lambda completed: self._chaseFinished(cat, completed))
+        return self._chaser
+    
+    def cancelChase(self):
+        if self._chaser is not None:
+            self._chaser.cancel()
+    
+    def findUnproven(self, cat):
+        chaser = self.chaser(cat)
+        self.scene().clearSelection()
+        return chaser.findUnproven()
+    
+    def findPaths(self, cat):
+        objects = [obj for obj in cat.objects().values() if obj.isSelected()]
+        chaser = self.chaser(cat)
+        self.scene().clearSelection()
+        return chaser.findPaths([(X, Y) for X in objects for Y in objects if X is not Y])
+        
+    def findLifts(self, cat):
+        morphisms = [arr for arr in cat.morphisms().values() if arr.isSelected()]
+        chaser = self.chaser(cat)
+        self.scene().clearSelection()
+        return chaser.findLifts([(f, g) for f in morphisms for g in morphisms
+                                 if f is not g and f.codomain() is g.codomain()])
+    
+    def _chaseResult(self, cat, query, result):
+        if query[0] == "unproven":
+            paths = [path for target, classes in result for paths in classes for path in paths]
+        else:
+            paths = result
+        for path in paths:
+            for uid in path:
+                arr = cat.getMorphism(uid)
+                if arr is not None:
+                    arr.setSelected(True)
+                    
+    def _chaseProgress(self, cat, done, total):
+        if self.window():
+            self.window().statusBar().showMessage("Chasing " + str(cat) + ": " + str(done) + " of " + str(total) + " queries done.")
+            
+    def _chaseFinished(self, cat, completed):
+        if self.window():
+            self.window().statusBar().showMessage("Chase of " + str(cat) + (" finished." if completed else " cancelled."))
+    
     def arrowExtremityAboutToChange(self, arr, pos, is_start=False):
         if is_start:
             if arr.domain():
@@ -161,16 +275,21 @@ class CategoryDiagramEditor(GraphEditor):
             arr.setCodomain(None, undoable=True)    
     
     def arrowExtremityHasChanged(self, arr, pos, is_start=False):
-        items = self.scene().items(pos)
-        filtered = []
-        for item in items:
-            if item is arr.parentItem():
-                continue
-            if item is arr:
-                continue
-            if isinstance(item, ControlPoint):
-                continue
-            filtered.append(item)
+        diagram = arr.parentItem()
+        if isinstance(diagram, CategoryDiagram):
+            # Morphisms only connect to objects of their own category
+            filtered = diagram.objectsAt(diagram.mapFromScene(pos))
+            filtered.sort(key=lambda obj: obj.zValue(), reverse=True)
+        else:
+            filtered = []
+            for item in self.scene().items(pos):
+                if item is diagram:
+                    continue
+                if item is arr:
+                    continue
+                if isinstance(item, ControlPoint):
+                    continue
+                filtered.append(item)
         if filtered:
             for item in filtered:
                 item = firstParentGfxItemOfType(item, self.NodeType)
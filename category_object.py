@@ -18,7 +18,6 @@ class CategoryObject(GraphNode):
             self.setBrush(SimpleBrush(QColor(255,255,255,0)))   # Transparent
             self.setPen(Pen(QColor(255, 50, 0, 200), 0.88))
             self._insetPadding = self.DefaultInsetPadding / 3
-        self._graphAlgoVisited = False
         self._editor = None
     
     def setEditor(self, editor):
@@ -27,17 +26,6 @@ class CategoryObject(GraphNode):
     def editor(self):
         return self._editor
         
-    def graphAlgoVisited(self):
-        return self._graphAlgoVisited
-    
-    def clearGraphAlgoVisitedFlag(self):
-        self._graphAlgoVisited = False
-        for arr in self._arrows:
-            arr.clearGraphAlgoVisitedFlag()
-        
-    def setGraphAlgoVisitedFlag(self):
-        self._graphAlgoVisited = True
-        
     def __deepcopy__(self, memo):
         copy = deepcopy(super(), memo)
         memo[id(self)] = copy
@@ -45,7 +33,17 @@ class CategoryObject(GraphNode):
         self.copyLabelsTo(copy) 
         return copy
     
+    def _graphIndex(self):
+        # The enclosing diagram's adjacency index, if it has this object as a member
+        parent = self.parentItem()
+        if parent is not None and hasattr(parent, 'graphIndex') and parent.getObject(self.uid()) is self:
+            return parent.graphIndex()
+        return None
+    
     def outgoingArrows(self):
+        index = self._graphIndex()
+        if index is not None:
+            return index.outgoing(self)
         out = []
         for arr in self.arrows():
             if arr.fromNode() is self:
@@ -53,6 +51,9 @@ class CategoryObject(GraphNode):
         return out
     
     def incomingArrows(self):
+        index = self._graphIndex()
+        if index is not None:
+            return index.incoming(self)
         inc = []
         for arr in self.arrows():
             if arr.toNode() is self:
@@ -55,6 +55,149 @@ class MethodCallCommand(Command):
         return self._method
     
 
+class BatchEditCommand(Command):
+    # Runs its subcommands inside one bulk edit of the diagram, so layout and functor images update once
+    def __init__(self, text, diagram, editor):
+        super().__init__(text, editor)
+        self._diagram = diagram
+        
+    def _redo(self):
+        with self._diagram.bulkEdit():
+            super()._redo()
+            
+    def undo(self):
+        with self._diagram.bulkEdit():
+            super().undo()
+            
+            
+class MergeableCommand(Command):
+    # Consecutive commands with the same id() and mergeKey() collapse into one undo stack entry
+    Id = -1
+    
+    def __init__(self, text, editor=None, skip1st=False):
+        super().__init__(text, editor, skip1st)
+        self._getText = None
+        self._textSignals = []
+        
+    def id(self):
+        return self.Id
+    
+    def mergeKey(self):
+        raise NotImplementedError
+    
+    def mergeWith(self, command):
+        if command.id() != self.id() or command.mergeKey() != self.mergeKey():
+            return False
+        self._absorb(command)
+        # The stack deletes a merged command, so its text slots move over to this one
+        signals = list(command._textSignals)
+        command.disconnectTextSignals()
+        if command._getText:
+            self.setTextSource(command._getText, signals)
+        self.updateText()
+        self.setObsolete(self.isIdentity())
+        return True
+    
+    def _absorb(self, command):
+        raise NotImplementedError
+    
+    def isIdentity(self):
+        return False
+    
+    def setTextSource(self, getText, signals):
+        self._getText = getText
+        for signal in signals:
+            signal.connect(self.updateText)
+            self._textSignals.append(signal)
+            
+    def updateText(self, *args):
+        if self._getText:
+            QUndoCommand.setText(self, self._getText())
+            
+    def disconnectTextSignals(self):
+        for signal in self._textSignals:
+            signal.disconnect(self.updateText)
+        self._textSignals.clear()
+        
+
+class MoveItemsCommand(MergeableCommand):
+    Id = 1
+    
+    def __init__(self, text, items, old_pos, new_pos, editor, skip1st=False):
+        super().__init__(text, editor, skip1st)
+        self._items = list(items)
+        self._oldPos = list(old_pos)
+        self._newPos = list(new_pos)
+        
+    def mergeKey(self):
+        return tuple(id(item) for item in self._items)
+    
+    def _absorb(self, command):
+        self._newPos = command._newPos
+        
+    def isIdentity(self):
+        return self._oldPos == self._newPos
+        
+    def _redo(self):
+        for item, pos in zip(self._items, self._newPos):
+            item.setPos(pos)
+            
+    def undo(self):
+        for item, pos in zip(self._items, self._oldPos):
+            item.setPos(pos)
+            
+
+class ControlPointDragCommand(MergeableCommand):
+    Id = 2
+    
+    def __init__(self, text, arrow, old_pos, new_pos, editor, skip1st=False):
+        super().__init__(text, editor, skip1st)
+        self._arrow = arrow
+        self._oldPos = list(old_pos)
+        self._newPos = list(new_pos)
+        
+    def mergeKey(self):
+        return id(self._arrow)
+    
+    def _absorb(self, command):
+        self._newPos = command._newPos
+        
+    def isIdentity(self):
+        return self._oldPos == self._newPos
+        
+    def _redo(self):
+        self._arrow.setPointPositions(self._newPos)
+        
+    def undo(self):
+        self._arrow.setPointPositions(self._oldPos)
+        
+        
+class SetEndpointCommand(MergeableCommand):
+    Id = 3
+    
+    # setter is the arrow's bound _setDomain or _setCodomain
+    def __init__(self, text, setter, new, old, editor):
+        super().__init__(text, editor)
+        self._setter = setter
+        self._new = new
+        self._old = old
+        
+    def mergeKey(self):
+        return (id(self._setter.__self__), self._setter.__name__)
+    
+    def _absorb(self, command):
+        self._new = command._new
+        
+    def isIdentity(self):
+        return self._new is self._old
+    
+    def _redo(self):
+        self._setter(self._new)
+        
+    def undo(self):
+        self._setter(self._old)
+        
+
 class DeleteItemsCommand(Command):
     def __init__(self, text, items, editor):
         super().__init__(text, editor)
@@ -84,7 +227,7 @@ class TakeFunctorImage(Command):
             self._map = {}
         else:
             self._changes = {}
-            self._map = functor.mapping()
+            self._map = dict(functor.mapping())     # Functor maps are updated in place by incremental edits
         
     def _redo(self):
         if self._swap:
@@ -103,18 +246,25 @@ class TakeFunctorImage(Command):
             G = self._functor
             C = self._dom
             D = self._cod
-            for x in list(C.objects().values()):    # So we can add to objects() during iteration  (endofunctors)
-                if x.uid() not in self._map:
-                    y = G(x)
-                    self._changes[x.uid()] = y.uid()
-                    D.addObject(y)
-                    G.connectObjectToItsImage(x, y)
-            for f in list(C.morphisms().values()):
-                if f.uid() not in self._map:
-                    g = G(f)
-                    self._changes[f.uid()] = g.uid()
-                    D.addMorphism(g)
-                    G.connectMorphismToItsImage(f, g)
+            C.loadContents()
+            D.loadContents()
+            G.reflectDiagrams(C, D)
+            imaging = G.isImaging()
+            G.setImaging(True)
+            try:
+                with D.bulkEdit():      # D lays its arrows out once, not once per image
+                    for x in list(C.objects().values()):    # So we can add to objects() during iteration  (endofunctors)
+                        if x.uid() not in self._map:
+                            y = G(x)
+                            self._changes[x.uid()] = y.uid()
+                            D.addObject(y)
+                    for f in list(C.morphisms().values()):
+                        if f.uid() not in self._map:
+                            g = G(f)
+                            self._changes[f.uid()] = g.uid()
+                            D.addMorphism(g)
+            finally:
+                G.setImaging(imaging)
             self.editor().scene().update()
             G.setMapping({**self._map, **self._changes})
                 
@@ -122,13 +272,12 @@ class TakeFunctorImage(Command):
         F = self._functor
         C = self._dom
         D = self._cod
-        for xuid, yuid in self._changes.items():
-            if yuid in D.objects():
-                D.removeObject(D.getObject(yuid))
-                F.disconnectObjectFromItsImage(C.getObject(xuid), D.getObject(yuid))
-            elif yuid in D.morphisms():
-                D.removeMorphism(D.getMorphism(yuid))
-                F.disconnectMorphismFromItsImage(C.getMorphism(xuid), D.getMorphism(yuid))
+        with D.bulkEdit():
+            for xuid, yuid in self._changes.items():
+                if yuid in D.objects():
+                    D.removeObject(D.getObject(yuid))
+                elif yuid in D.morphisms():
+                    D.removeMorphism(D.getMorphism(yuid))
         self._changes.clear()
         F.setMapping(self._map)
             
@@ -0,0 +1,281 @@
+from collections import deque
+from label_terms import atom, compose, identity, variance
+
+# Checks whether a CategoryDiagram commutes.  Paths are enumerated per source object with a
+# memo keyed by (object, length budget), so every suffix is built once per check and shared
+# by all the paths that end with it.  Paths are at most MaxLength arrows long and pass through
+# any object at most MaxVisits times (counting where they start), which bounds the cycles.
+# Two parallel paths are equal when their canonical words agree, i.e. their labels compose to
+# the same interned term (see label_terms) once identities are dropped; otherwise the pair is
+# reported as unproven.
+# Edits only mark morphisms dirty; the next check() re-enumerates just the sources that can
+# reach a dirty morphism within the length bound.
+
+def morphismWord(arr):
+    # Normal form of the arrow's label term; identity() for identities.  The term is the one the
+    # arrow keeps for its symbol, so the label is only parsed again after it changes.  An
+    # unlabeled arrow gets an atom of its own, so it only ever equals itself.
+    term = arr.symbolTerm()
+    if term is None:
+        return atom("#" + str(arr.uid()))
+    return term.normal()
+
+
+def compositeLabel(word):
+    return str(word)
+
+
+def pathWord(path, words):
+    # path lists arrow uids in the order they're followed; the word has the last one first
+    w = identity()
+    for uid in path:
+        w = compose(words[uid], w)
+    return w
+
+
+class ParallelPaths:
+    def __init__(self, source, target, classes, truncated=False):
+        self._source = source
+        self._target = target
+        self._classes = classes     # canonical word -> [path], a path being a tuple of arrow uids
+        self._truncated = truncated
+
+    def __repr__(self):
+        return "ParallelPaths(" + str(self._source) + ", " + str(self._target) + ", " + \
+               " | ".join(compositeLabel(word) for word in self._classes) + ")"
+
+    def source(self):
+        return self._source
+
+    def target(self):
+        return self._target
+
+    def classes(self):
+        return self._classes
+
+    def paths(self):
+        return [path for paths in self._classes.values() for path in paths]
+
+    def isTruncated(self):
+        return self._truncated
+
+    def commutes(self):
+        return len(self._classes) == 1
+
+    def equalPaths(self):
+        # Groups of two or more paths proven equal
+        return [paths for paths in self._classes.values() if len(paths) > 1]
+
+    def unproven(self):
+        # (word, word) for every two classes nothing here shows to be equal
+        words = list(self._classes)
+        return [(words[i], words[j]) for i in range(len(words)) for j in range(i + 1, len(words))]
+
+
+class CommutativityChecker:
+    MaxLength = 3
+    MaxVisits = 2
+    MaxPaths = 256      # Per source and target; further paths are dropped and the pair marked truncated
+
+    def __init__(self, diagram, max_length=None, max_visits=None):
+        self._diagram = diagram
+        self._maxLength = self.MaxLength if max_length is None else max_length
+        self._maxVisits = self.MaxVisits if max_visits is None else max_visits
+        self._ends = {}         # arrow uid -> (domain uid, codomain uid)
+        self._words = {}        # arrow uid -> canonical word
+        self._out = {}          # object uid -> set of arrow uids
+        self._in = {}
+        self._dangling = set()  # Members whose end points aren't objects of the diagram (yet)
+        self._memo = {}         # (object uid, length budget) -> ([(path, objects visited)], [word])
+        self._results = {}      # source uid -> {target uid: ParallelPaths}
+        self._dirty = set()
+        self._rebuild = True
+        self._variance = variance()     # Words are rebuilt after a functor's variance changes
+        diagram.morphismAdded.connect(self.morphismChanged)
+        diagram.morphismRemoved.connect(self.morphismChanged)
+        diagram.morphismSymbolChanged.connect(self.morphismChanged)
+        diagram.morphismDomainSet.connect(lambda arr, dom: self.morphismChanged(arr))
+        diagram.morphismCodomainSet.connect(lambda arr, cod: self.morphismChanged(arr))
+        diagram.objectAdded.connect(self.objectChanged)
+        diagram.objectRemoved.connect(self.objectChanged)
+
+    def diagram(self):
+        return self._diagram
+
+    def maxLength(self):
+        return self._maxLength
+
+    def setMaxLength(self, length):
+        if length != self._maxLength:
+            self._maxLength = length
+            self.invalidate()
+
+    def maxVisits(self):
+        return self._maxVisits
+
+    def setMaxVisits(self, visits):
+        if visits != self._maxVisits:
+            self._maxVisits = visits
+            self.invalidate()
+
+    def invalidate(self):
+        self._rebuild = True
+
+    def isUpToDate(self):
+        return not self._rebuild and not self._dirty and self._variance == variance()
+
+    def morphismChanged(self, arr):
+        self._dirty.add(arr.uid())
+
+    def objectChanged(self, obj):
+        uid = obj.uid()
+        self._dirty.update(self._out.get(uid, ()))
+        self._dirty.update(self._in.get(uid, ()))
+        self._dirty.update(self._dangling)
+        self._results.pop(uid, None)
+        for targets in self._results.values():
+            targets.pop(uid, None)
+
+    def check(self):
+        # Brings the results up to date and returns them
+        self._diagram.loadContents()
+        if self._rebuild or self._variance != variance():
+            self._fullCheck()
+        elif self._dirty:
+            self._incrementalCheck()
+        return self.report()
+
+    def report(self):
+        return [result for targets in self._results.values() for result in targets.values()]
+
+    def result(self, source, target):
+        return self._results.get(source.uid(), {}).get(target.uid())
+
+    def commutes(self):
+        return all(result.commutes() for result in self.check())
+
+    def _fullCheck(self):
+        self._rebuild = False
+        self._variance = variance()
+        self._dirty.clear()
+        self._ends.clear()
+        self._words.clear()
+        self._out.clear()
+        self._in.clear()
+        self._dangling.clear()
+        self._memo.clear()
+        self._results.clear()
+        for uid in self._diagram.morphisms():
+            self._index(uid)
+        for uid in self._diagram.objects():
+            self._checkSource(uid)
+
+    def _incrementalCheck(self):
+        dirty = self._dirty
+        self._dirty = set()
+        # Sources that reached a changed arrow before the edit, then after it
+        affected = self._reaching(self._ends[uid][0] for uid in dirty if uid in self._ends)
+        for uid in dirty:
+            self._unindex(uid)
+            self._index(uid)
+        affected |= self._reaching(self._ends[uid][0] for uid in dirty if uid in self._ends)
+        for key in [key for key in self._memo if key[0] in affected]:
+            del self._memo[key]
+        objects = self._diagram.objects()
+        for uid in affected:
+            self._results.pop(uid, None)
+            if uid in objects:
+                self._checkSource(uid)
+
+    def _reaching(self, starts):
+        # Objects with a path of fewer than MaxLength arrows to one of starts
+        depth = {}
+        queue = deque()
+        for uid in starts:
+            if uid not in depth:
+                depth[uid] = 0
+                queue.append(uid)
+        while queue:
+            uid = queue.popleft()
+            d = depth[uid] + 1
+            if d < self._maxLength:
+                for a in self._in.get(uid, ()):
+                    x = self._ends[a][0]
+                    if x not in depth:
+                        depth[x] = d
+                        queue.append(x)
+        return set(depth)
+
+    def _index(self, uid):
+        arr = self._diagram.getMorphism(uid)
+        if arr is None:
+            self._dangling.discard(uid)
+            return
+        objects = self._diagram.objects()
+        dom = arr.domain()
+        cod = arr.codomain()
+        if dom is None or cod is None or dom.uid() not in objects or cod.uid() not in objects:
+            self._dangling.add(uid)
+            return
+        self._dangling.discard(uid)
+        x = dom.uid()
+        y = cod.uid()
+        self._ends[uid] = (x, y)
+        self._words[uid] = morphismWord(arr)
+        self._out.setdefault(x, set()).add(uid)
+        self._in.setdefault(y, set()).add(uid)
+
+    def _unindex(self, uid):
+        ends = self._ends.pop(uid, None)
+        self._words.pop(uid, None)
+        if ends:
+            self._out[ends[0]].discard(uid)
+            self._in[ends[1]].discard(uid)
+
+    def _paths(self, x, n):
+        # Paths of 1 to n arrows out of x with the objects they visit (x first), and alongside
+        # them their words, each one compose() away from its suffix's.  The words are kept out of
+        # the path tuples so those hold only ints, which the garbage collector stops tracking.
+        key = (x, n)
+        entry = self._memo.get(key)
+        if entry is None:
+            paths = []
+            words = []
+            limit = self._maxVisits
+            for a in self._out.get(x, ()):
+                y = self._ends[a][1]
+                wa = self._words[a]
+                if y != x or limit > 1:
+                    paths.append(((a,), (x, y)))
+                    words.append(wa)
+                if n > 1:
+                    suffixes, suffix_words = self._paths(y, n - 1)
+                    for (path, visited), word in zip(suffixes, suffix_words):
+                        if visited.count(x) < limit:
+                            paths.append(((a,) + path, (x,) + visited))
+                            words.append(compose(word, wa))
+            entry = self._memo[key] = (paths, words)
+        return entry
+
+    def _checkSource(self, x):
+        by_target = {}
+        truncated = set()
+        for (path, visited), word in zip(*self._paths(x, self._maxLength)):
+            y = visited[-1]
+            entry = by_target.get(y)
+            if entry is None:
+                entry = by_target[y] = ([], [])
+            if len(entry[0]) < self.MaxPaths:
+                entry[0].append(path)
+                entry[1].append(word)
+            else:
+                truncated.add(y)
+        results = {}
+        for y, (paths, words) in by_target.items():
+            if len(paths) > 1:
+                classes = {}
+                for path, word in zip(paths, words):
+                    classes.setdefault(word, []).append(path)
+                results[y] = ParallelPaths(x, y, classes, y in truncated)
+        if results:
+            self._results[x] = results
@@ -0,0 +1,115 @@
+from commutativity import morphismWord
+from label_terms import atom, compose, identity
+
+# Composites of a CategoryDiagram's morphisms, found without creating any arrows.  Composites
+# grow one morphism at a time over the diagram's GraphIndex, up to MaxLength morphisms or,
+# with no bound, until nothing new turns up.  Each is keyed by its end points and canonical
+# word, so a composite already in the diagram (e.g. an arrow labeled "g∘f") or already found
+# along another path is skipped, and identities never count as factors.  The caller looks at
+# the counts, picks composites and hands them to CategoryDiagram.addComposites.
+
+class Composite:
+    def __init__(self, source, target, word, path, label):
+        self._source = source
+        self._target = target
+        self._word = word
+        self._path = path       # Morphisms in the order they're followed
+        self._label = label     # Term, rendered when asked for
+
+    def __repr__(self):
+        return "Composite(" + str(self._label) + " : " + str(self._source) + " → " + str(self._target) + ")"
+
+    def source(self):
+        return self._source
+
+    def target(self):
+        return self._target
+
+    def word(self):
+        return self._word
+
+    def path(self):
+        return self._path
+
+    def length(self):
+        return len(self._path)
+
+    def label(self):
+        return str(self._label)
+
+
+class CompositionClosure:
+    MaxLength = 2
+    MaxComposites = 10000       # A cycle composes forever, so the fixed point is cut off here
+
+    def __init__(self, diagram, max_length=MaxLength, morphisms=None):
+        # max_length None composes to a fixed point; morphisms restricts the factors
+        self._diagram = diagram
+        self._maxLength = max_length
+        self._morphisms = None if morphisms is None else {arr.uid() for arr in morphisms}
+        self._composites = []
+        self._truncated = False
+
+    def diagram(self):
+        return self._diagram
+
+    def maxLength(self):
+        return self._maxLength
+
+    def composites(self):
+        return self._composites
+
+    def isTruncated(self):
+        return self._truncated
+
+    def counts(self):
+        # composite length -> number of composites
+        counts = {}
+        for c in self._composites:
+            counts[c.length()] = counts.get(c.length(), 0) + 1
+        return counts
+
+    def compute(self):
+        self._diagram.loadContents()
+        index = self._diagram.graphIndex()
+        offsets, edges, ends = index.csr()[:3]
+        words = {}
+        labels = {}
+        known = set()
+        for e in range(index.edgeCount()):
+            arr = index.edge(e)
+            words[e] = word = morphismWord(arr)
+            labels[e] = word if arr.symbolTerm() is not None else atom("?")
+            known.add((index.source(e), index.target(e), word))
+        factors = [e for e in words if words[e] is not identity() and (self._morphisms is None or index.edge(e).uid() in self._morphisms)]
+        allowed = set(factors)
+        self._composites = []
+        self._truncated = False
+        # Frontier of (source node, target node, word, label, edge path); length 1 is the factors themselves
+        frontier = [(index.source(e), index.target(e), words[e], labels[e], (e,)) for e in factors]
+        length = 1
+        while frontier and (self._maxLength is None or length < self._maxLength):
+            length += 1
+            grown = []
+            for x, y, word, label, path in frontier:
+                for k in range(offsets[y], offsets[y + 1]):
+                    e = edges[k]
+                    if e in allowed:
+                        z = ends[k]
+                        composite = compose(words[e], word)
+                        key = (x, z, composite)
+                        if key not in known:
+                            known.add(key)
+                            grown.append((x, z, composite, compose(labels[e], label), path + (e,)))
+                            if len(self._composites) + len(grown) >= self.MaxComposites:
+                                self._truncated = True
+                                break
+                if self._truncated:
+                    break
+            for x, z, word, label, path in grown:
+                self._composites.append(Composite(index.node(x), index.node(z), word,
+                                                  [index.edge(e) for e in path], label))
+            if self._truncated:
+                break
+            frontier = grown
+        return self._composites
@@ -42,7 +42,7 @@ class ControlPoint(GfxObject):
         memo[id(self)] = self
         copy = deepcopy(super(), memo)
         copy._radius = self._radius
-        copy._rect = QRectF(self._rect)
+        copy._rect = self._rect
         copy._snapToGrid = self._snapToGrid
         return copy
         
@@ -0,0 +1,72 @@
+from PyQt5.QtCore import QObject, QTimer
+from time import monotonic
+import heapq
+
+# Many pending deadlines, one timer.  Deadlines sit in a heap keyed by time; rescheduling or
+# cancelling a key just forgets its entry, and stale heap entries are skipped when they
+# surface, so every operation is O(log n) and the timer only ever wakes for the earliest one.
+
+class DeadlineScheduler(QObject):
+    def __init__(self):
+        super().__init__()
+        self._heap = []         # (deadline, seq, key)
+        self._entries = {}      # key -> (deadline, seq, callback); the live entry for each key
+        self._seq = 0
+        self._timer = QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._fire)
+        
+    def __len__(self):
+        return len(self._entries)
+    
+    def __contains__(self, key):
+        return key in self._entries
+        
+    def schedule(self, key, msec, callback):
+        # Replaces any deadline key already has
+        deadline = monotonic() + msec / 1000
+        self._seq += 1
+        self._entries[key] = (deadline, self._seq, callback)
+        heapq.heappush(self._heap, (deadline, self._seq, key))
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [(d, s, k) for k, (d, s, c) in self._entries.items()]
+            heapq.heapify(self._heap)
+        self._restartTimer()
+        
+    def cancel(self, key):
+        if self._entries.pop(key, None) is not None:
+            if not self._entries:
+                self._heap.clear()
+                self._timer.stop()
+                
+    def clear(self):
+        self._entries.clear()
+        self._heap.clear()
+        self._timer.stop()
+        
+    def _isLive(self, entry):
+        live = self._entries.get(entry[2])
+        return live is not None and live[1] == entry[1]
+        
+    def _restartTimer(self):
+        heap = self._heap
+        while heap and not self._isLive(heap[0]):
+            heapq.heappop(heap)
+        if heap:
+            msec = max(0, int((heap[0][0] - monotonic()) * 1000) + 1)
+            if not self._timer.isActive() or self._timer.remainingTime() > msec:
+                self._timer.start(msec)
+        else:
+            self._timer.stop()
+            
+    def _fire(self):
+        now = monotonic()
+        heap = self._heap
+        due = []
+        while heap and heap[0][0] <= now:
+            entry = heapq.heappop(heap)
+            if self._isLive(entry):
+                due.append(self._entries.pop(entry[2])[2])
+        for callback in due:
+            callback()
+        self._restartTimer()
@@ -0,0 +1,109 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+from concurrent.futures import ProcessPoolExecutor, CancelledError
+import multiprocessing
+from path_search import PlainGraph, setGraph, runQuery
+
+# Runs path_search queries against a CategoryDiagram on a process pool.  The diagram's graph
+# is exported once to a PlainGraph and handed to each worker when it starts; the queries are
+# independent (one per source object, object pair or morphism pair), so they spread over all
+# cores.  Every finished query is relayed to the GUI thread by a queued signal, so results
+# stream in while the UI stays responsive.  cancel() drops the queries not yet started and
+# ignores the rest.  Workers are spawned rather than forked, since the GUI process runs Qt.
+
+class DiagramChaser(QObject):
+    MaxLength = 4
+    MaxVisits = 2
+    MaxPaths = 256      # Per query, or per word and target for "unproven"
+
+    resultReady = pyqtSignal(tuple, object)     # query, result
+    failed = pyqtSignal(tuple, str)             # query, error message
+    progress = pyqtSignal(int, int)             # queries done, queries
+    finished = pyqtSignal(bool)                 # False if cancelled
+    _queryDone = pyqtSignal(int, tuple, object, str)
+
+    def __init__(self, diagram, max_workers=None):
+        super().__init__()
+        self._diagram = diagram
+        self._maxWorkers = max_workers
+        self._executor = None
+        self._futures = []
+        self._run = 0       # Results from an earlier, cancelled run are ignored
+        self._done = 0
+        self._queryDone.connect(self._relay)
+
+    def diagram(self):
+        return self._diagram
+
+    def isRunning(self):
+        return self._executor is not None
+
+    def findPaths(self, pairs, max_length=None):
+        max_length = self.MaxLength if max_length is None else max_length
+        return self.start([("paths", X.uid(), Y.uid(), max_length, self.MaxPaths) for X, Y in pairs])
+
+    def findLifts(self, pairs, max_length=None):
+        # Lifts of f through g, for each (f, g) given
+        max_length = self.MaxLength if max_length is None else max_length
+        return self.start([("lifts", f.uid(), g.uid(), max_length, self.MaxPaths) for f, g in pairs])
+
+    def findUnproven(self, sources=None, max_length=None):
+        # Parallel paths out of each source (every object by default) whose words differ
+        if sources is None:
+            self._diagram.loadContents()
+            sources = self._diagram.objects().values()
+        max_length = self.MaxLength if max_length is None else max_length
+        return self.start([("unproven", X.uid(), max_length, self.MaxVisits, self.MaxPaths) for X in sources])
+
+    def start(self, queries):
+        self.cancel()
+        self._diagram.loadContents()
+        graph = PlainGraph.fromIndex(self._diagram.graphIndex())
+        self._run += 1
+        self._done = 0
+        run = self._run
+        self._executor = ProcessPoolExecutor(max_workers=self._maxWorkers, initializer=setGraph, initargs=(graph,),
+                                             mp_context=multiprocessing.get_context("spawn"))
+        self._futures = []
+        for query in queries:
+            future = self._executor.submit(runQuery, query)
+            future.add_done_callback(lambda future, query=query: self._futureDone(run, query, future))
+            self._futures.append(future)
+        if not queries:
+            self._finish(True)
+        return len(queries)
+
+    def _futureDone(self, run, query, future):
+        # Runs on the executor's thread; the signal queues the result to the GUI thread
+        try:
+            result = future.result()
+        except CancelledError:
+            return
+        except Exception as e:
+            self._queryDone.emit(run, query, None, str(e) or type(e).__name__)
+            return
+        self._queryDone.emit(run, query, result, "")
+
+    def _relay(self, run, query, result, error):
+        if run != self._run or self._executor is None:
+            return
+        self._done += 1
+        if error:
+            self.failed.emit(query, error)
+        else:
+            self.resultReady.emit(query, result)
+        self.progress.emit(self._done, len(self._futures))
+        if self._done == len(self._futures):
+            self._finish(True)
+
+    def cancel(self):
+        if self._executor is not None:
+            self._run += 1
+            self._finish(False)
+
+    def _finish(self, completed):
+        executor = self._executor
+        self._executor = None
+        self._futures = []
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        self.finished.emit(completed)
@@ -1,9 +1,12 @@
 from PyQt5.QtWidgets import QGraphicsView, QUndoStack
 from PyQt5.QtCore import Qt, pyqtSignal
 from copy import deepcopy
+from uid_allocator import UidAllocator
 
 
 class Editor(QGraphicsView):
+    DefaultUndoLimit = 500      # Commands kept for undo; the oldest are dropped, with the items they hold.  0 keeps all
+    
     focused = pyqtSignal()
     
     def __init__(self, window, new=True):
@@ -19,7 +22,9 @@ class Editor(QGraphicsView):
         self.setFocusPolicy(Qt.StrongFocus)
         self.setMouseTracking(True)
         self._undoStack = QUndoStack()
+        self._undoStack.setUndoLimit(self.DefaultUndoLimit)
         self._undoView = None
+        self._uidAllocator = UidAllocator()
         
     def window(self):
         return self._window
@@ -109,4 +114,16 @@ class Editor(QGraphicsView):
         return self._undoView
     
     def undoStack(self):
-        return self._undoStack
\ No newline at end of file
+        return self._undoStack
+    
+    def undoLimit(self):
+        return self._undoStack.undoLimit()
+    
+    def setUndoLimit(self, limit):
+        # QUndoStack only takes a limit while it's empty, so the current history is dropped first
+        if limit != self.undoLimit():
+            self._undoStack.clear()
+            self._undoStack.setUndoLimit(limit)
+    
+    def uidAllocator(self):
+        return self._uidAllocator
\ No newline at end of file
@@ -4,6 +4,9 @@ from PyQt5.QtWidgets import QGraphicsSceneHoverEvent, QMenu
 from commands import MethodCallCommand, TakeFunctorImage
 from category_object import CategoryObject
 from copy import deepcopy
+from functor_dispatcher import FunctorDispatcher
+from label_terms import apply, atom, functorTemplate, setContravariantTemplate
+from gfx_object import ArrowlessCopy
 
 class Functor(CategoryArrow):
     def __init__(self, new=True):
@@ -11,9 +14,12 @@ class Functor(CategoryArrow):
         super().__init__(new)
         if new:
             self._map = {}
-            self._signalsSlots = {}      # Keyed by uid
-        self._memo = {}
+        self._dispatcher = FunctorDispatcher(self)
+        self._imaging = False   # Set while image items are being added, so endofunctors don't image their own images
+        self._memo = {ArrowlessCopy : True}     # Images are copied item by item, see GraphNode.__deepcopy__
         self._contra = False    # covariance / contravariance
+        self._contraTemplate = None     # The template this functor has registered contravariant in label_terms
+        self.symbolChanged.connect(lambda sym: self._registerVariance())
         
     def __deepcopy__(self, memo):
         copy = deepcopy(super(), memo)
@@ -35,68 +41,16 @@ class Functor(CategoryArrow):
             self.symbolChanged.connect, lambda symbol: command.setText(getText())
             self.domain().symbolChanged.connect(lambda symbol: command.setText(getText()))
     
-    def connectSignal(self, uid_hash, signal, slots):
-        if uid_hash not in self._signalsSlots:
-            self._signalsSlots[uid_hash] = []
-        self._signalsSlots[uid_hash].append((signal, slots))
-        for slot in slots:
-            signal.connect(slot)
-            
-    def disconnectSignals(self, uid_hash):
-        if uid_hash in self._signalsSlots:
-            tuple_list = self._signalsSlots[uid_hash]
-            for signal, slots in tuple_list:
-                for slot in slots:
-                    signal.disconnect(slot)
-            del self._signalsSlots[uid_hash]
-            
-    def disconnectRemainingSignals(self):
-        for uid_hash in self._signalsSlots:
-            self.disconnectSignals(uid_hash)
-        self._signalsSlots.clear()
-    
-    def connectObjectToItsImage(self, x, y):
-        F = self
-        hash = self.uidPairHash(x, y)
-        self.connectSignal(hash, self.symbolChanged, [lambda sym: y.setSymbol(F.imageString(x))])
-        self.connectSignal(hash, x.symbolChanged, [lambda sym: y.setSymbol(F.imageString(x))])
-        self.connectSignal(hash, x.deleted, [lambda o: y.delete(), self.deleteMapping])
-        self.connectSignal(hash, x.positionChangedDelta, [lambda delta: self._reflectItemPosDelta(y, delta)])
-        y.setEditable(False)
-                
-    def disconnectObjectFromItsImage(self, x, y):
-        if x and y:
-            hash = self.uidPairHash(x, y)
-            self.disconnectSignals(hash)
+    def reflectDiagrams(self, dom, cod):
+        self._dispatcher.setDiagrams(dom, cod)
+        
+    def image(self, item):
+        return self._dispatcher.image(item)
         
     def _reflectItemPosDelta(self, item, delta):
         if self._reflectGfx:
             item.setPos(item.pos() + delta)
                
-    def deleteMapping(self, item):
-        del self._map[item.uid()]
-        
-    def connectMorphismToItsImage(self, f, g):
-        F = self;  C = F.domain();  D = F.codomain()
-        hash = self.uidPairHash(f, g)
-        self.connectSignal(hash, self.symbolChanged, [lambda sym: g.setSymbol(F.imageString(f))])
-        self.connectSignal(hash, f.symbolChanged, [lambda sym: g.setSymbol(F.imageString(f))])
-        self.connectSignal(hash, f.deleted, [lambda a: g.delete(), self.deleteMapping])
-        if self._contra:
-            self.connectSignal(hash, f.domainSet, [lambda dom: self._reflectCodomainSet(g, dom)])
-            self.connectSignal(hash, f.codomainSet, [lambda cod: self._reflectDomainSet(g, cod)])
-        else:
-            self.connectSignal(hash, f.domainSet, [lambda dom: self._reflectDomainSet(g, dom)])
-            self.connectSignal(hash, f.codomainSet, [lambda cod: self._reflectCodomainSet(g, cod)])
-        self.connectSignal(hash, f.bezierToggled, [lambda b: self._reflectToggleBezier(g, b)])
-        self.connectSignal(hash, f.controlPointsPosChanged, [lambda pos_list: self._reflectControlPointPos(g, pos_list)])
-        g.setEditable(False)      
-        
-    def disconnectMorphismFromItsImage(self, f, g):
-        if f and g:
-            hash = self.uidPairHash(f, g)
-            self.disconnectSignals(hash)
-        
     def _reflectDomainSet(self, arr, dom):
         F = self;  C = self.domain();  D = self.codomain()
         if dom and D:
@@ -132,10 +86,7 @@ class Functor(CategoryArrow):
             arr.setPointPositions(pos_list)
     
     def deleteMapping(self, item):
-        if isinstance(item, str):
-            if item in self._map:
-                del self._map[item]
-        elif item.uid() in self._map:
+        if item.uid() in self._map:
             del self._map[item.uid()]
     
     def undoTakeImage(self, dom=None, cod=None):
@@ -150,6 +101,44 @@ class Functor(CategoryArrow):
             self.symbolChanged.connect(lambda sym: command.setText(getText()))
             self.domain().symbolChanged.connect(lambda sym: command.setText(getText()))
                                 
+    def isImaging(self):
+        return self._imaging
+    
+    def setImaging(self, imaging):
+        self._imaging = imaging
+        
+    def addToImage(self, item):
+        D = self.codomain()
+        if D is None or self._imaging or item.uid() in self._map:
+            return
+        self._imaging = True
+        try:
+            y = self(item)
+            self._map[item.uid()] = y.uid()
+            self.reflectDiagrams(self.domain(), D)
+            if isinstance(item, CategoryObject):
+                D.addObject(y)
+            else:
+                D.addMorphism(y)
+        finally:
+            self._imaging = False
+            
+    def removeFromImage(self, item):
+        D = self.codomain()
+        if D is None or self._imaging:
+            return
+        y = self.image(item)
+        self.deleteMapping(item)
+        if y is not None:
+            self._imaging = True
+            try:
+                if isinstance(y, CategoryObject):
+                    D.removeObject(y)
+                else:
+                    D.removeMorphism(y)
+            finally:
+                self._imaging = False
+                                
     def updateImage(self, undoable=False):
         if self.domain().nonempty():
             if undoable:
@@ -204,7 +193,8 @@ class Functor(CategoryArrow):
     def clearMapping(self):
         self._map.clear()
         self._memo.clear()
-        self.disconnectRemainingSignals()
+        self._memo[ArrowlessCopy] = True
+        self._dispatcher.clear()
         
     def setMapping(self, mapping):
         self._map = mapping
@@ -235,14 +225,21 @@ class Functor(CategoryArrow):
             raise NotImplementedError
         
     def imageString(self, f):
-        f = str(f)
-        fun_name = str(self)
-        if '.' not in fun_name:
-            res =  str(self) + "(" + f + ")"
-        else:
-            i = fun_name.index('.')   # Take first, ignore the rest
-            res = fun_name[:i] + x + fun_name[i+1:] 
-        return res
+        return str(self.imageTerm(f))
+    
+    def imageTerm(self, f):
+        # Interned, so renaming images reuses the terms and their rendered text
+        return apply(self.template(), self.argumentTerm(f))
+    
+    def argumentTerm(self, f):
+        term = f.symbolTerm()
+        if term is None:
+            return atom(f.cachedSymbol())
+        return term
+    
+    def template(self):
+        # A "." in the functor's name marks where the argument goes (the first one, if several)
+        return functorTemplate(self.cachedSymbol())
     
     def buildDefaultContextMenu(self, menu=None):
         if menu is None:
@@ -260,6 +257,25 @@ class Functor(CategoryArrow):
         act.toggled.connect(self.setReflectGraphics)
         return menu
         
+    def _registerVariance(self, alive=True):
+        # While contravariant, F(g∘f) means F(f)∘F(g) in label terms; renames move the registration
+        template = self.template() if alive and self._contra else None
+        if template != self._contraTemplate:
+            if self._contraTemplate is not None:
+                setContravariantTemplate(self._contraTemplate, False)
+            if template is not None:
+                setContravariantTemplate(template, True)
+            self._contraTemplate = template
+            
+    def delete(self, deleted=None):
+        deleted = super().delete(deleted)
+        self._registerVariance(alive=False)
+        return deleted
+    
+    def undelete(self, deleted, emit=True):
+        super().undelete(deleted, emit)
+        self._registerVariance()
+        
     def setReflectGraphics(self, reflect):
         self._reflectGfx = reflect
         
@@ -282,8 +298,10 @@ class Functor(CategoryArrow):
                 self.editor().pushCommand(command)
             else:
                 if self.codomain():
+                    self.codomain().loadContents()
                     revMap = { val : key for key, val in self._map.items() }
                     for g in self.codomain().morphisms().values():
                         g.setReversed(contra)
                 self._contra = contra
+                self._registerVariance()
                             
\ No newline at end of file
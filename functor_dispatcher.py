@@ -0,0 +1,113 @@
+from PyQt5.QtCore import QObject
+
+# Routes a functor's domain change notifications to the image items.  The dispatcher connects
+# once to the domain diagram's relay signals and resolves each image through the functor's
+# uid map at the time of the event, so taking or undoing an image costs no connections at all.
+
+class FunctorDispatcher(QObject):
+    def __init__(self, functor):
+        super().__init__()
+        self._functor = functor
+        self._dom = None
+        self._cod = None
+        self._connections = []
+        functor.symbolChanged.connect(lambda sym: self.renameImages())
+
+    def domain(self):
+        return self._dom
+
+    def codomain(self):
+        return self._cod
+
+    def setDiagrams(self, dom, cod):
+        if dom is not self._dom:
+            self._disconnectDomain()
+            self._dom = dom
+            if dom is not None:
+                self._connect(dom.objectSymbolChanged, self._symbolChanged)
+                self._connect(dom.objectMovedDelta, self._objectMovedDelta)
+                self._connect(dom.objectDeleted, self._deleted)
+                self._connect(dom.morphismSymbolChanged, self._symbolChanged)
+                self._connect(dom.morphismDeleted, self._deleted)
+                self._connect(dom.morphismDomainSet, self._domainSet)
+                self._connect(dom.morphismCodomainSet, self._codomainSet)
+                self._connect(dom.morphismBezierToggled, self._bezierToggled)
+                self._connect(dom.morphismControlPointsMoved, self._controlPointsMoved)
+        self._cod = cod
+
+    def clear(self):
+        self.setDiagrams(None, None)
+
+    def _connect(self, signal, slot):
+        signal.connect(slot)
+        self._connections.append((signal, slot))
+
+    def _disconnectDomain(self):
+        for signal, slot in self._connections:
+            signal.disconnect(slot)
+        self._connections.clear()
+
+    def image(self, item):
+        D = self._cod
+        if D is None:
+            return None
+        uid = self._functor[item.uid()]
+        if uid is None:
+            return None
+        image = D.getObject(uid)
+        if image is None:
+            image = D.getMorphism(uid)
+        return image
+
+    def renameImages(self):
+        C = self._dom
+        if C is not None:
+            F = self._functor
+            for uid in list(F.mapping().keys()):
+                x = C.getObject(uid)
+                if x is None:
+                    x = C.getMorphism(uid)
+                if x is not None:
+                    self._symbolChanged(x)
+
+    def _symbolChanged(self, x):
+        y = self.image(x)
+        if y is not None:
+            y.setSymbol(self._functor.imageString(x))
+
+    def _deleted(self, x):
+        y = self.image(x)
+        if y is not None:
+            y.delete()
+        self._functor.deleteMapping(x)
+
+    def _objectMovedDelta(self, x, delta):
+        y = self.image(x)
+        if y is not None:
+            self._functor._reflectItemPosDelta(y, delta)
+
+    def _domainSet(self, f, dom):
+        g = self.image(f)
+        if g is not None:
+            if self._functor.isContravariant():
+                self._functor._reflectCodomainSet(g, dom)
+            else:
+                self._functor._reflectDomainSet(g, dom)
+
+    def _codomainSet(self, f, cod):
+        g = self.image(f)
+        if g is not None:
+            if self._functor.isContravariant():
+                self._functor._reflectDomainSet(g, cod)
+            else:
+                self._functor._reflectCodomainSet(g, cod)
+
+    def _bezierToggled(self, f, toggle):
+        g = self.image(f)
+        if g is not None:
+            self._functor._reflectToggleBezier(g, toggle)
+
+    def _controlPointsMoved(self, f, pos_list):
+        g = self.image(f)
+        if g is not None:
+            self._functor._reflectControlPointPos(g, pos_list)
@@ -187,6 +187,42 @@ def lineIntersectRoundRectSides(line, rect, r, sides=None):
         
     return isects
 
+# Closed-form projection onto a rounded rect's boundary.  Points landing within r of a
+# corner are projected radially onto that corner's quarter arc; others are clamped to the rect.
+roundedRectCorners = ((1, 1), (1, -1), (-1, -1), (-1, 1))    # bottomRight, topRight, topLeft, bottomLeft
+
+def closestRoundedRectXY(left, top, right, bottom, r, x, y):
+    px = min(max(x, left), right)
+    py = min(max(y, top), bottom)
+    rr = r * r
+    for qx, qy in roundedRectCorners:
+        corner_x = right if qx == 1 else left
+        corner_y = bottom if qy == 1 else top
+        dx = px - corner_x
+        dy = py - corner_y
+        if dx*dx + dy*dy <= rr:
+            ox = corner_x - qx * r         # Arc center
+            oy = corner_y - qy * r
+            ux = x - ox
+            uy = y - oy
+            # Keep the direction inside the corner's quadrant so we land on the quarter arc
+            ux = max(ux, 0.0) if qx == 1 else min(ux, 0.0)
+            uy = max(uy, 0.0) if qy == 1 else min(uy, 0.0)
+            mag = sqrt(ux*ux + uy*uy)
+            if mag == 0.0:
+                ux = qx;  uy = qy;  mag = sqrt(2.0)
+            return ox + ux / mag * r, oy + uy / mag * r
+    return px, py
+
+def closestRoundedRectPoint(rect, r, point):
+    x, y = closestRoundedRectXY(rect.left(), rect.top(), rect.right(), rect.bottom(), r, point.x(), point.y())
+    return QPointF(x, y)
+
+def closestRoundedRectPoints(rect, r, points):
+    left = rect.left();  top = rect.top()
+    right = rect.right();  bottom = rect.bottom()
+    return [QPointF(*closestRoundedRectXY(left, top, right, bottom, r, p.x(), p.y())) for p in points]
+
 def lineIntersectRoundRect(line, rect, r):
     isects = []
 
@@ -5,7 +5,10 @@ from PyQt5.QtCore import Qt, QPointF, pyqtSignal
 from geom_tools import paintSelectionShape, rectToPoly
 from qt_tools import Pen, SimpleBrush, unpickleGfxItemFlags
 from copy import deepcopy
-from uuid import uuid4
+from uid_allocator import newUid, allocator
+
+# A deepcopy memo holding this key copies graph nodes without their arrows (see GraphNode.__deepcopy__)
+ArrowlessCopy = "arrowless copy"
 
 class GfxObject(QGraphicsObject):
     focusedIn = pyqtSignal()
@@ -31,7 +34,7 @@ class GfxObject(QGraphicsObject):
         self._zoomThreshold = self.DefaultZoomThreshold
         self._zoom = 0
         self._commands = []
-        self._uid = str(uuid4())
+        self._uid = newUid()
                 
     def setEditable(self, editable):
         if self._editable != editable:
@@ -49,6 +52,7 @@ class GfxObject(QGraphicsObject):
         return self._uid
     
     def setUid(self, uid):
+        allocator().reserve(uid)
         self._uid = uid
         
     def __setstate__(self, data):
@@ -74,16 +78,18 @@ class GfxObject(QGraphicsObject):
         copy = type(self)(new=False)
         memo[id(self)] = copy
         copy.setParentItem(self.parentItem())
-        copy._pen = deepcopy(self._pen, memo)
-        copy._brush = deepcopy(self._brush, memo)
+        # Pens, brushes and constraint lists are never modified in place (setters replace them),
+        # so copies share them with the original until either one changes.
+        copy._pen = self._pen
+        copy._brush = self._brush
         copy._undoStack = None          # Can't copy an undo stack since it holds references to this item and will change /it/
         copy.setPos(QPointF(self.pos()))
         copy.setFlags(self.flags())
         copy._locked = self._locked
         copy._editable = self._editable
-        copy._constraints = deepcopy(self._constraints, memo)
-        copy._editPen = deepcopy(self._editPen, memo)
-        copy._penSave = deepcopy(self._penSave, memo)   
+        copy._constraints = self._constraints
+        copy._editPen = self._editPen
+        copy._penSave = self._penSave
         return copy
     
     def locked(self):
@@ -187,24 +193,17 @@ class GfxObject(QGraphicsObject):
         if self.collidesWithItem(item):
             return self.boundingRect().center()
 
+        points = [self.mapFromItem(item, point) for point in rectToPoly(item.boundingRect())]
         point_sum = QPointF()
-        points = list(rectToPoly(item.boundingRect()))
-
-        for point in points:
-            point_sum += self.closestBoundaryPos(self.mapFromItem(item, point))
+        for point in self.closestBoundaryPositions(points):
+            point_sum += point
+        self_point = point_sum / 4
 
-        point_sum /= 4
-        self_point = point_sum
-
-        point_sum = QPointF()
-        points = list(rectToPoly(self.boundingRect()))
+        points = [item.mapFromItem(self, point) for point in rectToPoly(self.boundingRect())]
         point_sum = QPointF()
-
-        for point in points:
-            point_sum += item.closestBoundaryPos(item.mapFromItem(self, point))
-
-        point_sum /= 4
-        obj_point = point_sum
+        for point in item.closestBoundaryPositions(points):
+            point_sum += point
+        obj_point = point_sum / 4
 
         point = item.closestBoundaryPos(item.mapFromItem(self, self_point))
 
@@ -216,6 +215,9 @@ class GfxObject(QGraphicsObject):
     def closestBoundaryPos(self, pos):
         raise NotImplementedError
     
+    def closestBoundaryPositions(self, points):
+        return [self.closestBoundaryPos(point) for point in points]
+    
     def associateCommand(self, cmd):
         self._commands.append(cmd)
         
@@ -267,7 +269,7 @@ class GfxObject(QGraphicsObject):
             self.undeleted.emit(self)
             
     def uidPairHash(self, x, y):
-        return x.uid() + "," + y.uid()
+        return (x.uid(), y.uid())
     
     def constraints(self):
         return self._constraints
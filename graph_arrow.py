@@ -1,9 +1,9 @@
-from PyQt5.QtCore import pyqtSignal, Qt, QRectF, QLineF, QPointF, QTimer
+from PyQt5.QtCore import pyqtSignal, Qt, QRectF, QLineF, QPointF
 from PyQt5.QtWidgets import QGraphicsObject, QGraphicsSceneMouseEvent, QMenu, QAction
 from PyQt5.QtGui import QBrush, QPainter, QPainterPath, QPolygonF, QPainterPathStroker, QColor
 from geom_tools import mag2D, dot2D, rectToPoly, paintSelectionShape
 from math import acos, asin, atan2, pi, sin, cos
-from gfx_object import GfxObject
+from gfx_object import GfxObject, ArrowlessCopy
 from labeled_gfx import LabeledGfx
 from text_item import TextItem
 from control_point import ControlPoint
@@ -37,7 +37,7 @@ class GraphArrow(GfxObject, LabeledGfx):
         self.setFlag(self.ItemIsFocusable, False)
         self.setFlag(self.ItemSendsGeometryChanges, True)
         self._contextMenu = None
-        self._editTimer = None
+        self._hidePending = False       # Control points wait to be hidden until the arrow is in a scene
         self._updatingPos = False
         self._snapToGrid = False
         self.hoverLeaveSlot()
@@ -71,12 +71,17 @@ class GraphArrow(GfxObject, LabeledGfx):
         copy._from = None
         copy._to = deepcopy(self._to, memo)
         copy._from = deepcopy(self._from, memo)
-        copy._pen = deepcopy(self._pen, memo)
+        copy._pen = self._pen
         copy._textPos = [None for text_pos in self._textPos]
         copy._reversed = self._reversed
         self.copyLabelsTo(copy)
         copy.setupConnections()
         copy.updateArrowHead()
+        if memo.get(ArrowlessCopy):
+            # Its end points were copied without arrows (see GraphNode.__deepcopy__)
+            for node in (copy._to, copy._from):
+                if node is not None:
+                    node.attachArrow(copy)
         return copy
 
     def controlPointPosAboutToChange(self, ctrl_pt, crnt_pos):
@@ -84,7 +89,8 @@ class GraphArrow(GfxObject, LabeledGfx):
         
     def controlPointPosHasChanged(self, ctrl_pt, new_pos):
         self.updateTextPosition()
-        self.updatePosition()
+        if not self._updatingPos:
+            self.updatePosition()
         self.update()
         self.controlPointsPosChanged.emit([p.pos() for p in self._points])
         
@@ -96,8 +102,9 @@ class GraphArrow(GfxObject, LabeledGfx):
             self.hoverEnterSlot()
         
     def hoverEnterSlot(self):
-        if self._editTimer:
-            self._editTimer.stop()
+        self._hidePending = False
+        if self.scene():
+            self.scene().hoverDeadlines().cancel(self)
         for point in self._points:
             point.setVisible(True)
             
@@ -106,22 +113,20 @@ class GraphArrow(GfxObject, LabeledGfx):
             self.hoverLeaveSlot()
         
     def hoverLeaveSlot(self):
-        if self._editTimer:
-            self._editTimer.stop()
-        self._editTimer = QTimer()
-        self._editTimer.setSingleShot(False)
-        self._editTimer.timeout.connect(self._hoverLeaveEvent)
-        self._editTimer.setInterval(self.EditTime)
-        self._editTimer.start()
+        scene = self.scene()
+        if scene is None:
+            self._hidePending = True
+        else:
+            self._hidePending = False
+            scene.hoverDeadlines().schedule(self, self.EditTime, self._hoverLeaveEvent)
         
     def _hoverLeaveEvent(self):
         for point in self._points:
             if point.isSelected():
+                self.hoverLeaveSlot()       # Try again later
                 return
         for point in self._points:
             point.setVisible(False)  
-        self._editTimer.stop()
-        self._editTimer = None
             
     def setupConnections(self):
         self._points[0].positionAboutToChange.connect(lambda pos: self.controlPointPosAboutToChange(self._points[0], pos))
@@ -239,6 +244,15 @@ class GraphArrow(GfxObject, LabeledGfx):
         path.quadTo((q + tip + r)/3, q)
         self._arrowHead = path        
         
+    def setArrowHeadPoints(self, points):
+        # Flat (x, y) list of the head's p, control, tip, control, q as computed by updateArrowHead()
+        path = QPainterPath()
+        if points is not None:
+            path.moveTo(points[0], points[1])
+            path.quadTo(points[2], points[3], points[4], points[5])
+            path.quadTo(points[6], points[7], points[8], points[9])
+        self._arrowHead = path
+        
     def setLinePoints(self, pos0, pos1):
         u = pos1 - pos0
         mag_u = mag2D(u)
@@ -254,6 +268,8 @@ class GraphArrow(GfxObject, LabeledGfx):
         self.update()
     
     def contextMenuEvent(self, event):
+        if self._contextMenu is not None and not isinstance(self._contextMenu, QMenu):
+            self._contextMenu = self._contextMenu()
         if self._contextMenu:
             self._contextMenu.exec_(event.screenPos())
         
@@ -311,6 +327,11 @@ class GraphArrow(GfxObject, LabeledGfx):
     def line(self):
         return QLineF(self._points[0].pos(), self._points[-1].pos())
     
+    def controlPointsRect(self):
+        size = self.arrowHeadSize()
+        rect = QPolygonF([point.pos() for point in self._points]).boundingRect()
+        return rect.adjusted(-size, -size, size, size)
+    
     def updatePosition(self, force=False):
         #if self.toNode() is None and self.fromNode() is None:
             #if not force:
@@ -411,6 +432,7 @@ class GraphArrow(GfxObject, LabeledGfx):
         return self._updatingPos
     
     def setContextMenu(self, menu):
+        # A menu, or a function that builds it the first time it's shown
         self._contextMenu = menu
         
     def addLabel(self, label):
@@ -457,10 +479,20 @@ class GraphArrow(GfxObject, LabeledGfx):
                 point.setPos(point.pos() + delta)
             value = QPointF()
             return super().itemChange(change, value)
+        elif change == self.ItemSceneChange:
+            if self.scene() and self in self.scene().hoverDeadlines():
+                self.scene().hoverDeadlines().cancel(self)
+                self._hidePending = True
+        elif change == self.ItemSceneHasChanged:
+            if value is not None and self._hidePending:
+                self.hoverLeaveSlot()
         return super().itemChange(change, value)            
     
     def updateGraph(self):
-        self.updatePosition()
+        if self.scene():
+            self.scene().scheduleArrowLayout(self)
+        else:
+            self.updatePosition()
         
     def setPointPositions(self, pos_list):
         if isinstance(pos_list[0], ControlPoint):
@@ -9,6 +9,7 @@ from graph_arrow import ControlPoint, GraphArrow
 from text_item import TextItem
 from geom_tools import mag2D
 from int_spin_dialog import IntSpinDialog
+from commands import MoveItemsCommand, ControlPointDragCommand
 
 class GraphEditor(Editor):
     ZoomScreenSizeFraction = 0.7
@@ -25,6 +26,11 @@ class GraphEditor(Editor):
         self._zoomItem = None
         self._gridSpacing = IntSpinDialog("Grid Spacing: ")
         self._gridSpacing.spinBox.setMinimum(1)
+        self._undoLimit = IntSpinDialog("Undo Limit: ", " commands")
+        self._undoLimit.spinBox.setSpecialValueText("No Undo Limit")     # Shown at the minimum, 0
+        self._undoLimit.spinBox.setMaximum(100000)
+        self._undoLimit.spinBox.setValue(self.undoLimit())
+        self._undoLimit.accepted.connect(lambda: self.setUndoLimit(self._undoLimit.spinBox.value()))
                 
     def __setstate__(self, data):
         super().__setstate__(data)
@@ -43,6 +49,7 @@ class GraphEditor(Editor):
         self.scene().dragStarted.connect(lambda objs, point: self.setDragMode(self.NoDrag))
         self.scene().dragEnded.connect(lambda objs, point: self.setDragMode(self.RubberBandDrag))
         self.scene().itemsPlaced.connect(self.sceneItemsPlaced)
+        self.scene().itemsMoved.connect(self.sceneItemsMoved)
         self.scene().setContextMenu(self.buildSceneContextMenu())
         self._gridSpacing.spinBox.valueChanged.connect(self.scene().setGridSize)
         self._gridSpacing.spinBox.setValue(self.scene().gridSizeX())
@@ -51,6 +58,9 @@ class GraphEditor(Editor):
     def nodes(self):
         return self._nodes
     
+    def arrows(self):
+        return self._arrows
+    
     def setNodes(self, nodes):
         self._nodes = nodes
         for node in nodes:
@@ -147,7 +157,7 @@ class GraphEditor(Editor):
         ctrl_pts[-1].mouseDragBegan.connect(lambda pos: self.arrowExtremityAboutToChange(arr, pos, is_start=False))
         ctrl_pts[0].mouseDragEnded.connect(lambda pos: self.arrowExtremityHasChanged(arr, pos, is_start=True))
         ctrl_pts[-1].mouseDragEnded.connect(lambda pos: self.arrowExtremityHasChanged(arr, pos, is_start=False))        
-        arr.setContextMenu(self.buildArrowContextMenu(arr))
+        arr.setContextMenu(lambda: self.buildArrowContextMenu(arr))
         #arr.changed.connect(lambda prevstate: self.itemStateChanged(arr, prevstate))
     
     def setupNodeConnections(self, node):
@@ -216,6 +226,7 @@ class GraphEditor(Editor):
         action.setChecked(self.scene().gridEnabled())
         action = menu.addAction("Grid Spacing").triggered.connect(self._gridSpacing.exec_)
         action = menu.addAction("Pick Grid Origin").triggered.connect(lambda b: self.scene().setPickGridOrigin(True))
+        action = menu.addAction("Undo Limit").triggered.connect(self._undoLimit.exec_)
         return menu
     
     def itemSelectionChanged(self):
@@ -236,6 +247,26 @@ class GraphEditor(Editor):
     def sceneItemsPlaced(self, items):
         raise NotImplementedError
     
+    def sceneItemsMoved(self, items, old_pos):
+        # Items have already moved, so the commands skip their first redo
+        moved = [];  start = []
+        arrows = {}
+        for item, pos in zip(items, old_pos):
+            if isinstance(item, ControlPoint):
+                arr = item.parentItem()
+                if isinstance(arr, GraphArrow) and item is not arr.fromPoint() and item is not arr.toPoint():
+                    arrows.setdefault(arr, {})[item] = pos
+            else:
+                moved.append(item)
+                start.append(pos)
+        if moved:
+            text = "Move " + (str(moved[0]) if len(moved) == 1 else str(len(moved)) + " items")
+            self.pushCommand(MoveItemsCommand(text, moved, start, [item.pos() for item in moved], self, skip1st=True))
+        for arr, points in arrows.items():
+            new_pos = [point.pos() for point in arr.controlPoints()]
+            old_list = [points.get(point, point.pos()) for point in arr.controlPoints()]
+            self.pushCommand(ControlPointDragCommand("Drag control points of " + str(arr), arr, old_list, new_pos, self, skip1st=True))
+        
     def sceneBackgroundDoubleClicked(self, pos):
         item = self.scene().itemAt(pos, QTransform())
         if item:
@@ -0,0 +1,275 @@
+from array import array
+from collections import deque
+
+# Adjacency index of a CategoryDiagram, kept apart from the Qt items so graph algorithms
+# never read or write flags on them.  Objects and morphisms get dense int ids (0 .. n - 1);
+# removing one moves the last id into its place, so ids are only stable between edits.
+# Edge end points live in flat arrays and each node keeps lists of its out / in edge ids,
+# all updated in O(degree) per edit.  Traversals read a CSR snapshot (offsets plus edge and
+# neighbour arrays) that is compiled on first use after an edit, and mark what they visit
+# in a local bytearray.  Morphisms whose domain or codomain isn't an object of the diagram
+# are held aside as dangling until their end points are.
+
+class GraphIndex:
+    def __init__(self):
+        self._nodeOf = {}       # object uid -> node id
+        self._nodes = []        # node id -> object
+        self._out = []          # node id -> [edge id]
+        self._in = []
+        self._edgeOf = {}       # morphism uid -> edge id
+        self._edges = []        # edge id -> morphism
+        self._src = array('l')  # edge id -> node id
+        self._dst = array('l')
+        self._dangling = {}     # morphism uid -> morphism
+        self._csr = None
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def clear(self):
+        self._nodeOf.clear()
+        self._nodes.clear()
+        self._out.clear()
+        self._in.clear()
+        self._edgeOf.clear()
+        self._edges.clear()
+        self._src = array('l')
+        self._dst = array('l')
+        self._dangling.clear()
+        self._csr = None
+
+    def nodeCount(self):
+        return len(self._nodes)
+
+    def edgeCount(self):
+        return len(self._edges)
+
+    def nodeId(self, obj):
+        return self._nodeOf.get(obj.uid())
+
+    def edgeId(self, arr):
+        return self._edgeOf.get(arr.uid())
+
+    def node(self, n):
+        return self._nodes[n]
+
+    def edge(self, e):
+        return self._edges[e]
+
+    def source(self, e):
+        return self._src[e]
+
+    def target(self, e):
+        return self._dst[e]
+
+    def danglingMorphisms(self):
+        return list(self._dangling.values())
+
+    def addObject(self, obj):
+        uid = obj.uid()
+        if uid not in self._nodeOf:
+            self._nodeOf[uid] = len(self._nodes)
+            self._nodes.append(obj)
+            self._out.append([])
+            self._in.append([])
+            self._csr = None
+            for arr in [arr for arr in self._dangling.values() if obj in (arr.domain(), arr.codomain())]:
+                self.updateMorphism(arr)
+
+    def removeObject(self, obj):
+        n = self._nodeOf.pop(obj.uid(), None)
+        if n is None:
+            return
+        for arr in {self._edges[e] for e in self._out[n] + self._in[n]}:
+            self._removeEdge(self._edgeOf[arr.uid()])
+            self._dangling[arr.uid()] = arr
+        last = len(self._nodes) - 1
+        if n != last:
+            moved = self._nodes[last]
+            self._nodes[n] = moved
+            self._out[n] = self._out[last]
+            self._in[n] = self._in[last]
+            self._nodeOf[moved.uid()] = n
+            for e in self._out[n]:
+                self._src[e] = n
+            for e in self._in[n]:
+                self._dst[e] = n
+        self._nodes.pop()
+        self._out.pop()
+        self._in.pop()
+        self._csr = None
+
+    def addMorphism(self, arr):
+        self.updateMorphism(arr)
+
+    def removeMorphism(self, arr):
+        uid = arr.uid()
+        self._dangling.pop(uid, None)
+        e = self._edgeOf.get(uid)
+        if e is not None:
+            self._removeEdge(e)
+
+    def updateMorphism(self, arr):
+        # Re-files arr under its current domain and codomain
+        uid = arr.uid()
+        dom = arr.domain()
+        cod = arr.codomain()
+        x = None if dom is None else self._nodeOf.get(dom.uid())
+        y = None if cod is None else self._nodeOf.get(cod.uid())
+        e = self._edgeOf.get(uid)
+        if e is not None:
+            if self._src[e] == x and self._dst[e] == y:
+                return
+            self._removeEdge(e)
+        if x is None or y is None:
+            self._dangling[uid] = arr
+            return
+        self._dangling.pop(uid, None)
+        e = len(self._edges)
+        self._edgeOf[uid] = e
+        self._edges.append(arr)
+        self._src.append(x)
+        self._dst.append(y)
+        self._out[x].append(e)
+        self._in[y].append(e)
+        self._csr = None
+
+    def _removeEdge(self, e):
+        arr = self._edges[e]
+        del self._edgeOf[arr.uid()]
+        self._out[self._src[e]].remove(e)
+        self._in[self._dst[e]].remove(e)
+        last = len(self._edges) - 1
+        if e != last:
+            moved = self._edges[last]
+            x = self._src[last]
+            y = self._dst[last]
+            self._edges[e] = moved
+            self._src[e] = x
+            self._dst[e] = y
+            self._edgeOf[moved.uid()] = e
+            out = self._out[x]
+            out[out.index(last)] = e
+            inc = self._in[y]
+            inc[inc.index(last)] = e
+        self._edges.pop()
+        self._src.pop()
+        self._dst.pop()
+        self._csr = None
+
+    def outgoing(self, obj):
+        # Dangling morphisms count too, as long as their domain is obj
+        n = self._nodeOf.get(obj.uid())
+        if n is None:
+            return []
+        arrows = [self._edges[e] for e in self._out[n]]
+        if self._dangling:
+            arrows += [arr for arr in self._dangling.values() if arr.domain() is obj]
+        return arrows
+
+    def incoming(self, obj):
+        # Dangling morphisms count too, as long as their codomain is obj
+        n = self._nodeOf.get(obj.uid())
+        if n is None:
+            return []
+        arrows = [self._edges[e] for e in self._in[n]]
+        if self._dangling:
+            arrows += [arr for arr in self._dangling.values() if arr.codomain() is obj]
+        return arrows
+
+    def csr(self):
+        # (out offsets, out edge ids, out targets, in offsets, in edge ids, in sources); node n's
+        # out edges are out edge ids[out offsets[n] : out offsets[n + 1]]
+        if self._csr is None:
+            self._csr = self._compile(self._out, self._dst) + self._compile(self._in, self._src)
+        return self._csr
+
+    @staticmethod
+    def _compile(lists, ends):
+        offsets = array('l', [0])
+        edges = array('l')
+        for es in lists:
+            edges.extend(es)
+            offsets.append(len(edges))
+        return offsets, edges, array('l', [ends[e] for e in edges])
+
+    def reachableIds(self, starts, max_depth=None, reverse=False):
+        # Breadth first from the node ids starts, following edges backward if reverse; returns
+        # {node id: depth in arrows}
+        csr = self.csr()
+        offsets, edges, ends = csr[3:] if reverse else csr[:3]
+        visited = bytearray(len(self._nodes))
+        depth = {}
+        queue = deque()
+        for n in starts:
+            if not visited[n]:
+                visited[n] = 1
+                depth[n] = 0
+                queue.append(n)
+        while queue:
+            n = queue.popleft()
+            d = depth[n] + 1
+            if max_depth is not None and d > max_depth:
+                continue
+            for k in range(offsets[n], offsets[n + 1]):
+                m = ends[k]
+                if not visited[m]:
+                    visited[m] = 1
+                    depth[m] = d
+                    queue.append(m)
+        return depth
+
+    def reachable(self, objects, max_depth=None, reverse=False):
+        starts = [self._nodeOf[obj.uid()] for obj in objects if obj.uid() in self._nodeOf]
+        return [self._nodes[n] for n in self.reachableIds(starts, max_depth, reverse)]
+
+    def shortestPath(self, source, target):
+        # Fewest morphisms leading from source to target, in the order followed; None if there's no path
+        x = self._nodeOf.get(source.uid())
+        y = self._nodeOf.get(target.uid())
+        if x is None or y is None:
+            return None
+        if x == y:
+            return []
+        offsets, edges, ends = self.csr()[:3]
+        visited = bytearray(len(self._nodes))
+        via = {}        # node id -> edge id it was first reached by
+        visited[x] = 1
+        queue = deque([x])
+        while queue:
+            n = queue.popleft()
+            for k in range(offsets[n], offsets[n + 1]):
+                m = ends[k]
+                if not visited[m]:
+                    visited[m] = 1
+                    via[m] = edges[k]
+                    if m == y:
+                        path = []
+                        while m != x:
+                            e = via[m]
+                            path.append(self._edges[e])
+                            m = self._src[e]
+                        path.reverse()
+                        return path
+                    queue.append(m)
+        return None
+
+    def topologicalOrder(self):
+        # Objects ordered so every morphism points forward, or None when the diagram has a cycle
+        offsets, edges, ends = self.csr()[:3]
+        indegree = array('l', [0]) * len(self._nodes)
+        for m in ends:
+            indegree[m] += 1
+        queue = deque(n for n in range(len(self._nodes)) if indegree[n] == 0)
+        order = []
+        while queue:
+            n = queue.popleft()
+            order.append(self._nodes[n])
+            for k in range(offsets[n], offsets[n + 1]):
+                m = ends[k]
+                indegree[m] -= 1
+                if indegree[m] == 0:
+                    queue.append(m)
+        if len(order) < len(self._nodes):
+            return None
+        return order
@@ -3,10 +3,11 @@ from geom_tools import minBoundingRect
 from PyQt5.QtCore import QRectF, QPointF, Qt, QEvent, pyqtSignal
 from qt_tools import unpickleGfxItemFlags, unpickleRenderHints, SimpleBrush, Pen, setPenColor
 from PyQt5.QtGui import QPainter, QTransform, QPen, QBrush, QColor
-from geom_tools import paintSelectionShape, rectToPoly, mag2D, closestRectPoint, closestPolyPoint, polygonFromArc
+from geom_tools import paintSelectionShape, rectToPoly, mag2D, closestRoundedRectPoint, closestRoundedRectPoints
 from text_item import TextItem
-from gfx_object import GfxObject
+from gfx_object import GfxObject, ArrowlessCopy
 from labeled_gfx import LabeledGfx
+from arrow_layout import updateArrowPositions
 from copy import deepcopy
 
 class GraphNode(GfxObject, LabeledGfx):
@@ -21,6 +22,8 @@ class GraphNode(GfxObject, LabeledGfx):
         super().__init__(new)
         self._contextMenu = None
         self._shape = self.RoundedRect
+        self._brushColorDlg = None      # Color dialogs are built the first time they're asked for
+        self._penColorDlg = None
         if new:
             self._insetPadding = self.DefaultInsetPadding
             self._defaultRect = self.DefaultRect
@@ -56,18 +59,23 @@ class GraphNode(GfxObject, LabeledGfx):
         data["bound scale"] = self._boundScale
         return data
         
+    # A plain deepcopy copies the node's arrows too, and with them every node they reach.  A memo
+    # holding ArrowlessCopy (functor images, see Functor.__call__) copies just the node: its arrows
+    # are left out, and an arrow copied later with the same memo attaches itself to the copies of
+    # its end points, so each image costs the same whatever the graph's shape.
     def __deepcopy__(self, memo):
         copy = deepcopy(super(), memo)
         memo[id(self)] = copy
         copy._shape = self._shape
-        copy._defaultRect = QRectF(self._defaultRect)
+        copy._defaultRect = self._defaultRect       # Replaced, never changed in place, so it's shared
         copy._insetPadding = self._insetPadding
         copy._cornerRadius = self._cornerRadius
-        copy._arrows = deepcopy(self._arrows, memo)
-        #for arr in copy._arrows:
-            #assert(arr.toNode() is self or arr.fromNode() is self)
-        copy._boundScale = tuple(self._boundScale)
-        copy._brush = deepcopy(self._brush, memo)
+        if memo.get(ArrowlessCopy):
+            copy._arrows = []
+        else:
+            copy._arrows = deepcopy(self._arrows, memo)
+        copy._boundScale = self._boundScale
+        copy._brush = self._brush
         copy.setupConnections()
         return copy        
 
@@ -95,12 +103,20 @@ class GraphNode(GfxObject, LabeledGfx):
     
     def setupConnections(self):
         self.setFlags(self.ItemIsMovable | self.ItemIsFocusable | self.ItemIsSelectable | self.ItemSendsGeometryChanges)
-        self._brushColorDlg = QColorDialog(self.brush().color())
-        self._brushColorDlg.setOption(QColorDialog.ShowAlphaChannel, True)
-        self._brushColorDlg.currentColorChanged.connect(lambda col: self.setBrush(SimpleBrush(col)))
-        self._penColorDlg = QColorDialog(self.pen().color())
-        self._penColorDlg.setOption(QColorDialog.ShowAlphaChannel, True)
-        self._penColorDlg.currentColorChanged.connect(lambda col: self.setPen(setPenColor(self.pen(), col)))        
+        
+    def brushColorDialog(self):
+        if self._brushColorDlg is None:
+            self._brushColorDlg = QColorDialog(self.brush().color())
+            self._brushColorDlg.setOption(QColorDialog.ShowAlphaChannel, True)
+            self._brushColorDlg.currentColorChanged.connect(lambda col: self.setBrush(SimpleBrush(col)))
+        return self._brushColorDlg
+    
+    def penColorDialog(self):
+        if self._penColorDlg is None:
+            self._penColorDlg = QColorDialog(self.pen().color())
+            self._penColorDlg.setOption(QColorDialog.ShowAlphaChannel, True)
+            self._penColorDlg.currentColorChanged.connect(lambda col: self.setPen(setPenColor(self.pen(), col)))        
+        return self._penColorDlg
       
     def itemChange(self, change, value):
         if change == self.ItemPositionChange:
@@ -177,41 +193,16 @@ class GraphNode(GfxObject, LabeledGfx):
         child.setPos(child.pos() + delta)
 
     def closestBoundaryPos(self, pos):
-        rect = self.boundingRect()
-        #s = self._boundScale
-        #T = QTransform.fromScale(1/s[0], 1/s[1])
-        #rect = T.mapRect(rect)
-        if pos.x() < rect.left():
-            x = rect.left()
-        elif pos.x() > rect.right():
-            x = rect.right()
-        else:
-            x = pos.x()
-        if pos.y() < rect.top():
-            y = rect.top()
-        elif pos.y() > rect.bottom():
-            y = rect.bottom()
-        else:
-            y = pos.y()
-        rect_point = QPointF(x, y)
-        r = self.cornerRadius()
-        poly = None
-        if mag2D(rect_point - rect.bottomRight()) <= r:
-            poly = polygonFromArc(rect.bottomRight() + QPointF(-r, -r), r, 0, 90, seg=30)
-        elif mag2D(rect_point - rect.topRight()) <= r:
-            poly = polygonFromArc(rect.topRight() + QPointF(-r, r), r, 270, 360, seg=30)
-        elif mag2D(rect_point - rect.topLeft()) <= r:
-            poly = polygonFromArc(rect.topLeft() + QPointF(r, r), r, 180, 270, seg=30)
-        elif mag2D(rect_point - rect.bottomLeft()) <= r:
-            poly = polygonFromArc(rect.bottomLeft() + QPointF(r, -r), r, 90, 180, seg=30)
-        if poly is None:
-            return rect_point
-        else:
-            return closestPolyPoint(poly, pos)[0]
+        return closestRoundedRectPoint(self.boundingRect(), self.cornerRadius(), pos)
+    
+    def closestBoundaryPositions(self, points):
+        return closestRoundedRectPoints(self.boundingRect(), self.cornerRadius(), points)
     
     def updateArrows(self):
-        for arr in self._arrows:
-            arr.updatePosition()
+        if self.scene():
+            self.scene().scheduleArrowLayout(self._arrows)
+        else:
+            updateArrowPositions(self._arrows)
                 
     def updateArrowsAndClearResidual(self):
         self.updateArrows()
@@ -226,8 +217,8 @@ class GraphNode(GfxObject, LabeledGfx):
         if menu is None:
             menu = QMenu()
         col_menu = menu.addMenu("Color")
-        col_menu.addAction("Brush").triggered.connect(lambda: self._brushColorDlg.exec_())
-        col_menu.addAction("Pen").triggered.connect(lambda: self._penColorDlg.exec_())
+        col_menu.addAction("Brush").triggered.connect(lambda: self.brushColorDialog().exec_())
+        col_menu.addAction("Pen").triggered.connect(lambda: self.penColorDialog().exec_())
         return menu
     
     def setContextMenu(self, menu):
@@ -238,7 +229,8 @@ class GraphNode(GfxObject, LabeledGfx):
     
     def setBrush(self, brush):
         self._brush = brush
-        self._brushColorDlg.setCurrentColor(brush.color())
+        if self._brushColorDlg:
+            self._brushColorDlg.setCurrentColor(brush.color())
         self.update()
     
     def pen(self):  
@@ -246,7 +238,8 @@ class GraphNode(GfxObject, LabeledGfx):
     
     def setPen(self, pen):
         self._pen = pen
-        self._penColorDlg.setCurrentColor(pen.color())
+        if self._penColorDlg:
+            self._penColorDlg.setCurrentColor(pen.color())
         self.update()
         
     def saveTextPosition(self):
@@ -1,9 +1,12 @@
 from PyQt5.QtWidgets import QGraphicsScene, QGraphicsObject
-from PyQt5.QtGui import QColor, QBrush, QTransform, QPainter, QPen
-from PyQt5.QtCore import pyqtSignal, QPointF, QLineF, Qt
+from PyQt5.QtGui import QColor, QBrush, QTransform, QPainter, QPen, QPolygonF
+from PyQt5.QtCore import pyqtSignal, QPointF, QLineF, Qt, QTimer
 from graph_arrow import GraphArrow
 from control_point import ControlPoint
 from qt_tools import simpleMaxContrastingColor
+from arrow_layout import updateArrowPositions
+from deadline_scheduler import DeadlineScheduler
+from math import ceil, log2
 
 class GraphScene(QGraphicsScene):
     backgroundDoubleClicked = pyqtSignal(QPointF)
@@ -12,11 +15,17 @@ class GraphScene(QGraphicsScene):
     dragEnded = pyqtSignal(list, QPointF)
     backgroundColorChanged = pyqtSignal(QColor)
     itemsPlaced = pyqtSignal(list)
+    itemsMoved = pyqtSignal(list, list)     # items, their positions when the mouse was pressed
+    GridTileCells = 64          # Grid points per tile side
+    MinGridDotSpacing = 4       # Screen pixels; denser grids are thinned
     
     def __init__(self, new=True):
         super().__init__()
+        self._gridTiles = {}    # (spacing x, spacing y) -> QPolygonF
+        self._gridPen = None
         self._placeItems = None
         self._moveItems = None
+        self._pressPositions = None
         self._contextMenu = None
         if new:
             self.setBackgroundBrush(QBrush(QColor(150,150,150)))
@@ -28,6 +37,12 @@ class GraphScene(QGraphicsScene):
             self._editor = None
         self._placing = False
         self._menuEventPos = QPointF()
+        self._dirtyArrows = {}
+        self._layoutTimer = QTimer()
+        self._layoutTimer.setSingleShot(True)
+        self._layoutTimer.setInterval(0)
+        self._layoutTimer.timeout.connect(self.flushArrowLayout)
+        self._hoverDeadlines = DeadlineScheduler()
             
     def setEditor(self, editor):
         self._editor = editor
@@ -69,7 +84,7 @@ class GraphScene(QGraphicsScene):
     def mousePressEvent(self, event):
         if self._pickGridOrigin:
             self._gridOrigin = event.scenePos()
-            self.update()
+            self.invalidateGrid()
             self._pickGridOrigin = False
             return
         if not self._placeItems:
@@ -91,6 +106,8 @@ class GraphScene(QGraphicsScene):
                         item.mouseDragEnded.emit(pos)
                 self._moveItems = None
         super().mousePressEvent(event)
+        if not self._placing:
+            self._pressPositions = [(item, item.pos()) for item in self.selectedItems() if item.flags() & item.ItemIsMovable]
 
     def mouseReleaseEvent(self, event):
         if self._moveItems:
@@ -104,6 +121,11 @@ class GraphScene(QGraphicsScene):
                 self._placing = False
             self._moveItems = None                  
         super().mouseReleaseEvent(event)
+        if self._pressPositions:
+            moved = [(item, pos) for item, pos in self._pressPositions if item.scene() is self and item.pos() != pos]
+            self._pressPositions = None
+            if moved:
+                self.itemsMoved.emit([item for item, pos in moved], [pos for item, pos in moved])
         
     def mouseMoveEvent(self, event):
         if self._placeItems:
@@ -138,38 +160,73 @@ class GraphScene(QGraphicsScene):
         super().drawBackground(painter, rect)
         if self._gridEnabled:
             painter.setRenderHints(QPainter.Antialiasing)
-            painter.setPen(QPen(simpleMaxContrastingColor(self.backgroundBrush().color()), 0.4))
-            points = []                 # Adding to a list and then drawing is much faster
+            if self._gridPen is None:
+                self._gridPen = QPen(simpleMaxContrastingColor(self.backgroundBrush().color()), 0.4)
+            painter.setPen(self._gridPen)
+            step = self.gridLevelOfDetail(painter.worldTransform())
+            sx = self._gridSizeX * step
+            sy = self._gridSizeY * step
+            tile = self.gridTile(sx, sy)
+            w = sx * self.GridTileCells
+            h = sy * self.GridTileCells
             o = self._gridOrigin
-            ox = o.x() % self._gridSizeX
-            oy = o.y() % self._gridSizeY
-            left = int(rect.left()) - (int(rect.left()) % self._gridSizeX)
-            top = int(rect.top()) - (int(rect.top()) % self._gridSizeY)
-            for x in range(left, int(rect.right()), self._gridSizeX):
-                for y in range(top, int(rect.bottom()), self._gridSizeY):
-                    points.append(QPointF(x + ox, y + oy))
-            if points:
-                painter.drawPoints(*points)
+            ox = o.x() % sx
+            oy = o.y() % sy
+            left = int(rect.left()) - (int(rect.left()) % w)
+            top = int(rect.top()) - (int(rect.top()) % h)
+            for x in range(left - w, int(rect.right()) + 1, w):
+                if x + ox + w < rect.left():
+                    continue
+                for y in range(top - h, int(rect.bottom()) + 1, h):
+                    if y + oy + h < rect.top():
+                        continue
+                    painter.translate(x + ox, y + oy)
+                    painter.drawPoints(tile)
+                    painter.translate(-x - ox, -y - oy)
             # Draw grid origin
             painter.drawLine(QLineF(o.x(), o.y() - 20, o.x(), o.y() + 20))
             painter.drawLine(QLineF(o.x() - 20, o.y(), o.x() + 20, o.y()))    
             
+    def gridLevelOfDetail(self, transform):
+        # Power of two multiple of the grid spacing that keeps dots at least MinGridDotSpacing apart on screen
+        scale = min(abs(transform.m11()) + abs(transform.m21()), abs(transform.m12()) + abs(transform.m22()))
+        spacing = min(self._gridSizeX, self._gridSizeY) * scale
+        if spacing <= 0:
+            return 1
+        if spacing >= self.MinGridDotSpacing:
+            return 1
+        return 2 ** ceil(log2(self.MinGridDotSpacing / spacing))
+            
+    def gridTile(self, sx, sy):
+        key = (sx, sy)
+        tile = self._gridTiles.get(key)
+        if tile is None:
+            n = self.GridTileCells
+            tile = QPolygonF([QPointF(i * sx, j * sy) for i in range(n) for j in range(n)])
+            self._gridTiles[key] = tile
+        return tile
+    
+    def invalidateGrid(self):
+        self._gridTiles.clear()
+        self._gridPen = None
+        self.update()
+            
     def setXGridSize(self, size):
         self._gridSizeX = size
-        self.update()
+        self.invalidateGrid()
         
     def setYGridSize(self, size):
         self._gridSizeY = size
-        self.update()
+        self.invalidateGrid()
         
     def setGridSize(self, size):
         self._gridSizeX = size
         self._gridSizeY = size
-        self.update()
+        self.invalidateGrid()
         
     def setGridEnabled(self, enable):
         self._gridEnabled = enable
-        self.update()
+        self.invalidateGrid()
         
     def gridEnabled(self):
         return self._gridEnabled
@@ -186,12 +243,38 @@ class GraphScene(QGraphicsScene):
     def gridOrigin(self):
         return self._gridOrigin    
     
+    def setGridOrigin(self, pos):
+        self._gridOrigin = pos
+        self.invalidateGrid()
+    
     def setBackgroundBrush(self, brush):
         super().setBackgroundBrush(brush)
+        self.invalidateGrid()
         self.backgroundColorChanged.emit(brush.color())
         
+    def hoverDeadlines(self):
+        return self._hoverDeadlines
+        
+    def scheduleArrowLayout(self, arrows):
+        # Arrows marked here are recomputed once, the next time control returns to the event loop
+        if not isinstance(arrows, list):
+            arrows = [arrows]
+        for arr in arrows:
+            self._dirtyArrows[id(arr)] = arr
+        if self._dirtyArrows and not self._layoutTimer.isActive():
+            self._layoutTimer.start()
+            
+    def isArrowLayoutPending(self):
+        return bool(self._dirtyArrows)
+            
+    def flushArrowLayout(self):
+        self._layoutTimer.stop()
+        if self._dirtyArrows:
+            arrows = [arr for arr in self._dirtyArrows.values() if arr.scene() is self]
+            self._dirtyArrows = {}
+            updateArrowPositions(arrows)
+            self.update()
+        
     def updateAllArrows(self):
-        for item in self.items():
-            if isinstance(item, GraphArrow):
-                item.updatePosition()
+        updateArrowPositions([item for item in self.items() if isinstance(item, GraphArrow)])
         self.update()
\ No newline at end of file
@@ -0,0 +1,183 @@
+from time import perf_counter_ns
+from functools import wraps
+import random
+import sys
+
+# Optional timing of the hot rendering and layout calls.  Enabling wraps the listed methods on
+# the item classes (and the module level helpers, wherever they were imported by name) with a
+# timer; disabling puts the originals back, so nothing is paid while it's off.  Each call is
+# recorded under "ItemClass.method" of the instance's own class, and nested calls build up
+# stacks whose self times export as folded stacks (flamegraph.pl, speedscope, inferno).
+
+Methods = ("paint", "boundingRect", "shape", "updatePosition")
+SceneMethods = ("drawBackground",)
+Functions = (("geom_tools", "paintSelectionShape"), ("arrow_layout", "updateArrowPositions"))
+
+
+def _itemClasses():
+    from gfx_object import GfxObject
+    from graph_node import GraphNode
+    from graph_arrow import GraphArrow
+    from category_object import CategoryObject
+    from category_diagram import CategoryDiagram
+    from category_arrow import CategoryArrow
+    from functor import Functor
+    from control_point import ControlPoint
+    from text_item import TextItem
+    from image_gfx_object import ImageGfxObject
+    return (GfxObject, GraphNode, GraphArrow, CategoryObject, CategoryDiagram, CategoryArrow, Functor,
+            ControlPoint, TextItem, ImageGfxObject)
+
+
+class CallStats:
+    SampleLimit = 10000     # Percentiles come from a reservoir sample of this many calls
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0      # nsec
+        self.max = 0
+        self._samples = []
+        self._random = random.Random(0)
+
+    def add(self, elapsed):
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+        if len(self._samples) < self.SampleLimit:
+            self._samples.append(elapsed)
+        else:
+            k = self._random.randrange(self.count)
+            if k < self.SampleLimit:
+                self._samples[k] = elapsed
+
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+    def percentiles(self, *fractions):
+        samples = sorted(self._samples)
+        if not samples:
+            return [0] * len(fractions)
+        return [samples[min(len(samples) - 1, int(f * len(samples)))] for f in fractions]
+
+
+class Profiler:
+    def __init__(self):
+        self._patches = []      # (owner, name, original)
+        self._stats = {}        # "Class.method" -> CallStats
+        self._stack = []        # [frame name, child nsec] of the calls in progress
+        self._folded = {}       # "a;b;c" -> self nsec
+
+    def isEnabled(self):
+        return bool(self._patches)
+
+    def enable(self, classes=None, scene_classes=None):
+        if self._patches:
+            return
+        if classes is None:
+            classes = _itemClasses()
+        if scene_classes is None:
+            from graph_scene import GraphScene
+            scene_classes = (GraphScene,)
+        for cls in classes:
+            for name in Methods:
+                self._patchMethod(cls, name)
+        for cls in scene_classes:
+            for name in SceneMethods:
+                self._patchMethod(cls, name)
+        for module_name, name in Functions:
+            self._patchFunction(module_name, name)
+
+    def disable(self):
+        for owner, name, original in reversed(self._patches):
+            setattr(owner, name, original)
+        self._patches.clear()
+        self._stack.clear()
+
+    def setEnabled(self, enabled):
+        if enabled:
+            self.enable()
+        else:
+            self.disable()
+
+    def reset(self):
+        self._stats.clear()
+        self._folded.clear()
+
+    def stats(self):
+        return self._stats
+
+    def _patchMethod(self, cls, name):
+        original = cls.__dict__.get(name)
+        if original is None:
+            return      # Inherited; the defining class gets wrapped instead
+        profiler = self
+
+        @wraps(original)
+        def timed(item, *args, **kwargs):
+            return profiler._call(type(item).__name__ + "." + name, original, item, *args, **kwargs)
+        setattr(cls, name, timed)
+        self._patches.append((cls, name, original))
+
+    def _patchFunction(self, module_name, name):
+        module = sys.modules.get(module_name) or __import__(module_name)
+        original = getattr(module, name)
+        frame = module_name + "." + name
+        profiler = self
+
+        @wraps(original)
+        def timed(*args, **kwargs):
+            return profiler._call(frame, original, *args, **kwargs)
+        # Modules that did "from module import name" hold their own reference
+        for other in list(sys.modules.values()):
+            if getattr(other, name, None) is original:
+                setattr(other, name, timed)
+                self._patches.append((other, name, original))
+
+    def _call(self, frame, func, *args, **kwargs):
+        stack = self._stack
+        entry = [frame, 0]
+        stack.append(entry)
+        start = perf_counter_ns()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = perf_counter_ns() - start
+            stack.pop()
+            stats = self._stats.get(frame)
+            if stats is None:
+                stats = self._stats[frame] = CallStats()
+            stats.add(elapsed)
+            key = ";".join(e[0] for e in stack) + ";" + frame if stack else frame
+            self._folded[key] = self._folded.get(key, 0) + elapsed - entry[1]
+            if stack:
+                stack[-1][1] += elapsed
+
+    def rows(self):
+        # (class, method, count, total msec, mean usec, p50, p90, p99, max usec), slowest first
+        rows = []
+        for frame, stats in self._stats.items():
+            owner, sep, method = frame.rpartition(".")
+            p50, p90, p99 = stats.percentiles(0.5, 0.9, 0.99)
+            rows.append((owner, method, stats.count, stats.total / 1e6, stats.mean() / 1e3,
+                         p50 / 1e3, p90 / 1e3, p99 / 1e3, stats.max / 1e3))
+        rows.sort(key=lambda row: row[3], reverse=True)
+        return rows
+
+    def foldedStacks(self):
+        # One "frame;frame;frame value" line per stack, value in usec of self time
+        return ["{} {}".format(key, int(round(value / 1e3))) for key, value in sorted(self._folded.items())]
+
+    def exportFolded(self, path):
+        with open(path, "w") as file:
+            for line in self.foldedStacks():
+                file.write(line + "\n")
+
+
+_profiler = None
+
+def profiler():
+    global _profiler
+    if _profiler is None:
+        _profiler = Profiler()
+    return _profiler
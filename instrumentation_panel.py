@@ -0,0 +1,62 @@
+from ui_instrumentation_panel import Ui_InstrumentationPanel
+from PyQt5.QtWidgets import QDockWidget, QTableWidgetItem, QFileDialog
+from PyQt5.QtCore import Qt, QTimer
+from instrumentation import profiler
+
+class _NumberItem(QTableWidgetItem):
+    def __init__(self, value, fmt):
+        super().__init__(fmt.format(value))
+        self._value = value
+        self.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        
+    def __lt__(self, other):
+        return self._value < other._value
+    
+
+class InstrumentationPanel(QDockWidget, Ui_InstrumentationPanel):
+    RefreshInterval = 1000      # msec
+    
+    def __init__(self):
+        super().__init__()
+        self.setupUi(self)
+        self._profiler = profiler()
+        self._refreshTimer = QTimer()
+        self._refreshTimer.setInterval(self.RefreshInterval)
+        self._refreshTimer.timeout.connect(self.refresh)
+        self.recordCheckBox.toggled.connect(self.setRecording)
+        self.resetButton.clicked.connect(lambda b: self.reset())
+        self.exportButton.clicked.connect(lambda b: self.exportStacks())
+        
+    def setRecording(self, record):
+        self._profiler.setEnabled(record)
+        if record:
+            self._refreshTimer.start()
+        else:
+            self._refreshTimer.stop()
+            self.refresh()
+            
+    def reset(self):
+        self._profiler.reset()
+        self.refresh()
+        
+    def refresh(self):
+        if not self.isVisible():
+            return
+        table = self.statsTable
+        table.setSortingEnabled(False)
+        rows = self._profiler.rows()
+        table.setRowCount(len(rows))
+        for r, row in enumerate(rows):
+            table.setItem(r, 0, QTableWidgetItem(row[0]))
+            table.setItem(r, 1, QTableWidgetItem(row[1]))
+            table.setItem(r, 2, _NumberItem(row[2], "{}"))
+            table.setItem(r, 3, _NumberItem(row[3], "{:.2f}"))
+            for c in range(4, 9):
+                table.setItem(r, c, _NumberItem(row[c], "{:.1f}"))
+        table.setSortingEnabled(True)
+        
+    def exportStacks(self, path=None):
+        if path is None:
+            path, filter = QFileDialog.getSaveFileName(self, "Export Folded Stacks", "paint.folded", "Folded stacks (*.folded *.txt)")
+        if path:
+            self._profiler.exportFolded(path)
@@ -0,0 +1,284 @@
+import re
+
+# Interned morphism labels.  A label is parsed once into a small term DAG: atoms, functor
+# applications and composites, with every term hash-consed, so two equal terms are the same
+# object.  Equality is then `is`, composing two terms or applying a functor to one is a memo
+# lookup, and a term's text is rendered only when asked for.  Composites are kept flat and
+# without identities; a functor applied to a composite stays as written (F(g∘f)) but counts as
+# F(g)∘F(f) in its normal form, which is what commutativity compares, or as F(f)∘F(g) when F is
+# contravariant.  Functors are named by a template with "." for the argument: "F(.)" for a plain
+# name F, ".^op" for the opposite, which is always contravariant.  Other templates are
+# contravariant while a functor registers them so (see setContravariantTemplate).
+# Terms survive pickling (path_search sends them to worker processes) by re-interning.
+
+CompositionMark = "∘"
+IdentityLabels = ("id", "1")
+
+
+def isIdentityLabel(atom):
+    return atom in IdentityLabels or atom.startswith("id_") or atom.startswith("1_")
+
+
+class Term:
+    __slots__ = ('_text',)
+
+    def __init__(self):
+        self._text = None
+
+    def __str__(self):
+        if self._text is None:
+            self._text = self._render()
+            _parsed.setdefault(self._text, self)
+        return self._text
+
+    def __repr__(self):
+        return type(self).__name__ + "(" + str(self) + ")"
+
+    def factors(self):
+        # Prime terms in composition order, identities dropped
+        return (self,)
+
+    def isIdentity(self):
+        return not self.factors()
+
+    def normal(self):
+        return fromFactors(self.factors())
+
+
+class Identity(Term):
+    __slots__ = ()
+
+    def _render(self):
+        return IdentityLabels[0]
+
+    def factors(self):
+        return ()
+
+    def __reduce__(self):
+        return (identity, ())
+
+
+class Atom(Term):
+    __slots__ = ('_name', '_identity')
+
+    def __init__(self, name):
+        super().__init__()
+        self._name = name
+        self._identity = isIdentityLabel("".join(name.split()))
+
+    def _render(self):
+        return self._name
+
+    def factors(self):
+        if self._identity:
+            return ()
+        return (self,)
+
+    def __reduce__(self):
+        return (atom, (self._name,))
+
+
+class Apply(Term):
+    __slots__ = ('_template', '_arg', '_factors')
+
+    def __init__(self, template, arg):
+        super().__init__()
+        self._template = template
+        self._arg = arg
+        self._factors = None
+
+    def template(self):
+        return self._template
+
+    def argument(self):
+        return self._arg
+
+    def _render(self):
+        arg = str(self._arg)
+        i = self._template.index(".")
+        enclosed = self._template[i - 1:i] == "(" and self._template[i + 1:i + 2] == ")"
+        if isinstance(self._arg, Compose) and not enclosed:
+            arg = "(" + arg + ")"
+        return self._template[:i] + arg + self._template[i + 1:]
+
+    def factors(self):
+        if self._factors is None:
+            fs = self._arg.factors()
+            if len(fs) == 1 and fs[0] is self._arg:
+                self._factors = (self,)
+            else:
+                if self._template in _contravariant:
+                    fs = fs[::-1]
+                self._factors = tuple(apply(self._template, f) for f in fs)
+        return self._factors
+
+    def __reduce__(self):
+        return (apply, (self._template, self._arg))
+
+
+class Compose(Term):
+    __slots__ = ('_factors',)
+
+    def __init__(self, factors):
+        super().__init__()
+        self._factors = factors
+
+    def _render(self):
+        return CompositionMark.join(str(f) for f in self._factors)
+
+    def factors(self):
+        return self._factors
+
+    def __reduce__(self):
+        return (fromFactors, (self._factors,))
+
+
+_identity = Identity()
+_atoms = {}             # name without whitespace -> Atom
+_applies = {}           # (template, argument) -> Apply
+_composites = {}        # factors -> Compose
+_compositions = {}      # (g, f) -> normal form of g∘f
+_parsed = {}            # text -> term
+_contravariant = {".^op" : 1}   # template -> how many times it's been registered contravariant
+_variance = 0           # Bumped whenever a template's variance changes
+
+
+def isContravariantTemplate(template):
+    return template in _contravariant
+
+def setContravariantTemplate(template, contra):
+    # Counted, since several functors can share a template
+    global _variance
+    count = _contravariant.get(template, 0) + (1 if contra else -1)
+    was = template in _contravariant
+    if count > 0:
+        _contravariant[template] = count
+    else:
+        _contravariant.pop(template, None)
+    if was != (template in _contravariant):
+        # Normal forms, and composites parsed from text, depend on the factor order
+        for term in _applies.values():
+            term._factors = None
+        _compositions.clear()
+        _parsed.clear()
+        _variance += 1
+
+def variance():
+    # Terms parsed from text before this last changed may be out of date
+    return _variance
+
+
+def identity():
+    return _identity
+
+def atom(name):
+    name = name.strip()
+    key = "".join(name.split())
+    term = _atoms.get(key)
+    if term is None:
+        term = _atoms[key] = Atom(name)
+    return term
+
+def apply(template, arg):
+    key = (template, arg)
+    term = _applies.get(key)
+    if term is None:
+        term = _applies[key] = Apply(template, arg)
+    return term
+
+def fromFactors(factors):
+    if not factors:
+        return _identity
+    if len(factors) == 1:
+        return factors[0]
+    factors = tuple(factors)
+    term = _composites.get(factors)
+    if term is None:
+        term = _composites[factors] = Compose(factors)
+    return term
+
+def compose(g, f):
+    # Normal form of g∘f
+    key = (g, f)
+    term = _compositions.get(key)
+    if term is None:
+        term = _compositions[key] = fromFactors(g.factors() + f.factors())
+    return term
+
+def functorTemplate(name):
+    if "." in name:
+        return name
+    return name + "(.)"
+
+
+def parse(text):
+    term = _parsed.get(text)
+    if term is None:
+        term = _parsed[text] = _parse(text)
+    return term
+
+def word(text):
+    return parse(text).normal()
+
+def _parse(text):
+    parts = _splitTopLevel(text, CompositionMark)
+    if len(parts) > 1:
+        fs = ()
+        for part in parts:
+            if part.strip():
+                fs += parse(part).factors()
+        return fromFactors(fs)
+    s = text.strip()
+    if not s:
+        return _identity
+    if s.endswith(")"):
+        i = _openingParen(s)
+        if i == 0:
+            return parse(s[1:-1])
+        if i is not None:
+            name = s[:i].strip()
+            if name:
+                return apply(functorTemplate(name), parse(s[i + 1:-1]))
+    j = _lastTopLevel(s, "^")
+    if j is not None and j > 0 and re.fullmatch(r"\w+", s[j + 1:]):
+        return apply(".^" + s[j + 1:], parse(s[:j]))
+    return atom(s)
+
+def _splitTopLevel(text, mark):
+    parts = []
+    depth = 0
+    start = 0
+    for k, c in enumerate(text):
+        if c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        elif c == mark and depth == 0:
+            parts.append(text[start:k])
+            start = k + 1
+    parts.append(text[start:])
+    return parts
+
+def _openingParen(s):
+    # Index of the "(" matching the final ")", or None if unbalanced
+    depth = 0
+    for k in range(len(s) - 1, -1, -1):
+        if s[k] == ")":
+            depth += 1
+        elif s[k] == "(":
+            depth -= 1
+            if depth == 0:
+                return k
+    return None
+
+def _lastTopLevel(s, mark):
+    depth = 0
+    for k in range(len(s) - 1, -1, -1):
+        c = s[k]
+        if c == ")":
+            depth += 1
+        elif c == "(":
+            depth -= 1
+        elif c == mark and depth == 0:
+            return k
+    return None
@@ -1,11 +1,13 @@
 from text_item import TextItem
 from copy import deepcopy
+from label_terms import parse, variance
 
 class LabeledGfx:
     def __init__(self):
         self._labels = []
         self.LabelType = TextItem
         self._textPos = []
+        self._symbolTerm = None         # (symbol, its label term, label_terms.variance()), until the symbol label changes
         
     def addLabel(self, label):
         if isinstance(label, str):
@@ -17,12 +19,19 @@ class LabeledGfx:
         label.setParentItem(self)
         self.saveTextPosition()
         if self.labelCount() == 1:
-            self.connectLabelChanged(label, self.symbolChanged.emit)
+            self._symbolTerm = None
+            self.connectLabelChanged(label, self._symbolLabelChanged)
         return label
+    
+    def _symbolLabelChanged(self, text):
+        self._symbolTerm = None
+        self.symbolChanged.emit(text)
         
     def removeLabel(self, label):
         k = self.labelIndex(label)
         if k != -1:
+            if k == 0:
+                self._symbolTerm = None
             self._labels.pop(k)
             self._textPos.pop(k)
             if self.scene():
@@ -43,6 +52,7 @@ class LabeledGfx:
         if isinstance(label, TextItem):
             label.setPlainText(text)
             if label is self.label(0):
+                self._symbolTerm = None
                 self.symbolChanged.emit(text)
         else:
             raise NotImplementedError
@@ -119,6 +129,20 @@ class LabeledGfx:
     def __str__(self):
         return self.symbol()    
     
+    def cachedSymbol(self):
+        # symbol() as of the symbol label's last change; reading text back out of a label costs
+        # far more than the lookups made with it.  It's parsed again when a functor's variance
+        # changes, since that can reorder the factors of a composite label.
+        if self._symbolTerm is None or self._symbolTerm[2] != variance():
+            text = self.symbol()
+            self._symbolTerm = (text, parse(text) if text.strip() else None, variance())
+        return self._symbolTerm[0]
+    
+    def symbolTerm(self):
+        # The symbol parsed into an interned label term (see label_terms), None if it's blank
+        self.cachedSymbol()
+        return self._symbolTerm[1]
+    
     def setSymbol(self, symbol):
         if self.symbol() != symbol:
             self.setLabelText(0, symbol)
@@ -13,6 +13,8 @@ if __name__ == '__main__':
     app = QApplication([])
 
     main_win = MainWindow(app)
+    if len(sys.argv) > 1:
+        main_win.openProject(sys.argv[1])
     main_win.show()
     
     sys.exit(app.exec_())
\ No newline at end of file
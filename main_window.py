@@ -1,5 +1,5 @@
 from ui_main_window import Ui_MainWindow
-from PyQt5.QtWidgets import QMainWindow, QGraphicsTextItem
+from PyQt5.QtWidgets import QMainWindow, QGraphicsTextItem, QWidget, QFileDialog
 from PyQt5.QtGui import QColor
 from graph_editor import GraphEditor
 from graph_node import GraphNode
@@ -7,6 +7,11 @@ from graph_scene import GraphScene
 from category_diagram_editor import CategoryDiagramEditor
 from PyQt5.QtCore import QPointF, Qt
 from command_timeline import CommandTimeline
+from instrumentation_panel import InstrumentationPanel
+from autosave import Autosave
+from project_file import loadProject
+from uid_allocator import setAllocator
+import os
 
 class MainWindow(QMainWindow, Ui_MainWindow):
     def __init__(self, app, new=True):
@@ -15,24 +20,89 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.setupUi(self)       
         self.commandTimeline = CommandTimeline()
         self.addDockWidget(Qt.RightDockWidgetArea, self.commandTimeline)
+        self.instrumentationPanel = InstrumentationPanel()
+        self.addDockWidget(Qt.RightDockWidgetArea, self.instrumentationPanel)
+        self.tabifyDockWidget(self.commandTimeline, self.instrumentationPanel)
+        self.commandTimeline.raise_()
         self.tabWidget.currentChanged.connect(self.currentTabIndexChanged)
+        self.autosave = Autosave()
+        self.autosave.failed.connect(lambda path, message: self.statusbar.showMessage("Autosave to " + path + " failed: " + message))
+        self._pendingTabs = {}      # Placeholder widget -> project file, loaded when the tab becomes current
         if new: 
             self._editors = {}
             self.addEditor("main")
+        self.actionOpen.triggered.connect(lambda b: self.openProjectDialog())
         self.actionDelete.triggered.connect(lambda b: self.deleteSelectedItems())
         self.actionUndo.triggered.connect(lambda b: self.undoRecentChanges())
         self.actionRedo.triggered.connect(lambda b: self.redoRecentChanges())
         self._app = app
         
+    def closeEvent(self, event):
+        self.autosave.saveAll()
+        self.autosave.stop()
+        super().closeEvent(event)
+        
     def app(self):
         return self._app
         
-    def addEditor(self, symbol):
+    def addEditor(self, symbol, path=None):
+        if path is not None:
+            placeholder = QWidget()
+            self._pendingTabs[placeholder] = path
+            self.tabWidget.addTab(placeholder, symbol)
+            return placeholder
         editor = CategoryDiagramEditor(window=self)
+        self.setupEditor(editor, symbol)       # Before addTab, whose currentChanged wants the undo view
         self.tabWidget.addTab(editor, symbol)
-        self._editors[symbol] = editor
+        return editor
+        
+    def setupEditor(self, editor, symbol):
+        key = symbol
+        count = 1
+        while key in self._editors:         # Tabs can share a name
+            count += 1
+            key = symbol + " (" + str(count) + ")"
+        self._editors[key] = editor
+        setAllocator(editor.uidAllocator())     # Items made from here on belong to the new tab
         editor.setScene(GraphScene())
         editor.setUndoView(self.commandTimeline.addUndoView(editor.undoStack()))
+        self.autosave.watch(editor, key)       # The key names its autosave file too
+        
+    def openProjectDialog(self):
+        directory = QFileDialog.getExistingDirectory(self, "Open Project", self.autosave.directory())
+        if directory:
+            self.openProject(directory)
+        
+    def openProject(self, directory):
+        # One project file per tab; only the first of them is read now, the rest when shown
+        first = None
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(Autosave.Suffix):
+                placeholder = self.addEditor(name[:-len(Autosave.Suffix)], os.path.join(directory, name))
+                if first is None:
+                    first = placeholder
+        if first is not None:
+            index = self.tabWidget.indexOf(first)
+            if index != -1:
+                self.tabWidget.setCurrentIndex(index)
+                if self.tabWidget.widget(index) in self._pendingTabs:
+                    self.loadTab(index)
+                
+    def loadTab(self, index):
+        placeholder = self.tabWidget.widget(index)
+        path = self._pendingTabs.pop(placeholder)
+        symbol = self.tabWidget.tabText(index)
+        editor = CategoryDiagramEditor(window=self)
+        self.tabWidget.blockSignals(True)
+        # Insert first: removing the current tab before then would leave the stack nothing to show
+        self.tabWidget.insertTab(index, editor, symbol)
+        self.tabWidget.setCurrentIndex(index)
+        self.tabWidget.removeTab(index + 1)
+        self.tabWidget.blockSignals(False)
+        placeholder.deleteLater()
+        self.setupEditor(editor, symbol)
+        loadProject(path, editor, lazy=True)
+        return editor
         
     def currentEditor(self):
         return self.tabWidget.currentWidget()
@@ -54,4 +124,8 @@ class MainWindow(QMainWindow, Ui_MainWindow):
     
     def currentTabIndexChanged(self, index):
         editor = self.tabWidget.widget(index)
-        self.commandTimeline.setCurrentUndoView(editor.undoView())
\ No newline at end of file
+        if editor in self._pendingTabs:
+            editor = self.loadTab(index)
+        if editor is not None:
+            setAllocator(editor.uidAllocator())
+            self.commandTimeline.setCurrentUndoView(editor.undoView())
\ No newline at end of file
@@ -39,7 +39,10 @@ class OpFunctor(Functor):
     def takeImage(self, dom=None, cod=None, contra=False):
         super().takeImage(dom, cod, not contra)    # This is flag to invert the arrows in the image
         
-    def imageString(self, x):
+    def template(self):
+        return ".^op"
+        
+    def imageTerm(self, x):
         if isinstance(x, (CategoryDiagram, CategoryArrow)):
-            return str(x) + "^op"
-        return str(x)
\ No newline at end of file
+            return super().imageTerm(x)
+        return self.argumentTerm(x)
\ No newline at end of file
@@ -0,0 +1,138 @@
+from commutativity import morphismWord
+from label_terms import compose, identity
+
+# Path searches that run in worker processes, so nothing here may touch Qt.  A PlainGraph is
+# a picklable copy of a diagram's GraphIndex: node ids are positions in nodes, and every edge
+# carries its morphism's uid and canonical word.  The adjacency lists are rebuilt after
+# unpickling rather than sent.  Queries are plain tuples, (kind, *args), answered by
+# runQuery against the graph installed in the worker by setGraph.
+
+class PlainGraph:
+    def __init__(self, nodes, edges):
+        self.nodes = tuple(nodes)       # node id -> object uid
+        self.edges = tuple(edges)       # edge id -> (morphism uid, source node id, target node id, word)
+        self._build()
+
+    @classmethod
+    def fromIndex(cls, index):
+        nodes = [index.node(n).uid() for n in range(index.nodeCount())]
+        edges = []
+        for e in range(index.edgeCount()):
+            arr = index.edge(e)
+            edges.append((arr.uid(), index.source(e), index.target(e), morphismWord(arr)))
+        return cls(nodes, edges)
+
+    def __getstate__(self):
+        return (self.nodes, self.edges)
+
+    def __setstate__(self, state):
+        self.nodes, self.edges = state
+        self._build()
+
+    def _build(self):
+        self.nodeOf = {uid : n for n, uid in enumerate(self.nodes)}
+        self.edgeOf = {edge[0] : e for e, edge in enumerate(self.edges)}
+        self.out = [[] for n in self.nodes]
+        for e, (uid, x, y, word) in enumerate(self.edges):
+            self.out[x].append(e)
+
+    def paths(self, x, max_length, max_visits=1):
+        # Yields (edge path, end node) for the paths of 1 to max_length edges out of x that pass
+        # through no node more than max_visits times, depth first
+        visits = [0] * len(self.nodes)
+        visits[x] = 1
+        path = []
+        stack = [iter(self.out[x])]
+        while stack:
+            e = next(stack[-1], None)
+            if e is None:
+                stack.pop()
+                if path:
+                    visits[self.edges[path.pop()][2]] -= 1
+                continue
+            y = self.edges[e][2]
+            if visits[y] >= max_visits:
+                continue
+            path.append(e)
+            visits[y] += 1
+            yield tuple(path), y
+            if len(path) < max_length:
+                stack.append(iter(self.out[y]))
+            else:
+                visits[y] -= 1
+                path.pop()
+
+    def word(self, path):
+        # Composite word of an edge path; the last edge followed comes first
+        word = identity()
+        for e in path:
+            word = compose(self.edges[e][3], word)
+        return word
+
+    def uids(self, path):
+        return tuple(self.edges[e][0] for e in path)
+
+
+def findPaths(graph, source, target, max_length, max_paths):
+    # Morphism uid paths from source to target, object uids given
+    x = graph.nodeOf.get(source)
+    y = graph.nodeOf.get(target)
+    found = []
+    if x is not None and y is not None:
+        for path, end in graph.paths(x, max_length):
+            if end == y:
+                found.append(graph.uids(path))
+                if len(found) >= max_paths:
+                    break
+    return found
+
+
+def findLifts(graph, f, g, max_length, max_paths):
+    # Paths h from the domain of f to the domain of g whose composite g∘h has f's word
+    ef = graph.edgeOf.get(f)
+    eg = graph.edgeOf.get(g)
+    found = []
+    if ef is not None and eg is not None:
+        f_uid, x, z, f_word = graph.edges[ef]
+        g_uid, y, w, g_word = graph.edges[eg]
+        if w == z:
+            if x == y and g_word is f_word:
+                found.append(())        # The identity lifts f
+            for path, end in graph.paths(x, max_length):
+                if end == y and compose(g_word, graph.word(path)) is f_word:
+                    found.append(graph.uids(path))
+                    if len(found) >= max_paths:
+                        break
+    return found
+
+
+def findUnproven(graph, source, max_length, max_visits, max_paths):
+    # [(target uid, [[path, ...] per word])] for targets of source reached by parallel paths
+    # with different words
+    x = graph.nodeOf.get(source)
+    if x is None:
+        return []
+    by_target = {}
+    for path, y in graph.paths(x, max_length, max_visits):
+        classes = by_target.setdefault(y, {})
+        paths = classes.setdefault(graph.word(path), [])
+        if len(paths) < max_paths:
+            paths.append(graph.uids(path))
+    return [(graph.nodes[y], list(classes.values())) for y, classes in by_target.items() if len(classes) > 1]
+
+
+Queries = {
+    "paths": findPaths,
+    "lifts": findLifts,
+    "unproven": findUnproven,
+}
+
+_graph = None
+
+def setGraph(graph):
+    # Pool initializer: the graph is sent once per worker, not once per query
+    global _graph
+    _graph = graph
+
+def runQuery(query):
+    return Queries[query[0]](_graph, *query[1:])
@@ -0,0 +1,669 @@
+from PyQt5.QtCore import QPointF, QRectF, Qt
+from PyQt5.QtGui import QColor, QBrush
+from qt_tools import Pen, SimpleBrush
+from uid_allocator import installedAllocator
+import struct
+
+# Binary project file.  A snapshot flattens an editor into plain tables: nodes and arrows get
+# integer ids in table order, geometry is stored column by column as float64, and pens and
+# brushes are deduplicated into a palette the tables index into.  Files are a header followed
+# by tagged, length-prefixed sections, so readers skip sections they don't know and newer
+# versions can append tables without breaking older files.
+#
+#   header:   b"ADCP"  u16 version  u16 reserved
+#   section:  4 byte tag  u32 length  payload          (b"END\0" closes the file)
+#
+# Every number is little-endian at struct's standard size, whatever the platform's own.
+# Version 2 stores the scene's grid sizes as integers; version 1 stored them as doubles.
+
+Magic = b"ADCP"
+Version = 2
+SceneFormat = "<IiiBdd"
+SceneFormats = {1 : "<IddBdd"}      # Older versions whose scene section differs
+NoParent = -1
+
+ReversedFlag = 1
+ContravariantFlag = 2
+
+
+class ProjectSnapshot:
+    # Plain Python data only, so a snapshot can be handed to another thread for writing
+    def __init__(self):
+        self.version = Version
+        self.types = []            # Class names, indexed by the type columns
+        self.pens = []             # (rgba, width, style, cap, join)
+        self.brushes = []          # (rgba, style)
+        self.nodes = _Table("type", "parent", "pen", "brush", "x", "y", "z", "radius", "padding")
+        self.arrows = _Table("type", "parent", "from", "to", "pen", "flags", "points", "x", "y")
+        self.points = _Table("x", "y")      # Control points of all arrows, in arrow order
+        self.labels = _Table("owner", "x", "y")
+        self.labelTexts = []
+        self.functorMaps = _Table("functor", "preimage", "image")      # Ids of arrows count after the nodes
+        self.hulls = _Table("node", "x", "y", "width", "height")       # Member hulls of diagrams, so they can load lazily
+        self.scene = None          # (background rgba, grid x, grid y, grid enabled, origin x, origin y)
+
+    def itemCount(self):
+        return len(self.nodes) + len(self.arrows)
+
+
+class _Table:
+    def __init__(self, *columns):
+        self.columns = {name : [] for name in columns}
+
+    def __len__(self):
+        return len(next(iter(self.columns.values())))
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def append(self, *values):
+        for column, value in zip(self.columns.values(), values):
+            column.append(value)
+
+
+def _rgba(color):
+    return (color.red() << 24) | (color.green() << 16) | (color.blue() << 8) | color.alpha()
+
+def _color(rgba):
+    return QColor((rgba >> 24) & 0xff, (rgba >> 16) & 0xff, (rgba >> 8) & 0xff, rgba & 0xff)
+
+
+class _Palette:
+    def __init__(self, entries):
+        self._entries = entries
+        self._index = {}
+
+    def add(self, key):
+        k = self._index.get(key)
+        if k is None:
+            k = self._index[key] = len(self._entries)
+            self._entries.append(key)
+        return k
+
+
+########################## SNAPSHOT #################################
+
+
+def takeSnapshot(editor):
+    return _SnapshotBuilder().build(editor)
+
+
+class _SnapshotBuilder:
+    def __init__(self):
+        self.snap = snap = ProjectSnapshot()
+        self._types = _Palette(snap.types)
+        self._pens = _Palette(snap.pens)
+        self._brushes = _Palette(snap.brushes)
+        self._ids = {}          # id(item) -> row
+        self._owners = []       # Row -> item, None for rows copied from a pending diagram
+        self._copied = {}       # (id(loader), loader row) -> row
+        self._sources = {}      # Row -> (loader, loader row) for copied rows
+        self._pending = []      # (pending contents, row of its diagram)
+
+    def penKey(self, pen):
+        if pen is None:
+            return self._pens.add((0, 0.0, int(Qt.NoPen), int(Qt.SquareCap), int(Qt.BevelJoin)))
+        return self._pens.add((_rgba(pen.color()), pen.widthF(), int(pen.style()), int(pen.capStyle()), int(pen.joinStyle())))
+
+    def brushKey(self, brush):
+        if brush is None:
+            return self._brushes.add((0, int(Qt.NoBrush)))
+        return self._brushes.add((_rgba(brush.color()), int(brush.style())))
+
+    def rowOf(self, loader, row):
+        copy = self._copied.get((id(loader), row))
+        if copy is None:
+            item = loader.items()[row] if row != NoParent else None
+            copy = self._ids.get(id(item), NoParent) if item is not None else NoParent
+        return copy
+
+    def addRow(self, loader, row, type_key, parent, pen, brush, *geometry):
+        src = loader.snapshot()
+        copy = len(self.snap.nodes)
+        self._copied[(id(loader), row)] = copy
+        self._sources[copy] = (loader, row)
+        self._owners.append(None)
+        self.snap.nodes.append(self._types.add(src.types[type_key]), parent, self._pens.add(src.pens[pen]),
+                               self._brushes.add(src.brushes[brush]), *geometry)
+        return copy
+
+    def addArrowRow(self, loader, row, type_key, parent, fro, to, pen, flags, points, x, y):
+        src = loader.snapshot()
+        copy = self._copied[(id(loader), row)] = len(self.snap.nodes) + len(self.snap.arrows)
+        self._sources[copy] = (loader, row)
+        self._owners.append(None)
+        self.snap.arrows.append(self._types.add(src.types[type_key]), parent, fro, to, self._pens.add(src.pens[pen]),
+                                flags, len(points), x, y)
+        for p in points:
+            self.snap.points.append(*p)
+
+    def addHull(self, row, rect):
+        self.snap.hulls.append(row, rect.x(), rect.y(), rect.width(), rect.height())
+
+    def addLabel(self, row, x, y, text):
+        self.snap.labels.append(row, x, y)
+        self.snap.labelTexts.append(text)
+
+    def addNode(self, node, parent):
+        from category_diagram import CategoryDiagram
+        k = self._ids[id(node)] = len(self.snap.nodes)
+        self._owners.append(node)
+        pos = node.pos()
+        self.snap.nodes.append(self._types.add(_typeName(node)), parent, self.penKey(node.pen()), self.brushKey(node.brush()),
+                               pos.x(), pos.y(), node.zValue(), node.cornerRadius(), node._insetPadding)
+        if isinstance(node, CategoryDiagram):
+            if node._objectsRect is not None:
+                self.addHull(k, node._objectsRect)
+            pending = node.pendingContents()
+            if pending is not None:
+                self._pending.append((pending, k))
+                pending.loader().copyPending(pending.row(), k, self)
+            else:
+                for obj in node.objects().values():
+                    self.addNode(obj, k)
+
+    def addArrow(self, arr, parent):
+        from functor import Functor
+        self._ids[id(arr)] = len(self.snap.nodes) + len(self.snap.arrows)
+        self._owners.append(arr)
+        flags = ReversedFlag if arr.reversed() else 0
+        if isinstance(arr, Functor) and arr.isContravariant():
+            flags |= ContravariantFlag
+        points = arr.controlPoints()
+        pos = arr.pos()
+        self.snap.arrows.append(self._types.add(_typeName(arr)), parent,
+                                self._ids.get(id(arr.fromNode()), NoParent), self._ids.get(id(arr.toNode()), NoParent),
+                                self.penKey(arr.pen()), flags, len(points), pos.x(), pos.y())
+        for point in points:
+            p = point.pos()
+            self.snap.points.append(p.x(), p.y())
+
+    def build(self, editor):
+        from category_diagram import CategoryDiagram
+        from functor import Functor
+        snap = self.snap
+        for node in editor.nodes():
+            self.addNode(node, NoParent)
+
+        # Morphisms in diagram order, then the editor's own arrows
+        arrows = []
+        pending_rows = {k : pending for pending, k in self._pending}
+        for k in range(len(snap.nodes)):
+            node = self._owners[k]
+            if k in pending_rows:
+                pending_rows[k].loader().copyPendingArrows(pending_rows[k].row(), self)
+            elif isinstance(node, CategoryDiagram):
+                for arr in node.morphisms().values():
+                    arrows.append(arr)
+                    self.addArrow(arr, k)
+        for arr in editor.arrows():
+            arrows.append(arr)
+            self.addArrow(arr, NoParent)
+
+        for k, owner in enumerate(self._owners):
+            if owner is not None:
+                for label in owner.labels():
+                    p = label.pos()
+                    self.addLabel(k, p.x(), p.y(), label.toPlainText())
+            else:
+                loader, row = self._sources[k]
+                loader.copyPendingLabels(row, k, self)
+
+        uid_ids = {owner.uid() : k for k, owner in enumerate(self._owners) if owner is not None}
+        for arr in arrows:
+            if isinstance(arr, Functor):
+                k = self._ids[id(arr)]
+                for preimage, image in arr.mapping().items():
+                    if preimage in uid_ids and image in uid_ids:
+                        snap.functorMaps.append(k, uid_ids[preimage], uid_ids[image])
+        for loader in {id(pending.loader()) : pending.loader() for pending, k in self._pending}.values():
+            loader.copyPendingMaps(self)
+
+        scene = editor.scene()
+        if scene is not None:
+            o = scene.gridOrigin()
+            snap.scene = (_rgba(scene.backgroundBrush().color()), int(scene.gridSizeX()), int(scene.gridSizeY()),
+                          int(bool(scene.gridEnabled())), o.x(), o.y())
+        return snap
+
+
+def restoreSnapshot(snap, editor, lazy=False):
+    return SnapshotLoader(snap, editor, lazy).restore()
+
+
+class SnapshotLoader:
+    # Rebuilds items from a snapshot.  When lazy, a diagram's members are built only once the
+    # diagram asks for them (CategoryDiagram.loadContents), so opening a project costs what is
+    # on screen.  Diagrams tied together by an arrow (functors) load together, which keeps their
+    # mapping and image reflection whole.
+    def __init__(self, snap, editor, lazy=False):
+        from category_diagram import CategoryDiagram
+        self._snap = snap
+        self._editor = editor
+        self._lazy = lazy
+        self._types = [_itemType(name) for name in snap.types]
+        self._pens = [_pen(*key) for key in snap.pens]
+        self._brushes = [_brush(*key) for key in snap.brushes]
+        self._nodeCount = len(snap.nodes)
+        self._items = [None] * snap.itemCount()
+        self._childNodes = _groupRows(snap.nodes["parent"])
+        self._childArrows = _groupRows(snap.arrows["parent"])
+        self._labelRows = _groupRows(snap.labels["owner"])
+        self._pointStart = [0]
+        for n in snap.arrows["points"]:
+            self._pointStart.append(self._pointStart[-1] + n)
+        hulls = snap.hulls
+        self._hulls = {hulls["node"][j] : QRectF(hulls["x"][j], hulls["y"][j], hulls["width"][j], hulls["height"][j])
+                       for j in range(len(hulls))}
+        self._pendingMaps = list(range(len(snap.functorMaps)))
+        self._links = {}
+        node_types = snap.nodes["type"]
+        for fro, to in zip(snap.arrows["from"], snap.arrows["to"]):
+            if fro != NoParent and to != NoParent and fro != to and \
+               issubclass(self._types[node_types[fro]], CategoryDiagram) and issubclass(self._types[node_types[to]], CategoryDiagram):
+                self._links.setdefault(fro, []).append(to)
+                self._links.setdefault(to, []).append(fro)
+
+    def snapshot(self):
+        return self._snap
+
+    def items(self):
+        return self._items
+
+    def hasContents(self, row):
+        return row in self._childNodes or row in self._childArrows
+
+    def restore(self):
+        snap = self._snap
+        with installedAllocator(self._editor.uidAllocator()):
+            self._materialize(NoParent)
+            self._applyMaps()
+        arrows = snap.arrows
+        for k in self._childArrows.get(NoParent, ()):
+            arr = self._items[self._nodeCount + k]
+            if hasattr(arr, 'reflectDiagrams') and arr.domain() and arr.codomain():
+                arr.setContravariant(bool(arrows["flags"][k] & ContravariantFlag))
+                arr.reflectDiagrams(arr.domain(), arr.codomain())
+
+        scene = self._editor.scene()
+        if scene is not None and snap.scene is not None:
+            rgba, gx, gy, enabled, ox, oy = snap.scene
+            if scene.backgroundBrush().color() != _color(rgba):
+                scene.setBackgroundBrush(QBrush(_color(rgba)))
+            scene.setXGridSize(int(gx))
+            scene.setYGridSize(int(gy))
+            scene.setGridOrigin(QPointF(ox, oy))
+            scene.setGridEnabled(bool(enabled))
+        return self._items
+
+    def load(self, row):
+        # A lazy diagram may be opened while another tab is current; its items still take this editor's ids
+        with installedAllocator(self._editor.uidAllocator()):
+            self._materialize(row)
+            self._applyMaps()
+        for other in self._links.get(row, ()):
+            diagram = self._items[other]
+            if diagram is not None:
+                diagram.loadContents()
+
+    def _materialize(self, parent):
+        node_rows = self._childNodes.get(parent, [])
+        arrow_rows = self._childArrows.get(parent, [])
+        nodes = [self._makeNode(k) for k in node_rows]
+        arrows = [self._makeArrow(k) for k in arrow_rows]
+        for k in node_rows:
+            self._restoreLabels(k)
+        for k in arrow_rows:
+            self._restoreLabels(self._nodeCount + k)
+        if parent == NoParent:
+            for node in nodes:
+                self._editor.addNode(node)
+            for arr in arrows:
+                self._editor.addArrow(arr)
+            for k in arrow_rows:
+                self._connectArrow(k)
+        else:
+            diagram = self._items[parent]
+            # Members go into their diagram in one batch; their images are in the snapshot already
+            functors = [F for F in diagram.outgoingArrows() if hasattr(F, 'setImaging')]
+            imaging = [F.isImaging() for F in functors]
+            for F in functors:
+                F.setImaging(True)
+            try:
+                with diagram.bulkEdit():
+                    diagram.addItems(nodes, arrows)
+                    for k in arrow_rows:
+                        self._connectArrow(k)
+            finally:
+                for F, was in zip(functors, imaging):
+                    F.setImaging(was)
+        for k in node_rows:
+            if self.hasContents(k):
+                if self._lazy:
+                    self._items[k].setPendingContents(_PendingContents(self, k), self._hulls.get(k))
+                else:
+                    self._materialize(k)
+
+    def _makeNode(self, k):
+        nodes = self._snap.nodes
+        node = self._types[nodes["type"][k]](new=True)
+        node.setPen(self._pens[nodes["pen"][k]])
+        node.setBrush(self._brushes[nodes["brush"][k]])
+        node.setPos(QPointF(nodes["x"][k], nodes["y"][k]))
+        node.setZValue(nodes["z"][k])
+        node._cornerRadius = nodes["radius"][k]       # setCornerRadius emits a signal nodes lack
+        node._insetPadding = nodes["padding"][k]
+        if hasattr(node, 'setEditor'):
+            node.setEditor(self._editor)
+        self._items[k] = node
+        return node
+
+    def _makeArrow(self, k):
+        snap = self._snap
+        arrows = snap.arrows
+        arr = self._types[arrows["type"][k]](new=True)
+        arr.setEditor(self._editor)
+        arr.setPen(self._pens[arrows["pen"][k]])
+        arr.setPos(QPointF(arrows["x"][k], arrows["y"][k]))
+        if arrows["points"][k] == 4:
+            arr.toggleBezier(True)
+        p = self._pointStart[k]
+        arr.setPointPositions([QPointF(snap.points["x"][j], snap.points["y"][j]) for j in range(p, self._pointStart[k + 1])])
+        arr.setReversed(bool(arrows["flags"][k] & ReversedFlag))
+        self._items[self._nodeCount + k] = arr
+        return arr
+
+    def _connectArrow(self, k):
+        arr = self._items[self._nodeCount + k]
+        fro = self._snap.arrows["from"][k]
+        to = self._snap.arrows["to"][k]
+        # Raw end points, so restoring doesn't push commands or reflect through functors
+        arr.setFrom(self._items[fro] if fro != NoParent else None)
+        arr.setTo(self._items[to] if to != NoParent else None)
+
+    def _restoreLabels(self, row):
+        snap = self._snap
+        labels = snap.labels
+        owner = self._items[row]
+        rows = self._labelRows.get(row, [])
+        for j, k in enumerate(rows):
+            if j < owner.labelCount():
+                owner.setLabelText(j, snap.labelTexts[k])
+                label = owner.label(j)
+            else:
+                label = owner.addLabel(snap.labelTexts[k])
+            label.setPos(QPointF(labels["x"][k], labels["y"][k]))
+        # Labels a fresh item comes with but the saved one didn't have
+        for label in list(owner.labels())[len(rows):]:
+            owner.removeLabel(label)
+
+    def _applyMaps(self):
+        maps = self._snap.functorMaps
+        items = self._items
+        pending = []
+        for j in self._pendingMaps:
+            F = items[maps["functor"][j]]
+            x = items[maps["preimage"][j]]
+            y = items[maps["image"][j]]
+            if F is None or x is None or y is None:
+                pending.append(j)
+            else:
+                F[x.uid()] = y.uid()
+        self._pendingMaps = pending
+
+    def copyPending(self, row, copy_row, out):
+        # Writes the unbuilt members under row into the snapshot out is filling, keeping
+        # them unbuilt; copy_row is row's id there
+        nodes = self._snap.nodes
+        for k in self._childNodes.get(row, ()):
+            copy = out.addRow(self, k, nodes["type"][k], copy_row, nodes["pen"][k], nodes["brush"][k],
+                              nodes["x"][k], nodes["y"][k], nodes["z"][k], nodes["radius"][k], nodes["padding"][k])
+            if k in self._hulls:
+                out.addHull(copy, self._hulls[k])
+            self.copyPending(k, copy, out)
+
+    def copyPendingArrows(self, row, out):
+        snap = self._snap
+        arrows = snap.arrows
+        for k in self._childArrows.get(row, ()):
+            start = self._pointStart[k]
+            points = [(snap.points["x"][j], snap.points["y"][j]) for j in range(start, self._pointStart[k + 1])]
+            out.addArrowRow(self, self._nodeCount + k, arrows["type"][k], out.rowOf(self, row),
+                            out.rowOf(self, arrows["from"][k]), out.rowOf(self, arrows["to"][k]),
+                            arrows["pen"][k], arrows["flags"][k], points, arrows["x"][k], arrows["y"][k])
+        for k in self._childNodes.get(row, ()):
+            self.copyPendingArrows(k, out)
+
+    def copyPendingLabels(self, row, copy_row, out):
+        snap = self._snap
+        labels = snap.labels
+        for k in self._labelRows.get(row, ()):
+            out.addLabel(copy_row, labels["x"][k], labels["y"][k], snap.labelTexts[k])
+
+    def copyPendingMaps(self, out):
+        maps = self._snap.functorMaps
+        for j in self._pendingMaps:
+            rows = [out.rowOf(self, maps[name][j]) for name in ("functor", "preimage", "image")]
+            if NoParent not in rows:
+                out.snap.functorMaps.append(*rows)
+
+
+class _PendingContents:
+    def __init__(self, loader, row):
+        self._loader = loader
+        self._row = row
+
+    def loader(self):
+        return self._loader
+
+    def row(self):
+        return self._row
+
+    def load(self):
+        self._loader.load(self._row)
+
+
+def _groupRows(column):
+    groups = {}
+    for k, value in enumerate(column):
+        groups.setdefault(value, []).append(k)
+    return groups
+
+
+def _pen(rgba, width, style, cap, join):
+    if style == int(Qt.NoPen):
+        return Pen(Qt.NoPen)
+    return Pen(_color(rgba), width, Pen.styleEnum[style], Pen.capEnum[cap], Pen.joinEnum[join])
+
+def _brush(rgba, style):
+    if style == int(Qt.SolidPattern):
+        return SimpleBrush(_color(rgba))
+    brush = QBrush(Qt.BrushStyle(style))
+    brush.setColor(_color(rgba))
+    return brush
+
+_itemTypes = None      # Class name -> class, for every item class a snapshot can hold
+
+def itemTypes():
+    global _itemTypes
+    if _itemTypes is None:
+        from category_diagram import CategoryDiagram
+        from category_object import CategoryObject
+        from category_arrow import CategoryArrow
+        from functor import Functor
+        from op_functor import OpFunctor
+        from graph_node import GraphNode
+        from group_graph_node import GroupGraphNode
+        from graph_arrow import GraphArrow
+        classes = (CategoryDiagram, CategoryObject, CategoryArrow, Functor, OpFunctor, GraphNode, GroupGraphNode, GraphArrow)
+        _itemTypes = {cls.__name__ : cls for cls in classes}
+    return _itemTypes
+
+def _itemType(name):
+    cls = itemTypes().get(name)
+    if cls is None:
+        raise ValueError("Unknown item type " + name + " in project file.")
+    return cls
+
+def _typeName(item):
+    # Refuses at save time the items a load couldn't rebuild
+    name = type(item).__name__
+    if itemTypes().get(name) is not type(item):
+        raise ValueError("Item type " + name + " can't be saved to a project file.")
+    return name
+
+
+########################## STREAMING #################################
+
+
+def _columnBytes(typecode, values):
+    return struct.pack("<" + str(len(values)) + typecode, *values)
+
+def _stringsBytes(strings):
+    encoded = [s.encode('utf-8') for s in strings]
+    return _columnBytes('I', [len(s) for s in encoded]) + b"".join(encoded)
+
+
+class ProjectWriter:
+    def __init__(self, stream):
+        self._stream = stream
+        stream.write(Magic + struct.pack("<HH", Version, 0))
+
+    def writeSection(self, tag, *chunks):
+        self._stream.write(tag + struct.pack("<I", sum(len(c) for c in chunks)))
+        for chunk in chunks:
+            self._stream.write(chunk)
+
+    def writeTable(self, tag, table, typecodes):
+        chunks = [struct.pack("<I", len(table))]
+        for name, typecode in typecodes:
+            chunks.append(_columnBytes(typecode, table[name]))
+        self.writeSection(tag, *chunks)
+
+    def writeSnapshot(self, snap):
+        self.writeSection(b"TYPE", struct.pack("<I", len(snap.types)), _stringsBytes(snap.types))
+        pens = snap.pens
+        self.writeSection(b"PENS", struct.pack("<I", len(pens)),
+                          _columnBytes('I', [p[0] for p in pens]), _columnBytes('d', [p[1] for p in pens]),
+                          _columnBytes('B', [p[2] for p in pens]), _columnBytes('B', [p[3] for p in pens]),
+                          _columnBytes('B', [p[4] for p in pens]))
+        brushes = snap.brushes
+        self.writeSection(b"BRSH", struct.pack("<I", len(brushes)),
+                          _columnBytes('I', [b[0] for b in brushes]), _columnBytes('B', [b[1] for b in brushes]))
+        self.writeTable(b"NODE", snap.nodes, NodeColumns)
+        self.writeTable(b"ARRW", snap.arrows, ArrowColumns)
+        self.writeTable(b"PNTS", snap.points, PointColumns)
+        self.writeTable(b"LABL", snap.labels, LabelColumns)
+        self.writeSection(b"LTXT", struct.pack("<I", len(snap.labelTexts)), _stringsBytes(snap.labelTexts))
+        self.writeTable(b"FMAP", snap.functorMaps, FunctorMapColumns)
+        self.writeTable(b"HULL", snap.hulls, HullColumns)
+        if snap.scene is not None:
+            self.writeSection(b"SCEN", struct.pack(SceneFormat, *snap.scene))
+
+    def close(self):
+        self.writeSection(b"END\0")
+
+
+NodeColumns = (("type", 'H'), ("parent", 'i'), ("pen", 'I'), ("brush", 'I'),
+               ("x", 'd'), ("y", 'd'), ("z", 'd'), ("radius", 'd'), ("padding", 'd'))
+ArrowColumns = (("type", 'H'), ("parent", 'i'), ("from", 'i'), ("to", 'i'), ("pen", 'I'),
+                ("flags", 'B'), ("points", 'B'), ("x", 'd'), ("y", 'd'))
+PointColumns = (("x", 'd'), ("y", 'd'))
+LabelColumns = (("owner", 'i'), ("x", 'd'), ("y", 'd'))
+FunctorMapColumns = (("functor", 'i'), ("preimage", 'i'), ("image", 'i'))
+HullColumns = (("node", 'i'), ("x", 'd'), ("y", 'd'), ("width", 'd'), ("height", 'd'))
+
+
+class ProjectReader:
+    def __init__(self, stream):
+        self._stream = stream
+        header = stream.read(8)
+        if len(header) < 8 or header[:4] != Magic:
+            raise ValueError("Not a project file.")
+        self.version = struct.unpack("<HH", header[4:])[0]
+        if self.version > Version:
+            raise ValueError("Project file version " + str(self.version) + " is newer than this program.")
+
+    def sections(self):
+        while True:
+            head = self._stream.read(8)
+            if len(head) < 8:
+                raise ValueError("Truncated project file.")
+            tag = head[:4]
+            length = struct.unpack("<I", head[4:])[0]
+            if tag == b"END\0":
+                return
+            yield tag, self._stream.read(length)
+
+    def readSnapshot(self):
+        snap = ProjectSnapshot()
+        tables = {b"NODE" : (snap.nodes, NodeColumns), b"ARRW" : (snap.arrows, ArrowColumns),
+                  b"PNTS" : (snap.points, PointColumns), b"LABL" : (snap.labels, LabelColumns),
+                  b"FMAP" : (snap.functorMaps, FunctorMapColumns), b"HULL" : (snap.hulls, HullColumns)}
+        for tag, data in self.sections():
+            if tag in tables:
+                table, typecodes = tables[tag]
+                _readTable(data, table, typecodes)
+            elif tag == b"TYPE":
+                snap.types = _readStrings(data, 4, struct.unpack_from("<I", data)[0])[0]
+            elif tag == b"LTXT":
+                snap.labelTexts = _readStrings(data, 4, struct.unpack_from("<I", data)[0])[0]
+            elif tag == b"PENS":
+                n = struct.unpack_from("<I", data)[0]
+                columns, offset = _readColumns(data, 4, n, "IdBBB")
+                snap.pens = list(zip(*columns))
+            elif tag == b"BRSH":
+                n = struct.unpack_from("<I", data)[0]
+                columns, offset = _readColumns(data, 4, n, "IB")
+                snap.brushes = list(zip(*columns))
+            elif tag == b"SCEN":
+                rgba, gx, gy, enabled, ox, oy = struct.unpack(SceneFormats.get(self.version, SceneFormat), data)
+                snap.scene = (rgba, int(gx), int(gy), enabled, ox, oy)
+        snap.version = self.version
+        return snap
+
+
+def _readColumn(data, offset, typecode, n):
+    fmt = "<" + str(n) + typecode
+    return list(struct.unpack_from(fmt, data, offset)), offset + struct.calcsize(fmt)
+
+def _readColumns(data, offset, n, typecodes):
+    columns = []
+    for typecode in typecodes:
+        column, offset = _readColumn(data, offset, typecode, n)
+        columns.append(column)
+    return columns, offset
+
+def _readTable(data, table, typecodes):
+    n = struct.unpack_from("<I", data)[0]
+    offset = 4
+    for name, typecode in typecodes:
+        table.columns[name], offset = _readColumn(data, offset, typecode, n)
+
+def _readStrings(data, offset, n):
+    lengths, offset = _readColumn(data, offset, 'I', n)
+    strings = []
+    for length in lengths:
+        strings.append(data[offset:offset + length].decode('utf-8'))
+        offset += length
+    return strings, offset
+
+
+########################## FILES #################################
+
+
+def writeSnapshot(path, snap):
+    with open(path, 'wb') as stream:
+        writer = ProjectWriter(stream)
+        writer.writeSnapshot(snap)
+        writer.close()
+
+def readSnapshot(path):
+    with open(path, 'rb') as stream:
+        return ProjectReader(stream).readSnapshot()
+
+def saveProject(path, editor):
+    writeSnapshot(path, takeSnapshot(editor))
+
+def loadProject(path, editor, lazy=False):
+    return restoreSnapshot(readSnapshot(path), editor, lazy)
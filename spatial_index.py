@@ -0,0 +1,176 @@
+from math import floor, inf, sqrt
+from PyQt5.QtCore import QRectF
+
+# Uniform grid hash over item rects.  Each key is filed under every cell its rect touches,
+# so rect and point queries only look at the cells they overlap, and nearest-item queries
+# search outward ring by ring until no closer cell can remain.
+
+class SpatialIndex:
+    DefaultCellSize = 64.0
+
+    def __init__(self, cell_size=None):
+        if cell_size is None:
+            cell_size = self.DefaultCellSize
+        self._cellSize = float(cell_size)
+        self._grid = {}        # (i, j) -> set of keys
+        self._rects = {}       # key -> (left, top, right, bottom)
+        self._cells = {}       # key -> cell range (i0, j0, i1, j1)
+        self._items = {}       # key -> item
+        self._bounds = None    # Occupied cell range, recomputed lazily
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def cellSize(self):
+        return self._cellSize
+
+    def clear(self):
+        self._grid.clear()
+        self._rects.clear()
+        self._cells.clear()
+        self._items.clear()
+        self._bounds = None
+
+    def items(self):
+        return list(self._items.values())
+
+    def rect(self, key):
+        if key in self._rects:
+            l, t, r, b = self._rects[key]
+            return QRectF(l, t, r - l, b - t)
+        return None
+
+    def _cellRange(self, l, t, r, b):
+        s = self._cellSize
+        return (floor(l / s), floor(t / s), floor(r / s), floor(b / s))
+
+    def insert(self, key, item, rect):
+        if key in self._items:
+            self.remove(key)
+        l = rect.left();  t = rect.top()
+        r = rect.right();  b = rect.bottom()
+        cells = self._cellRange(l, t, r, b)
+        self._rects[key] = (l, t, r, b)
+        self._cells[key] = cells
+        self._items[key] = item
+        self._bounds = None
+        i0, j0, i1, j1 = cells
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                self._grid.setdefault((i, j), set()).add(key)
+
+    def update(self, key, item, rect):
+        if key in self._items:
+            l = rect.left();  t = rect.top()
+            r = rect.right();  b = rect.bottom()
+            if self._cellRange(l, t, r, b) == self._cells[key]:
+                self._rects[key] = (l, t, r, b)
+                self._items[key] = item
+                return
+        self.insert(key, item, rect)
+
+    def remove(self, key):
+        if key in self._items:
+            i0, j0, i1, j1 = self._cells.pop(key)
+            for i in range(i0, i1 + 1):
+                for j in range(j0, j1 + 1):
+                    cell = self._grid[(i, j)]
+                    cell.discard(key)
+                    if not cell:
+                        del self._grid[(i, j)]
+            del self._rects[key]
+            del self._items[key]
+            self._bounds = None
+
+    def _keysInCells(self, i0, j0, i1, j1):
+        keys = set()
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(self._grid):
+            # Query covers more cells than are occupied; walk the occupied ones instead
+            for (i, j), cell in self._grid.items():
+                if i0 <= i <= i1 and j0 <= j <= j1:
+                    keys |= cell
+        else:
+            for i in range(i0, i1 + 1):
+                for j in range(j0, j1 + 1):
+                    cell = self._grid.get((i, j))
+                    if cell:
+                        keys |= cell
+        return keys
+
+    def itemsInRect(self, rect):
+        l = rect.left();  t = rect.top()
+        r = rect.right();  b = rect.bottom()
+        found = []
+        for key in self._keysInCells(*self._cellRange(l, t, r, b)):
+            kl, kt, kr, kb = self._rects[key]
+            if kl <= r and l <= kr and kt <= b and t <= kb:
+                found.append(self._items[key])
+        return found
+
+    def itemsAt(self, point):
+        x = point.x();  y = point.y()
+        s = self._cellSize
+        cell = self._grid.get((floor(x / s), floor(y / s)))
+        found = []
+        if cell:
+            for key in cell:
+                l, t, r, b = self._rects[key]
+                if l <= x <= r and t <= y <= b:
+                    found.append(self._items[key])
+        return found
+
+    def nearest(self, point, max_distance=inf):
+        # Nearest by distance from point to item rect (0 when inside)
+        if not self._grid:
+            return None
+        x = point.x();  y = point.y()
+        s = self._cellSize
+        ci = floor(x / s);  cj = floor(y / s)
+        bounds = self._occupiedCellBounds()
+        max_ring = max(abs(ci - bounds[0]), abs(ci - bounds[2]), abs(cj - bounds[1]), abs(cj - bounds[3]))
+        best = None
+        best_d = max_distance
+        seen = set()
+        for k in range(0, max_ring + 1):
+            if best is not None and (k - 1) * s > best_d:
+                break
+            for i, j in self._ring(ci, cj, k):
+                cell = self._grid.get((i, j))
+                if not cell:
+                    continue
+                for key in cell:
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    d = self._rectDistance(key, x, y)
+                    if d <= best_d:
+                        best = self._items[key]
+                        best_d = d
+        return best
+
+    def _rectDistance(self, key, x, y):
+        l, t, r, b = self._rects[key]
+        dx = max(l - x, 0.0, x - r)
+        dy = max(t - y, 0.0, y - b)
+        return sqrt(dx*dx + dy*dy)
+
+    def _ring(self, ci, cj, k):
+        if k == 0:
+            yield ci, cj
+            return
+        for i in range(ci - k, ci + k + 1):
+            yield i, cj - k
+            yield i, cj + k
+        for j in range(cj - k + 1, cj + k):
+            yield ci - k, j
+            yield ci + k, j
+
+    def _occupiedCellBounds(self):
+        if self._bounds is None:
+            cells = self._cells.values()
+            self._bounds = (min(c[0] for c in cells), min(c[1] for c in cells),
+                            max(c[2] for c in cells), max(c[3] for c in cells))
+        return self._bounds
@@ -0,0 +1,32 @@
+import os
+import sys
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from PyQt5.QtWidgets import QApplication
+
+
+@pytest.fixture(scope="session")
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def editor(app):
+    from graph_scene import GraphScene
+    from category_diagram_editor import CategoryDiagramEditor
+    editor = CategoryDiagramEditor(window=None)
+    editor.setScene(GraphScene())
+    yield editor
+    editor.scene().clear()
+
+
+@pytest.fixture
+def diagram(editor):
+    from category_diagram import CategoryDiagram
+    C = CategoryDiagram()
+    C.setEditor(editor)
+    editor.addNode(C)
+    return C
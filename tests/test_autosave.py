@@ -0,0 +1,54 @@
+import os
+import pytest
+from autosave import Autosave, AutosaveWorker
+from category_object import CategoryObject
+from category_diagram_editor import CategoryDiagramEditor
+from graph_scene import GraphScene
+
+
+@pytest.fixture
+def autosave(app, tmp_path):
+    autosave = Autosave(directory=str(tmp_path))
+    yield autosave
+    autosave.stop()
+
+
+def newEditor():
+    editor = CategoryDiagramEditor(window=None)
+    editor.setScene(GraphScene())
+    return editor
+
+
+def test_editors_with_the_same_name_get_their_own_files(autosave, tmp_path):
+    first, second = newEditor(), newEditor()
+    autosave.watch(first, "main")
+    autosave.watch(second, "main")
+    assert autosave.path(first) == os.path.join(str(tmp_path), "main.adcp")
+    assert autosave.path(second) == os.path.join(str(tmp_path), "main (2).adcp")
+    autosave.watch(first, "main")
+    assert autosave.path(first) == os.path.join(str(tmp_path), "main.adcp")
+
+
+class UnsavedObject(CategoryObject):
+    pass
+
+
+def test_snapshot_failure_is_reported(autosave, diagram, editor):
+    x = UnsavedObject()
+    x.setEditor(editor)
+    diagram.addObject(x)
+    failures = []
+    autosave.failed.connect(lambda path, message: failures.append(message))
+    autosave.watch(editor, "main")
+    assert autosave.save(editor) is False
+    assert failures and "UnsavedObject" in failures[0]
+    assert not autosave.isSaving()
+
+
+def test_worker_reports_serialization_failure(app, tmp_path):
+    worker = AutosaveWorker()
+    failures = []
+    worker.failed.connect(lambda path, message: failures.append(path))
+    path = os.path.join(str(tmp_path), "main.adcp")
+    worker.save(path, object())
+    assert failures == [path]
@@ -0,0 +1,45 @@
+from PyQt5.QtCore import QPointF
+from category_diagram import CategoryDiagram
+from category_object import CategoryObject
+
+
+def addObject(diagram, editor, pos):
+    x = CategoryObject()
+    x.setEditor(editor)
+    diagram.addObject(x)
+    x.setPos(pos)
+    return x
+
+
+def addNestedDiagram(diagram, editor):
+    D = CategoryDiagram()
+    D.setEditor(editor)
+    diagram.addObject(D)
+    return D
+
+
+def test_bounding_rect_covers_members(diagram, editor):
+    x = addObject(diagram, editor, QPointF(0, 0))
+    y = addObject(diagram, editor, QPointF(300, 100))
+    rect = diagram.boundingRect()
+    for obj in (x, y):
+        assert rect.contains(obj.boundingRect().translated(obj.pos()))
+
+
+def test_nested_diagram_growth_grows_parent(diagram, editor):
+    D = addNestedDiagram(diagram, editor)
+    addObject(diagram, editor, QPointF(-200, 0))
+    y = addObject(D, editor, QPointF(0, 0))
+    y.setPos(QPointF(1500, 0))
+    nested = D.boundingRect().translated(D.pos())
+    assert nested.right() > 1500
+    assert diagram.boundingRect().contains(nested)
+    assert diagram.objectsAt(QPointF(nested.right() - 1, 0)) == [D]
+
+
+def test_nested_diagram_shrink_shrinks_parent(diagram, editor):
+    D = addNestedDiagram(diagram, editor)
+    addObject(diagram, editor, QPointF(0, 0))
+    y = addObject(D, editor, QPointF(800, 0))
+    y.setPos(QPointF(100, 0))
+    assert diagram.boundingRect().right() < 800
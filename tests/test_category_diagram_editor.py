@@ -0,0 +1,42 @@
+from PyQt5.QtCore import QPointF
+from category_diagram import CategoryDiagram
+from category_object import CategoryObject
+from category_arrow import CategoryArrow
+
+
+def grownNestedDiagram(diagram, editor):
+    # An object x of diagram, and a diagram D beside it whose only member was moved far out
+    x = CategoryObject()
+    x.setEditor(editor)
+    diagram.addObject(x)
+    x.setPos(QPointF(-200, 0))
+    D = CategoryDiagram()
+    D.setEditor(editor)
+    diagram.addObject(D)
+    y = CategoryObject()
+    y.setEditor(editor)
+    D.addObject(y)
+    y.setPos(QPointF(1500, 0))
+    return x, D, y
+
+
+def outsideMember(D, y):
+    # A scene point inside D's grown rect, but clear of its member y
+    rect = D.boundingRect()
+    return D.mapToScene(QPointF(rect.left() + 2, rect.center().y()))
+
+
+def test_arrow_end_dropped_on_grown_nested_diagram_attaches(diagram, editor):
+    x, D, y = grownNestedDiagram(diagram, editor)
+    f = CategoryArrow()
+    f.setEditor(editor)
+    diagram.addMorphism(f)
+    f.setDomain(x)
+    editor.arrowExtremityHasChanged(f, outsideMember(D, y))
+    assert f.codomain() is D
+
+
+def test_category_item_at_finds_grown_nested_diagram(diagram, editor):
+    x, D, y = grownNestedDiagram(diagram, editor)
+    assert editor.categoryItemAt(outsideMember(D, y)) is D
+    assert editor.categoryItemAt(y.mapToScene(QPointF(0, 0))) is y
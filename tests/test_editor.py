@@ -0,0 +1,37 @@
+from PyQt5.QtWidgets import QUndoCommand
+from editor import Editor
+
+
+class Counter(QUndoCommand):
+    def __init__(self, counter):
+        super().__init__("count")
+        self._counter = counter
+
+    def redo(self):
+        self._counter[0] += 1
+
+    def undo(self):
+        self._counter[0] -= 1
+
+
+def test_undo_stack_has_default_limit(editor):
+    assert editor.undoLimit() == Editor.DefaultUndoLimit
+    assert editor.undoStack().undoLimit() == Editor.DefaultUndoLimit
+
+
+def test_undo_limit_drops_oldest_commands(editor):
+    counter = [0]
+    editor.setUndoLimit(3)
+    for k in range(5):
+        editor.pushCommand(Counter(counter))
+    assert editor.undoStack().count() == 3
+    for k in range(5):
+        editor.undo()
+    assert counter[0] == 2
+
+
+def test_set_undo_limit_on_busy_stack(editor):
+    editor.pushCommand(Counter([0]))
+    editor.setUndoLimit(2)
+    assert editor.undoLimit() == 2
+    assert editor.undoStack().count() == 0
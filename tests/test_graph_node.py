@@ -0,0 +1,31 @@
+from copy import deepcopy
+from category_object import CategoryObject
+from category_arrow import CategoryArrow
+from gfx_object import ArrowlessCopy
+
+
+def arrowBetween(app):
+    x, y = CategoryObject(), CategoryObject()
+    f = CategoryArrow()
+    f.setDomain(x)
+    f.setCodomain(y)
+    return x, y, f
+
+
+def test_deepcopy_copies_arrows(app):
+    x, y, f = arrowBetween(app)
+    xc = deepcopy(x)
+    assert len(xc.arrows()) == 1
+    fc = xc.arrows()[0]
+    assert fc is not f and fc.domain() is xc
+    assert fc.codomain().arrows() == [fc]
+
+
+def test_arrowless_deepcopy_attaches_copied_arrows(app):
+    x, y, f = arrowBetween(app)
+    memo = {ArrowlessCopy : True}
+    xc = deepcopy(x, memo)
+    assert xc.arrows() == []
+    fc = deepcopy(f, memo)
+    assert xc.arrows() == [fc]
+    assert fc.codomain().arrows() == [fc]
@@ -0,0 +1,70 @@
+from label_terms import word, compose, parse, setContravariantTemplate
+from category_diagram import CategoryDiagram
+from category_object import CategoryObject
+from category_arrow import CategoryArrow
+from functor import Functor
+
+
+def test_op_reverses_composite_factors():
+    assert word("(g∘f)^op") is compose(word("f^op"), word("g^op"))
+    assert str(word("(g∘f)^op")) == "f^op∘g^op"
+    assert str(parse("(g∘f)^op")) == "(g∘f)^op"
+
+
+def test_covariant_functor_keeps_factor_order():
+    assert word("F(g∘f)") is compose(word("F(g)"), word("F(f)"))
+
+
+def test_contravariant_template_reverses_factor_order():
+    before = word("K(g∘f)∘h")
+    setContravariantTemplate("K(.)", True)
+    try:
+        assert word("K(g∘f)") is compose(word("K(f)"), word("K(g)"))
+        assert word("K(g∘f)∘h") is compose(compose(word("K(f)"), word("K(g)")), word("h"))
+    finally:
+        setContravariantTemplate("K(.)", False)
+    assert word("K(g∘f)∘h") is before
+
+
+def addObject(diagram, editor, symbol):
+    x = CategoryObject()
+    x.setEditor(editor)
+    diagram.addObject(x)
+    x.setSymbol(symbol)
+    return x
+
+
+def addMorphism(diagram, editor, symbol, dom, cod):
+    f = CategoryArrow()
+    f.setEditor(editor)
+    diagram.addMorphism(f)
+    f.setDomain(dom)
+    f.setCodomain(cod)
+    f.setSymbol(symbol)
+    return f
+
+
+def test_contravariant_functor_image_commutes(diagram, editor):
+    X, Y, Z = (addObject(diagram, editor, symbol) for symbol in "XYZ")
+    addMorphism(diagram, editor, "f", X, Y)
+    addMorphism(diagram, editor, "g", Y, Z)
+    addMorphism(diagram, editor, "g∘f", X, Z)
+    assert diagram.commutativity().commutes()
+    D = CategoryDiagram()
+    D.setEditor(editor)
+    editor.addNode(D)
+    G = Functor()
+    G.setEditor(editor)
+    editor.addArrow(G)
+    G.setSymbol("G")
+    G.setDomain(diagram)
+    G.setCodomain(D)
+    G.setContravariant(True)
+    try:
+        G.takeImage()
+        assert len(D.morphisms()) == 3
+        assert D.commutativity().commutes()
+        G.setContravariant(False)      # The image arrows turn around with the factors
+        assert D.commutativity().commutes()
+    finally:
+        G.setContravariant(False)
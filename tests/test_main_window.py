@@ -0,0 +1,34 @@
+import pytest
+from PyQt5.QtCore import qInstallMessageHandler
+from main_window import MainWindow
+from project_file import saveProject
+
+
+@pytest.fixture
+def window(app, tmp_path):
+    messages = []
+    previous = qInstallMessageHandler(lambda kind, context, message: messages.append(message))
+    window = MainWindow(app)
+    window.autosave._directory = str(tmp_path / "autosave")
+    window.messages = messages
+    yield window
+    window.autosave.stop()
+    qInstallMessageHandler(previous)
+    for editor in window._editors.values():
+        editor.scene().clear()
+
+
+def test_opening_a_project_loads_tabs_without_warnings(window, tmp_path):
+    project = tmp_path / "project"
+    project.mkdir()
+    for name in ("main", "second"):
+        saveProject(str(project / (name + ".adcp")), window.currentEditor())
+    window.openProject(str(project))
+    tabs = window.tabWidget
+    assert [tabs.tabText(k) for k in range(tabs.count())] == ["main", "main", "second"]
+    for k in range(tabs.count()):
+        tabs.setCurrentIndex(k)
+        editor = tabs.currentWidget()
+        assert window.commandTimeline.stackedWidget.currentWidget() is editor.undoView()
+    assert sorted(window._editors) == ["main", "main (2)", "second"]
+    assert not [m for m in window.messages if "QStackedWidget" in m]
@@ -3,7 +3,7 @@ from PyQt5.QtCore import Qt, QPointF, pyqtSignal, QEvent, QRectF, QTimer
 from PyQt5.QtGui import QColor, QTextCursor, QPainter, QFontMetrics
 from qt_tools import PseudoSignal, Pen, unpickleGfxItemFlags
 from copy import deepcopy
-from uuid import uuid4
+from uid_allocator import newUid
 
 class KeyPressedSignal(PseudoSignal):
     signal = pyqtSignal()
@@ -25,7 +25,7 @@ class TextItem(QGraphicsTextItem):
         self.setFlags(self.ItemIsMovable | self.ItemIsFocusable | self.ItemIsSelectable | self.ItemSendsGeometryChanges)
         self.pressedEventHandler = None
         self.onPositionChanged = None
-        self._uid = uuid4()        
+        self._uid = newUid()
         self._dispatchTimer = None        
         
     def setupConnections(self):
@@ -73,13 +73,13 @@ class TextItem(QGraphicsTextItem):
     def __deepcopy__(self, memo):
         copy = type(self)(new=False)
         copy._editable = self._editable
-        copy._editColor = QColor(self._editColor)
-        copy._colorSave = QColor(self._colorSave)
+        copy._editColor = self._editColor       # Colors and constraints are replaced, never changed in place
+        copy._colorSave = self._colorSave
         copy.setPlainText(self.toPlainText())
         memo[id(self)] = copy
         copy.setFlags(self.flags())
         copy.setDefaultTextColor(self.defaultTextColor())
-        copy._constraints = deepcopy(self._constraints, memo)
+        copy._constraints = self._constraints
         copy.setPos(self.pos())
         copy.setupConnections()
         return copy
@@ -201,5 +201,5 @@ class TextItem(QGraphicsTextItem):
         return self._constraints != []    
     
     def addConstraint(self, constraint):
-        self._constraints.append(constraint)
+        self._constraints = self._constraints + [constraint]
         
\ No newline at end of file
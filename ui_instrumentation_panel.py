@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+# Form implementation generated from reading ui file 'instrumentation_panel.ui'
+#
+# Created by: PyQt5 UI code generator 5.15.11
+#
+# WARNING: Any manual changes made to this file will be lost when pyuic5 is
+# run again.  Do not edit this file unless you know what you are doing.
+
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+
+class Ui_InstrumentationPanel(object):
+    def setupUi(self, InstrumentationPanel):
+        InstrumentationPanel.setObjectName("InstrumentationPanel")
+        InstrumentationPanel.resize(420, 365)
+        self.dockWidgetContents = QtWidgets.QWidget()
+        self.dockWidgetContents.setObjectName("dockWidgetContents")
+        self.gridLayout = QtWidgets.QGridLayout(self.dockWidgetContents)
+        self.gridLayout.setContentsMargins(3, 3, 3, 3)
+        self.gridLayout.setObjectName("gridLayout")
+        self.recordCheckBox = QtWidgets.QCheckBox(self.dockWidgetContents)
+        self.recordCheckBox.setObjectName("recordCheckBox")
+        self.gridLayout.addWidget(self.recordCheckBox, 0, 0, 1, 1)
+        self.resetButton = QtWidgets.QPushButton(self.dockWidgetContents)
+        self.resetButton.setObjectName("resetButton")
+        self.gridLayout.addWidget(self.resetButton, 0, 1, 1, 1)
+        self.exportButton = QtWidgets.QPushButton(self.dockWidgetContents)
+        self.exportButton.setObjectName("exportButton")
+        self.gridLayout.addWidget(self.exportButton, 0, 2, 1, 1)
+        self.statsTable = QtWidgets.QTableWidget(self.dockWidgetContents)
+        self.statsTable.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.statsTable.setObjectName("statsTable")
+        self.statsTable.setColumnCount(9)
+        self.statsTable.setRowCount(0)
+        item = QtWidgets.QTableWidgetItem()
+        self.statsTable.setHorizontalHeaderItem(0, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.statsTable.setHorizontalHeaderItem(1, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.statsTable.setHorizontalHeaderItem(2, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.statsTable.setHorizontalHeaderItem(3, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.statsTable.setHorizontalHeaderItem(4, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.statsTable.setHorizontalHeaderItem(5, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.statsTable.setHorizontalHeaderItem(6, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.statsTable.setHorizontalHeaderItem(7, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.statsTable.setHorizontalHeaderItem(8, item)
+        self.gridLayout.addWidget(self.statsTable, 1, 0, 1, 3)
+        InstrumentationPanel.setWidget(self.dockWidgetContents)
+
+        self.retranslateUi(InstrumentationPanel)
+        QtCore.QMetaObject.connectSlotsByName(InstrumentationPanel)
+
+    def retranslateUi(self, InstrumentationPanel):
+        _translate = QtCore.QCoreApplication.translate
+        InstrumentationPanel.setWindowTitle(_translate("InstrumentationPanel", "Instrumentation"))
+        self.recordCheckBox.setText(_translate("InstrumentationPanel", "Record"))
+        self.resetButton.setText(_translate("InstrumentationPanel", "Reset"))
+        self.exportButton.setText(_translate("InstrumentationPanel", "Export Stacks..."))
+        self.statsTable.setSortingEnabled(True)
+        item = self.statsTable.horizontalHeaderItem(0)
+        item.setText(_translate("InstrumentationPanel", "Class"))
+        item = self.statsTable.horizontalHeaderItem(1)
+        item.setText(_translate("InstrumentationPanel", "Method"))
+        item = self.statsTable.horizontalHeaderItem(2)
+        item.setText(_translate("InstrumentationPanel", "Calls"))
+        item = self.statsTable.horizontalHeaderItem(3)
+        item.setText(_translate("InstrumentationPanel", "Total (ms)"))
+        item = self.statsTable.horizontalHeaderItem(4)
+        item.setText(_translate("InstrumentationPanel", "Mean (µs)"))
+        item = self.statsTable.horizontalHeaderItem(5)
+        item.setText(_translate("InstrumentationPanel", "p50 (µs)"))
+        item = self.statsTable.horizontalHeaderItem(6)
+        item.setText(_translate("InstrumentationPanel", "p90 (µs)"))
+        item = self.statsTable.horizontalHeaderItem(7)
+        item.setText(_translate("InstrumentationPanel", "p99 (µs)"))
+        item = self.statsTable.horizontalHeaderItem(8)
+        item.setText(_translate("InstrumentationPanel", "Max (µs)"))
@@ -44,6 +44,8 @@ class Ui_MainWindow(object):
         self.statusbar = QtWidgets.QStatusBar(MainWindow)
         self.statusbar.setObjectName("statusbar")
         MainWindow.setStatusBar(self.statusbar)
+        self.actionOpen = QtWidgets.QAction(MainWindow)
+        self.actionOpen.setObjectName("actionOpen")
         self.actionDelete = QtWidgets.QAction(MainWindow)
         self.actionDelete.setObjectName("actionDelete")
         self.actionCopy = QtWidgets.QAction(MainWindow)
@@ -54,6 +56,7 @@ class Ui_MainWindow(object):
         self.actionUndo.setObjectName("actionUndo")
         self.actionRedo = QtWidgets.QAction(MainWindow)
         self.actionRedo.setObjectName("actionRedo")
+        self.menuProject.addAction(self.actionOpen)
         self.menuEdit.addAction(self.actionDelete)
         self.menuEdit.addSeparator()
         self.menuEdit.addAction(self.actionCopy)
@@ -74,6 +77,8 @@ class Ui_MainWindow(object):
         self.menuProject.setTitle(_translate("MainWindow", "Project"))
         self.menuView.setTitle(_translate("MainWindow", "View"))
         self.menuEdit.setTitle(_translate("MainWindow", "Edit"))
+        self.actionOpen.setText(_translate("MainWindow", "Open..."))
+        self.actionOpen.setShortcut(_translate("MainWindow", "Ctrl+O"))
         self.actionDelete.setText(_translate("MainWindow", "Delete"))
         self.actionDelete.setShortcut(_translate("MainWindow", "Del"))
         self.actionCopy.setText(_translate("MainWindow", "Copy"))
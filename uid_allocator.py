@@ -0,0 +1,46 @@
+# Item ids.  Small ints hash and compare faster than uuid strings and take a fraction of the
+# memory.  They are only unique within one editor (one project tab): project files refer to items by
+# table row (see project_file), so ids never have to survive a save and load.
+
+from contextlib import contextmanager
+
+class UidAllocator:
+    def __init__(self, start=1):
+        self._next = start
+
+    def allocate(self):
+        uid = self._next
+        self._next = uid + 1
+        return uid
+
+    def reserve(self, uid):
+        # An id set from outside (setUid) is never handed out again
+        if isinstance(uid, int) and uid >= self._next:
+            self._next = uid + 1
+
+    def nextUid(self):
+        return self._next
+
+
+# Each editor owns an allocator (Editor.uidAllocator); the window installs the current tab's,
+# and a project load installs its editor's for as long as it builds items.
+_allocator = UidAllocator()
+
+def allocator():
+    return _allocator
+
+def setAllocator(alloc):
+    global _allocator
+    _allocator = alloc
+
+@contextmanager
+def installedAllocator(alloc):
+    previous = _allocator
+    setAllocator(alloc)
+    try:
+        yield alloc
+    finally:
+        setAllocator(previous)
+
+def newUid():
+    return _allocator.allocate()